@@ -0,0 +1,5 @@
+"""
+Performance benchmarks for the Games XBlock.
+
+These are not part of the unit test run; see the ``bench-*`` Makefile targets.
+"""
@@ -0,0 +1,144 @@
+"""
+Render, crypto, reshuffle and save paths benchmarked across deck sizes.
+
+Run with ``make bench`` (or ``make bench-compare`` to diff against the
+stored baseline). Besides timings, each benchmark records the bytes it
+produces in ``extra_info`` so payload growth is caught as well as slowdowns.
+
+Usage::
+
+    pytest benchmarks/bench_handlers.py --no-cov [--deck-sizes 10 100]
+"""
+
+import json
+
+import pytest
+from django.test import override_settings
+
+from benchmarks.common import json_request
+from games.constants import CIPHER_BACKEND, GAME_TYPE
+from games.handlers.common import CommonHandlers
+from games.handlers.matching import MatchingHandlers
+from games.payload import encode_payload
+from games.randomness import RenderRandom
+
+
+def matching_key(xblock, cards):
+    """Return the answer key the matching view encrypts for a deck."""
+    _, matched_entries, _ = MatchingHandlers.build_pages(xblock, cards)
+    return matched_entries
+
+
+@pytest.mark.benchmark(group="matching student_view")
+def test_matching_student_view(benchmark, make_block, deck):
+    """Full matching render: shuffle, key, encryption, encoding, template and assets."""
+    xblock = make_block(GAME_TYPE.MATCHING, deck)
+
+    frag = benchmark(xblock.student_view)
+
+    mapping_payload, _, _ = MatchingHandlers.build_payload(xblock, deck)
+    benchmark.extra_info["html_bytes"] = len(frag.content.encode("utf-8"))
+    benchmark.extra_info["payload_bytes"] = len(encode_payload(mapping_payload))
+
+
+@pytest.mark.benchmark(group="flashcards student_view")
+def test_flashcards_student_view(benchmark, make_block, deck):
+    """Full flashcards render with the whole deck embedded."""
+    xblock = make_block(GAME_TYPE.FLASHCARDS, deck)
+
+    frag = benchmark(xblock.student_view)
+
+    benchmark.extra_info["html_bytes"] = len(frag.content.encode("utf-8"))
+
+
+@pytest.mark.parametrize("backend", CIPHER_BACKEND.VALID)
+def test_encrypt_for_block(benchmark, make_block, deck, backend):
+    """Encryption of the matching answer key with the block's cached cipher."""
+    benchmark.group = f"encrypt_for_block {backend}"
+    xblock = make_block(GAME_TYPE.MATCHING, deck)
+    key = matching_key(xblock, deck)
+
+    with override_settings(GAMESXBLOCK_CIPHER_BACKEND=backend):
+        token = benchmark(CommonHandlers.encrypt_for_block, xblock, key)
+
+    benchmark.extra_info["token_bytes"] = len(token)
+
+
+@pytest.mark.parametrize("backend", CIPHER_BACKEND.VALID)
+def test_decrypt_for_block(benchmark, make_block, deck, backend):
+    """Decryption of the matching answer key, choosing the cipher from the token."""
+    benchmark.group = f"decrypt_for_block {backend}"
+    xblock = make_block(GAME_TYPE.MATCHING, deck)
+    key = matching_key(xblock, deck)
+    with override_settings(GAMESXBLOCK_CIPHER_BACKEND=backend):
+        token = CommonHandlers.encrypt_for_block(xblock, key)
+
+    assert benchmark(CommonHandlers.decrypt_for_block, xblock, token) == key
+
+
+@pytest.mark.benchmark(group="save_settings")
+def test_save_settings(benchmark, make_block, deck):
+    """Saving a whole deck through the json handler, including request decoding."""
+    xblock = make_block(GAME_TYPE.FLASHCARDS, [])
+    request = json_request({"game_type": GAME_TYPE.MATCHING, "cards": deck})
+
+    response = benchmark(xblock.save_settings, request)
+
+    assert json.loads(response.body)["success"]
+    benchmark.extra_info["request_bytes"] = len(request.body)
+    benchmark.extra_info["response_bytes"] = len(response.body)
+
+
+@pytest.mark.benchmark(group="refresh_game")
+def test_refresh_game(benchmark, make_block, deck):
+    """A "play again" page render through the handler."""
+    xblock = make_block(GAME_TYPE.MATCHING, deck)
+
+    response = benchmark(xblock.refresh_game, json_request({}))
+
+    benchmark.extra_info["response_bytes"] = len(response.body)
+
+
+@pytest.mark.benchmark(group="reshuffle_matching_game")
+def test_reshuffle_matching_game(benchmark, make_block, deck):
+    """A "play again" reshuffle: new pages and their encrypted key, without the template."""
+    xblock = make_block(GAME_TYPE.MATCHING, deck)
+
+    response = benchmark(xblock.reshuffle_matching_game, json_request({}))
+
+    assert json.loads(response.body)["success"]
+    benchmark.extra_info["response_bytes"] = len(response.body)
+
+
+@pytest.mark.benchmark(group="patch_cards")
+def test_patch_cards(benchmark, make_block, deck):
+    """An incremental edit: one card updated and the last card moved to the front."""
+    xblock = make_block(GAME_TYPE.MATCHING, deck)
+
+    def patch():
+        last_key = xblock.cards[-1]["card_key"]
+        operations = [
+            {"op": "update", "card_key": last_key, "fields": {"definition": "edited"}},
+            {"op": "move", "card_key": last_key, "position": 0},
+        ]
+        return xblock.patch_cards(json_request({"cards_version": xblock.cards_version, "operations": operations}))
+
+    response = benchmark(patch)
+
+    assert json.loads(response.body)["success"]
+    benchmark.extra_info["response_bytes"] = len(response.body)
+
+
+@pytest.mark.benchmark(group="format_as_uuid_like")
+def test_format_as_uuid_like(benchmark, deck_size):
+    """Formatting every key of a matching deck (two entries per card), with the render's entropy draw."""
+    item_count = deck_size * 2
+    keys = RenderRandom(item_count=item_count, extra_bytes=0).key_hexes(item_count)
+
+    def format_all():
+        randomness = RenderRandom(item_count=item_count, extra_bytes=0)
+        return [CommonHandlers.format_as_uuid_like(key, index, randomness) for index, key in enumerate(keys)]
+
+    entries = benchmark(format_all)
+
+    assert len(entries) == item_count
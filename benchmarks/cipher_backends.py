@@ -0,0 +1,71 @@
+"""
+Compare cipher backends for the matching answer key.
+
+For each deck size, builds a matching key like MatchingHandlers.student_view
+does and reports encrypt/decrypt latency, token size, and the size of the
+token once it is embedded in the base64 page payload.
+
+Usage::
+
+    python -m benchmarks.cipher_backends [--sizes 10 100 1000]
+"""
+
+import argparse
+import base64
+import json
+import sys
+from unittest.mock import Mock
+
+from benchmarks.common import format_table, measure, setup_django
+
+
+def build_matching_key(num_cards):
+    """Return a matched_entries list shaped like the one built by the matching view."""
+    from games.handlers.common import CommonHandlers  # pylint: disable=import-outside-toplevel
+
+    entries = []
+    for index in range(num_cards):
+        entries.append(CommonHandlers.format_as_uuid_like(f"{index:08x}", 2 * index + 1))
+        entries.append(CommonHandlers.format_as_uuid_like(f"{index + 1:08x}", 2 * index))
+    return entries
+
+
+def main(argv=None):
+    """Run the comparison and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="deck sizes (cards)")
+    args = parser.parse_args(argv)
+
+    setup_django()
+    from games.constants import CIPHER_BACKEND  # pylint: disable=import-outside-toplevel
+    from games.handlers.common import CommonHandlers  # pylint: disable=import-outside-toplevel
+
+    xblock = Mock()
+    xblock.scope_ids.usage_id.block_id = "benchmark-block"
+
+    rows = []
+    for num_cards in args.sizes:
+        plaintext = json.dumps(build_matching_key(num_cards), separators=(",", ":")).encode()
+        for backend in CIPHER_BACKEND.VALID:
+            cipher = CommonHandlers.get_cipher(xblock, backend)
+            token = cipher.encrypt(plaintext)
+            embedded = base64.b64encode(json.dumps({"key": token}).encode())
+            rows.append((
+                num_cards,
+                backend,
+                f"{measure(lambda cipher=cipher: cipher.encrypt(plaintext)) * 1e6:.1f}",
+                f"{measure(lambda cipher=cipher, token=token: cipher.decrypt(token)) * 1e6:.1f}",
+                len(plaintext),
+                len(token),
+                len(embedded),
+            ))
+
+    print(format_table(
+        ("cards", "backend", "encrypt us", "decrypt us", "plain B", "token B", "embedded B"),
+        rows,
+    ))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
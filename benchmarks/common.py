@@ -0,0 +1,57 @@
+"""
+Shared helpers for the Games XBlock benchmarks.
+"""
+
+import json
+import os
+import statistics
+import time
+from unittest.mock import Mock
+
+
+def setup_django():
+    """Configure Django with the test settings so handlers can run outside pytest."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.settings")
+    import django  # pylint: disable=import-outside-toplevel
+
+    django.setup()
+
+
+def measure(func, repeat=7, number=None, min_time=0.05):
+    """
+    Time a zero-argument callable.
+
+    Runs func in batches of ``number`` calls (auto-scaled so a batch takes at
+    least ``min_time`` seconds) and returns the median time per call in seconds.
+    """
+    if number is None:
+        number = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            if time.perf_counter() - start >= min_time:
+                break
+            number *= 2
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return statistics.median(samples)
+
+
+def format_table(headers, rows):
+    """Format rows as a fixed-width text table."""
+    widths = [max(len(str(value)) for value in column) for column in zip(headers, *rows)]
+    lines = ["  ".join(str(value).rjust(width) for value, width in zip(headers, widths))]
+    lines.append("  ".join("-" * width for width in widths))
+    for row in rows:
+        lines.append("  ".join(str(value).rjust(width) for value, width in zip(row, widths)))
+    return "\n".join(lines)
+
+
+def json_request(data):
+    """Return a stand-in request as XBlock json handlers receive it."""
+    return Mock(method="POST", body=json.dumps(data).encode("utf-8"))
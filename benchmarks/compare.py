@@ -0,0 +1,145 @@
+"""
+Compare a benchmark run against a stored baseline.
+
+Reads the JSON written by ``pytest --benchmark-json`` for bench_handlers.py
+and checks each benchmark against the baseline:
+
+- time: the median may grow by at most --max-slowdown (default 25%)
+- scaling: the ratio of its median to that of the next smaller deck may
+  grow by at most --max-scaling (default 100%). This catches an O(n) path
+  turning O(n^2) even when the baseline was recorded on another machine
+- size: every byte count in extra_info may grow by at most --max-growth
+  (default 5%)
+
+Exits with status 1 if any check fails. Baselines keep only the medians and
+sizes, so they stay small enough to commit; timings are only comparable on
+similar hardware, so re-record the baseline on the machine that runs the
+comparison (``make bench-baseline``).
+
+Usage::
+
+    python -m benchmarks.compare BASELINE RESULTS [--max-slowdown 0.25]
+    python -m benchmarks.compare --save BASELINE RESULTS
+"""
+
+import argparse
+import json
+import sys
+
+from benchmarks.common import format_table
+
+
+def load(path):
+    """
+    Return ``{name: {"group", "deck_size", "median", "extra_info"}}`` from a results or baseline file.
+    """
+    with open(path, encoding="utf-8") as results_file:
+        data = json.load(results_file)
+    benchmarks = data["benchmarks"]
+    if isinstance(benchmarks, dict):
+        return benchmarks
+    return {
+        benchmark["name"]: {
+            "group": benchmark["group"],
+            "deck_size": (benchmark.get("params") or {}).get("deck_size"),
+            "median": benchmark["stats"]["median"],
+            "extra_info": benchmark.get("extra_info", {}),
+        }
+        for benchmark in benchmarks
+    }
+
+
+def save_baseline(results_path, baseline_path):
+    """Write the medians and sizes of a results file as the new baseline."""
+    with open(results_path, encoding="utf-8") as results_file:
+        machine_info = json.load(results_file).get("machine_info", {})
+    baseline = {
+        "machine_info": {key: machine_info.get(key) for key in ("node", "machine", "python_version", "cpu")},
+        "benchmarks": load(results_path),
+    }
+    if isinstance(baseline["machine_info"]["cpu"], dict):
+        baseline["machine_info"]["cpu"] = baseline["machine_info"]["cpu"].get("brand_raw")
+    with open(baseline_path, "w", encoding="utf-8") as baseline_file:
+        json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+        baseline_file.write("\n")
+
+
+def scaling(benchmarks, name):
+    """Return the median of a benchmark over that of the same group at the next smaller deck size."""
+    benchmark = benchmarks[name]
+    smaller = [
+        other for other in benchmarks.values()
+        if other["group"] == benchmark["group"] and (other["deck_size"] or 0) < (benchmark["deck_size"] or 0)
+    ]
+    if not smaller:
+        return None
+    previous = max(smaller, key=lambda other: other["deck_size"])
+    return benchmark["median"] / previous["median"]
+
+
+def compare(baseline, current, max_slowdown, max_scaling, max_growth):
+    """Return ``(rows, failures)`` comparing every benchmark present in both runs."""
+    rows, failures = [], []
+    for name in sorted(current, key=lambda name: (current[name]["group"], current[name]["deck_size"] or 0)):
+        if name not in baseline:
+            rows.append((name, "-", f"{current[name]['median'] * 1e3:.3f}", "-", "-", "new"))
+            continue
+        before, after = baseline[name], current[name]
+        problems = []
+        change = after["median"] / before["median"] - 1
+        if change > max_slowdown:
+            problems.append("slower")
+
+        scaling_before, scaling_after = scaling(baseline, name), scaling(current, name)
+        scaling_text = "-"
+        if scaling_before and scaling_after:
+            scaling_text = f"{scaling_before:.1f}x -> {scaling_after:.1f}x"
+            if scaling_after > scaling_before * (1 + max_scaling):
+                problems.append("scaling")
+
+        for key, size in after["extra_info"].items():
+            previous_size = before["extra_info"].get(key)
+            if previous_size and size > previous_size * (1 + max_growth):
+                problems.append(f"{key} {previous_size}->{size}")
+
+        if problems:
+            failures.append((name, problems))
+        rows.append((
+            name,
+            f"{before['median'] * 1e3:.3f}",
+            f"{after['median'] * 1e3:.3f}",
+            f"{change:+.0%}",
+            scaling_text,
+            ", ".join(problems) or "ok",
+        ))
+    return rows, failures
+
+
+def main(argv=None):
+    """Compare a run with the baseline, or save it as the baseline."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline", help="baseline JSON file")
+    parser.add_argument("results", help="pytest --benchmark-json output")
+    parser.add_argument("--save", action="store_true", help="store results as the new baseline")
+    parser.add_argument("--max-slowdown", type=float, default=0.25, help="allowed median growth (default: 0.25)")
+    parser.add_argument("--max-scaling", type=float, default=1.0, help="allowed scaling growth (default: 1.0)")
+    parser.add_argument("--max-growth", type=float, default=0.05, help="allowed size growth (default: 0.05)")
+    args = parser.parse_args(argv)
+
+    if args.save:
+        save_baseline(args.results, args.baseline)
+        print(f"Saved {args.results} as the baseline {args.baseline}")
+        return 0
+
+    rows, failures = compare(
+        load(args.baseline), load(args.results), args.max_slowdown, args.max_scaling, args.max_growth
+    )
+    print(format_table(("benchmark", "baseline ms", "current ms", "change", "scaling", "status"), rows))
+    if failures:
+        print(f"\n{len(failures)} benchmarks regressed")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
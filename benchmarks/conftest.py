@@ -0,0 +1,61 @@
+"""
+Fixtures for the pytest-benchmark suite (``make bench``).
+"""
+
+from unittest.mock import Mock
+
+import pytest
+from xblock.field_data import DictFieldData
+from xblock.fields import ScopeIds
+
+from benchmarks.decks import make_deck
+
+DEFAULT_DECK_SIZES = (10, 100, 1000, 10000)
+
+
+class StubRuntime:
+    """The runtime calls the benchmarked handlers make, without the call recording of a Mock."""
+
+    is_author_mode = False
+
+    def local_resource_url(self, block, uri):  # pylint: disable=unused-argument
+        return f"/xblock/resource/games/{uri}"
+
+    def save_block(self, block):
+        """Field data is in memory already; there is nothing to persist."""
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--deck-sizes",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_DECK_SIZES),
+        help="Deck sizes (cards) to benchmark at (default: 10 100 1000 10000).",
+    )
+
+
+def pytest_generate_tests(metafunc):
+    """Run every benchmark taking ``deck_size`` once per configured size."""
+    if "deck_size" in metafunc.fixturenames:
+        metafunc.parametrize("deck_size", metafunc.config.getoption("deck_sizes"))
+
+
+@pytest.fixture
+def deck(deck_size):
+    """Return the synthetic deck for the current size."""
+    return make_deck(deck_size)
+
+
+@pytest.fixture
+def make_block():
+    """Return a factory of games blocks on a stand-in runtime, as a learner sees them."""
+    from games.games import GamesXBlock  # pylint: disable=import-outside-toplevel
+
+    def factory(game_type, cards, **fields):
+        runtime = StubRuntime()
+        field_data = DictFieldData({"game_type": game_type, "cards": cards, "is_shuffled": True, **fields})
+        usage_id = Mock(block_id="benchmark-block")
+        return GamesXBlock(runtime, field_data, ScopeIds("user", "games", "definition", usage_id))
+
+    return factory
@@ -0,0 +1,52 @@
+"""
+Synthetic deck generator for benchmarks.
+
+Decks are deterministic for a given size and seed and mix plain ASCII terms,
+unicode (accents, CJK, emoji), long definitions and image URLs in roughly the
+proportions seen in real vocabulary decks.
+"""
+
+import random
+import uuid
+
+WORDS = (
+    "algorithm", "binary", "cache", "compiler", "database", "encryption", "function",
+    "gradient", "hash", "index", "kernel", "latency", "matrix", "network", "object",
+    "protocol", "query", "recursion", "schema", "thread", "vector", "variable",
+)
+UNICODE_WORDS = (
+    "café", "naïve", "façade", "über", "señor", "smörgåsbord", "jalapeño",
+    "東京", "学习", "단어", "Москва", "λόγος", "☕", "🚀", "∑", "→",
+)
+
+
+def make_card(rng, index, long_definition=False, with_images=False):
+    """Build one card dict in the stored card format."""
+    words = UNICODE_WORDS if index % 4 == 0 else WORDS
+    term = " ".join(rng.choice(words) for _ in range(rng.randint(1, 3)))
+    definition_length = rng.randint(60, 120) if long_definition else rng.randint(5, 15)
+    definition = " ".join(rng.choice(WORDS + UNICODE_WORDS) for _ in range(definition_length))
+    image_url = ""
+    if with_images:
+        image_url = f"https://cdn.example.com/games/block-{index // 100}/{uuid.UUID(int=rng.getrandbits(128)).hex}.png"
+    return {
+        "card_key": str(uuid.UUID(int=rng.getrandbits(128))),
+        "term": f"{term} {index}",
+        "term_image": image_url if index % 2 else "",
+        "definition": definition,
+        "definition_image": image_url if not index % 2 else "",
+        "order": index,
+    }
+
+
+def make_deck(size, seed=0):
+    """
+    Return a deck of ``size`` cards.
+
+    Every 5th card has a long definition and every 3rd card has an image.
+    """
+    rng = random.Random(f"{seed}:{size}")
+    return [
+        make_card(rng, index, long_definition=index % 5 == 0, with_images=index % 3 == 0)
+        for index in range(size)
+    ]
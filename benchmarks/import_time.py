@@ -0,0 +1,107 @@
+"""
+Cold-start import benchmark for the Games XBlock.
+
+Runs ``python -X importtime -c "import games"`` in fresh interpreters and
+checks the result against the package's import budget:
+
+- none of the modules in DEFERRED_MODULES may be imported by ``import games``;
+- the median cumulative import time of ``games`` must stay under the budget.
+
+Usage::
+
+    python -m benchmarks.import_time [--runs 5] [--budget-ms 400] [--top 15]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+# Heavy modules that must only be imported by the code paths that use them.
+DEFERRED_MODULES = (
+    "pkg_resources",
+    "cryptography",
+    "django.template",
+    "django.core.files.storage",
+)
+
+# Median cumulative import time of the ``games`` package, in milliseconds.
+# Most of it is XBlock, webob and Django; the games modules themselves take a few ms.
+IMPORT_BUDGET_MS = 400
+
+
+def run_importtime(module="games"):
+    """
+    Import a module in a fresh interpreter with ``-X importtime``.
+
+    Returns:
+        List of ``(module_name, self_us, cumulative_us)`` tuples in import order.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(result.stderr)
+
+
+def parse_importtime(output):
+    """Parse ``-X importtime`` output into ``(module_name, self_us, cumulative_us)`` tuples."""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # header line
+        rows.append((fields[2].strip(), int(fields[0]), int(fields[1])))
+    return rows
+
+
+def deferred_modules_imported(rows, deferred=DEFERRED_MODULES):
+    """Return the names of deferred modules (or their submodules) found in an import trace."""
+    return sorted(
+        name for name, _, _ in rows
+        if any(name == prefix or name.startswith(prefix + ".") for prefix in deferred)
+    )
+
+
+def cumulative_ms(rows, module="games"):
+    """Return the cumulative import time of a module in milliseconds."""
+    for name, _, cumulative in rows:
+        if name == module:
+            return cumulative / 1000
+    raise ValueError(f"{module} not found in import trace")
+
+
+def main(argv=None):
+    """Run the benchmark and return a process exit code."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="number of fresh interpreters to sample")
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS, help="median import budget")
+    parser.add_argument("--top", type=int, default=15, help="number of slowest modules to list")
+    args = parser.parse_args(argv)
+
+    samples = [run_importtime() for _ in range(args.runs)]
+    timings = [cumulative_ms(rows) for rows in samples]
+    median = statistics.median(timings)
+
+    print(f"import games: median {median:.1f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+    print("\nSlowest modules (self time, last run):")
+    for name, self_us, cumulative_us in sorted(samples[-1], key=lambda row: row[1], reverse=True)[:args.top]:
+        print(f"  {self_us / 1000:8.2f} ms  {cumulative_us / 1000:8.2f} ms cumulative  {name}")
+
+    failed = False
+    imported = deferred_modules_imported(samples[-1])
+    if imported:
+        failed = True
+        print(f"\nFAIL: deferred modules imported at load time: {', '.join(imported)}")
+    if median > args.budget_ms:
+        failed = True
+        print(f"\nFAIL: import time {median:.1f} ms exceeds budget of {args.budget_ms:.0f} ms")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
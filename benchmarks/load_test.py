@@ -0,0 +1,359 @@
+"""
+Concurrent load test of the Games XBlock on a local runtime.
+
+Each run boots one matching block on LocalRuntime, a workbench-style runtime
+that keeps all field data in an in-memory key-value store. Uploads go to a
+temporary FileSystemStorage. Simulated learners, each with their own user
+state, then send a weighted mix of these calls from a pool of workers:
+
+- student_view
+- start_matching_game
+- complete_matching_game
+- refresh_game
+- upload_image
+
+Handlers are called through ``runtime.handle()`` with webob requests, as in
+the LMS, so request decoding, field saves and response encoding are timed.
+
+Throughput and p50/p95/p99 latency are reported per handler for every
+combination of deck size and concurrency. Threads share one runtime and the
+GIL, so they show contention and I/O overlap. With ``--processes`` every
+worker process boots its own runtime, like LMS workers, which shows
+multi-core scaling.
+
+Exits with status 1 if any call failed.
+
+Usage::
+
+    python -m benchmarks.load_test [--deck-sizes 10 100] [--concurrency 1 4 16]
+        [--requests 1000] [--processes] [--mix student_view=40 upload_image=5]
+        [--json results.json]
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+from webob import Request
+from xblock.fields import ScopeIds
+from xblock.runtime import DictKeyValueStore, KvsFieldData, MemoryIdManager, Runtime
+
+from benchmarks.common import format_table, setup_django
+from benchmarks.decks import make_deck
+
+# Relative weights of the calls a learner makes
+TRAFFIC_MIX = {
+    "student_view": 40,
+    "start_matching_game": 20,
+    "complete_matching_game": 20,
+    "refresh_game": 15,
+    "upload_image": 5,
+}
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+_worker_site = None  # The site of a worker process (--processes)
+
+
+class LocalUsageKey:
+    """A usage id with the ``block_id`` attribute of an opaque-keys UsageKey."""
+
+    def __init__(self, block_id):
+        self.block_id = block_id
+
+    def __str__(self):
+        return f"block-v1:LoadTest+games+run+type@games+block@{self.block_id}"
+
+    def __eq__(self, other):
+        return isinstance(other, LocalUsageKey) and other.block_id == self.block_id
+
+    def __hash__(self):
+        return hash(self.block_id)
+
+
+class LocalRuntime(Runtime):
+    """A workbench-style runtime: in-memory field data and no LMS services."""
+
+    is_author_mode = False
+
+    def __init__(self):
+        id_manager = MemoryIdManager()
+        super().__init__(id_reader=id_manager, id_generator=id_manager)
+        self.block_field_data = KvsFieldData(DictKeyValueStore())
+
+    def handler_url(self, block, handler_name, suffix="", query="", thirdparty=False):
+        return f"/handler/{block.scope_ids.usage_id}/{handler_name}/{suffix}"
+
+    def resource_url(self, resource):
+        return f"/resource/{resource}"
+
+    def local_resource_url(self, block, uri):
+        return f"/xblock/resource/games/{uri}"
+
+    def publish(self, block, event_type, event_data):
+        """Events are not recorded."""
+
+
+class LoadTestSite:
+    """
+    One matching block on a LocalRuntime, seen by any number of learners.
+
+    Content and settings fields are shared; every learner has their own
+    user_state (best_time, attempt).
+    """
+
+    def __init__(self, deck_size):
+        from games.constants import GAME_TYPE  # pylint: disable=import-outside-toplevel
+        from games.handlers.matching import MatchingHandlers  # pylint: disable=import-outside-toplevel
+
+        self.runtime = LocalRuntime()
+        self.usage_id = LocalUsageKey(f"load-test-{deck_size}")
+        author = self.block_for("author")
+        author.game_type = GAME_TYPE.MATCHING
+        author.cards = make_deck(deck_size)
+        author.list_length = deck_size
+        author.save()
+        # A key as the learner's page embeds it; keys are per block, not per learner
+        mapping_payload, _, _ = MatchingHandlers.build_payload(author, list(author.cards))
+        self.matching_key = mapping_payload["key"]
+
+    def block_for(self, user_id):
+        """Return the block as the given user sees it."""
+        from games.games import GamesXBlock  # pylint: disable=import-outside-toplevel
+
+        scope_ids = ScopeIds(user_id, "games", "load-test-definition", self.usage_id)
+        return self.runtime.construct_xblock_from_class(
+            GamesXBlock, scope_ids, field_data=self.runtime.block_field_data
+        )
+
+    def warm_up(self):
+        """Make every call once so template, asset and cipher caches are filled before timing."""
+        block = self.block_for("warm-up")
+        rng = random.Random(0)
+        for handler in TRAFFIC_MIX:
+            CALLS[handler](self, block, rng, image_size=64)
+
+
+def post(body, content_type="application/json"):
+    """Return a POST request as the runtime passes it to handlers."""
+    request = Request.blank("/", method="POST", body=body)
+    request.content_type = content_type
+    return request
+
+
+def call_student_view(site, block, rng, image_size):  # pylint: disable=unused-argument
+    return bool(block.student_view().content)
+
+
+def call_start_matching_game(site, block, rng, image_size):  # pylint: disable=unused-argument
+    body = json.dumps({"matching_key": site.matching_key}).encode("utf-8")
+    response = site.runtime.handle(block, "start_matching_game", post(body))
+    return json.loads(response.body)["success"]
+
+
+def call_complete_matching_game(site, block, rng, image_size):  # pylint: disable=unused-argument
+    body = json.dumps({"new_time": rng.randint(10, 300)}).encode("utf-8")
+    response = site.runtime.handle(block, "complete_matching_game", post(body))
+    return response.status_code == 200
+
+
+def call_refresh_game(site, block, rng, image_size):  # pylint: disable=unused-argument
+    response = site.runtime.handle(block, "refresh_game", post(b"{}"))
+    return response.status_code == 200
+
+
+def call_upload_image(site, block, rng, image_size):
+    # Random content, so every upload is hashed and written rather than deduplicated
+    image = PNG_SIGNATURE + rng.randbytes(image_size)
+    request = Request.blank("/", POST={"file": ("card.png", image)})
+    response = site.runtime.handle(block, "upload_image", request)
+    return json.loads(response.body)["success"]
+
+
+CALLS = {
+    "student_view": call_student_view,
+    "start_matching_game": call_start_matching_game,
+    "complete_matching_game": call_complete_matching_game,
+    "refresh_game": call_refresh_game,
+    "upload_image": call_upload_image,
+}
+
+
+def run_learner(site, learner, session_length, mix, image_size, seed):
+    """
+    Make one learner's calls in a row.
+
+    Returns:
+        List of ``(handler, start, duration, ok)`` with perf_counter times in seconds.
+    """
+    rng = random.Random(f"{seed}:{learner}")
+    block = site.block_for(f"learner-{learner}")
+    handlers, weights = list(mix), list(mix.values())
+    samples = []
+    for handler in rng.choices(handlers, weights, k=session_length):
+        start = time.perf_counter()
+        try:
+            ok = CALLS[handler](site, block, rng, image_size)
+        except Exception:  # pylint: disable=broad-except
+            ok = False
+        samples.append((handler, start, time.perf_counter() - start, ok))
+    return samples
+
+
+def storage_settings(directory):
+    """Return a GAMESXBLOCK_STORAGE writing uploads under directory."""
+    return {
+        "storage_class": "django.core.files.storage.FileSystemStorage",
+        "settings": {"location": directory, "base_url": "/media/games-load-test/"},
+    }
+
+
+def boot_worker(deck_size, storage_dir):
+    """Set up Django and the site in a worker process."""
+    global _worker_site  # pylint: disable=global-statement
+    setup_django()
+    from django.test import override_settings  # pylint: disable=import-outside-toplevel
+
+    override_settings(GAMESXBLOCK_STORAGE=storage_settings(storage_dir)).enable()
+    _worker_site = LoadTestSite(deck_size)
+    _worker_site.warm_up()
+
+
+def run_worker_learner(learner, session_length, mix, image_size, seed):
+    """Run a learner on the site of the current worker process."""
+    return run_learner(_worker_site, learner, session_length, mix, image_size, seed)
+
+
+def run_load(deck_size, concurrency, requests, storage_dir, processes=False, session_length=10,
+             mix=None, image_size=32 * 1024, seed=0):
+    """
+    Run one load test and return its samples.
+
+    ``requests`` calls are split into sessions of ``session_length`` calls,
+    one per learner, and the sessions are spread over ``concurrency`` workers.
+    """
+    mix = mix or TRAFFIC_MIX
+    learners = range(max(1, math.ceil(requests / session_length)))
+    options = {"session_length": session_length, "mix": mix, "image_size": image_size, "seed": seed}
+    if processes:
+        with ProcessPoolExecutor(concurrency, initializer=boot_worker, initargs=(deck_size, storage_dir)) as pool:
+            sessions = list(pool.map(partial(run_worker_learner, **options), learners))
+    else:
+        from django.test import override_settings  # pylint: disable=import-outside-toplevel
+
+        with override_settings(GAMESXBLOCK_STORAGE=storage_settings(storage_dir)):
+            site = LoadTestSite(deck_size)
+            site.warm_up()
+            with ThreadPoolExecutor(concurrency) as pool:
+                sessions = list(pool.map(partial(run_learner, site, **options), learners))
+    return [sample for session in sessions for sample in session]
+
+
+def percentile(sorted_values, fraction):
+    """Return the nearest-rank percentile of a sorted, non-empty list."""
+    return sorted_values[min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))]
+
+
+def summarize(samples):
+    """
+    Return per-handler statistics and an ``"all"`` total for one run.
+
+    Throughput is calls per second of wall time from the first call to the
+    end of the last, so worker start-up is not counted.
+    """
+    wall_time = max(start + duration for _, start, duration, _ in samples) - min(start for _, start, _, _ in samples)
+    by_handler = {}
+    for handler, _, duration, ok in samples:
+        by_handler.setdefault(handler, []).append((duration, ok))
+    by_handler["all"] = [(duration, ok) for _, _, duration, ok in samples]
+
+    summary = {}
+    for handler, calls in by_handler.items():
+        durations = sorted(duration for duration, _ in calls)
+        summary[handler] = {
+            "requests": len(calls),
+            "errors": sum(1 for _, ok in calls if not ok),
+            "throughput": len(calls) / wall_time if wall_time else 0.0,
+            "p50_ms": percentile(durations, 0.50) * 1e3,
+            "p95_ms": percentile(durations, 0.95) * 1e3,
+            "p99_ms": percentile(durations, 0.99) * 1e3,
+        }
+    return summary
+
+
+def parse_mix(values):
+    """Parse ``handler=weight`` pairs into a traffic mix."""
+    mix = {}
+    for value in values:
+        handler, _, weight = value.partition("=")
+        if handler not in CALLS or not weight.isdigit():
+            raise argparse.ArgumentTypeError(f"expected HANDLER=WEIGHT with a handler in {', '.join(CALLS)}: {value}")
+        mix[handler] = int(weight)
+    return mix
+
+
+def main(argv=None):
+    """Run the load tests and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--deck-sizes", type=int, nargs="+", default=[10, 100, 1000], help="deck sizes (cards)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16], help="concurrent workers")
+    parser.add_argument("--requests", type=int, default=1000, help="calls per run (default: 1000)")
+    parser.add_argument("--session-length", type=int, default=10, help="calls per learner (default: 10)")
+    parser.add_argument("--processes", action="store_true", help="use a process pool instead of threads")
+    parser.add_argument("--mix", nargs="+", default=[], help="HANDLER=WEIGHT overrides of the traffic mix (0 drops a call)")
+    parser.add_argument("--image-kb", type=int, default=32, help="size of each uploaded image (default: 32)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the learners' call sequences")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+    try:
+        mix = {**TRAFFIC_MIX, **parse_mix(args.mix)}
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    mix = {handler: weight for handler, weight in mix.items() if weight}
+
+    setup_django()
+    results, rows = [], []
+    with tempfile.TemporaryDirectory(prefix="gamesxblock-load-") as storage_dir:
+        for deck_size in args.deck_sizes:
+            for concurrency in args.concurrency:
+                samples = run_load(
+                    deck_size, concurrency, args.requests, storage_dir,
+                    processes=args.processes, session_length=args.session_length,
+                    mix=mix, image_size=args.image_kb * 1024, seed=args.seed,
+                )
+                for handler, stats in summarize(samples).items():
+                    results.append({"deck_size": deck_size, "concurrency": concurrency, "handler": handler, **stats})
+                    rows.append((
+                        deck_size,
+                        concurrency,
+                        handler,
+                        stats["requests"],
+                        stats["errors"],
+                        f"{stats['throughput']:.1f}",
+                        f"{stats['p50_ms']:.2f}",
+                        f"{stats['p95_ms']:.2f}",
+                        f"{stats['p99_ms']:.2f}",
+                    ))
+
+    print(format_table(
+        ("cards", "workers", "handler", "requests", "errors", "req/s", "p50 ms", "p95 ms", "p99 ms"),
+        rows,
+    ))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as results_file:
+            json.dump({"processes": args.processes, "mix": mix, "results": results}, results_file, indent=2)
+    errors = sum(result["errors"] for result in results if result["handler"] == "all")
+    if errors:
+        print(f"\n{errors} calls failed")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
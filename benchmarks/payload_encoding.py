@@ -0,0 +1,120 @@
+"""
+Compare embedded payload encodings on realistic decks.
+
+Reports, per deck size and game type, the size of the embedded payload and
+the time to encode it on the server and decode it on the client. Client decode
+time is measured with Node's DecompressionStream (same API as browsers) when
+``node`` is available, otherwise with Python as a stand-in.
+
+Usage::
+
+    python -m benchmarks.payload_encoding [--sizes 10 100 1000] [--no-node]
+"""
+
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+from unittest.mock import Mock
+
+from benchmarks.common import format_table, measure, setup_django
+from benchmarks.decks import make_deck
+
+NODE_DECODE_SCRIPT = """
+const fs = require('fs');
+global.atob = (s) => Buffer.from(s, 'base64').toString('binary');
+eval(fs.readFileSync(process.argv[1], 'utf8') + ';global.Payload = GamesXBlockPayload;');
+const text = fs.readFileSync(0, 'utf8');
+(async () => {
+    let runs = 0;
+    const start = process.hrtime.bigint();
+    while (process.hrtime.bigint() - start < 200000000n) {
+        await Payload.decode(text);
+        runs++;
+    }
+    console.log(Number(process.hrtime.bigint() - start) / runs / 1000);
+})();
+"""
+
+
+def node_decode_us(encoded, script_path):
+    """Return the mean decode time of payload.js under Node, in microseconds."""
+    result = subprocess.run(
+        ["node", "-e", NODE_DECODE_SCRIPT, script_path],
+        input=encoded, capture_output=True, text=True, check=True,
+    )
+    return float(result.stdout.strip())
+
+
+def build_payloads(num_cards):
+    """Return the flashcards and matching payloads student_view would embed for a deck."""
+    from games.handlers.matching import MatchingHandlers  # pylint: disable=import-outside-toplevel
+
+    deck = make_deck(num_cards)
+    flashcards = {
+        "cards": [
+            {
+                "id": card["card_key"],
+                "term": card["term"],
+                "definition": card["definition"],
+                "term_image": card["term_image"],
+                "definition_image": card["definition_image"],
+            }
+            for card in deck
+        ],
+        "salt": "abcdefghijkl",
+    }
+    xblock = Mock(is_shuffled=True)
+    xblock.scope_ids.usage_id.block_id = "benchmark-block"
+    pages, _, _ = MatchingHandlers.build_pages(xblock, deck)
+    matching = {"key": "gAAAAAB" + "x" * (num_cards * 100), "pages": pages}
+    return {"flashcards": flashcards, "matching": matching}
+
+
+def main(argv=None):
+    """Run the comparison and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="deck sizes (cards)")
+    parser.add_argument("--no-node", action="store_true", help="measure decode time with Python only")
+    args = parser.parse_args(argv)
+
+    setup_django()
+    from games import resources  # pylint: disable=import-outside-toplevel
+    from games.constants import PAYLOAD_ENCODING  # pylint: disable=import-outside-toplevel
+    from games.payload import decode_payload, encode_payload  # pylint: disable=import-outside-toplevel
+
+    use_node = not args.no_node and shutil.which("node") is not None
+    script_path = str(resources.resource_path("static/js/src/payload.js"))
+
+    rows = []
+    for num_cards in args.sizes:
+        for game_type, payload in build_payloads(num_cards).items():
+            json_bytes = len(json.dumps(payload).encode())
+            for encoding in PAYLOAD_ENCODING.VALID:
+                encoded = encode_payload(payload, encoding)
+                if use_node:
+                    decode_us = node_decode_us(encoded, script_path)
+                else:
+                    decode_us = measure(lambda encoded=encoded: decode_payload(encoded)) * 1e6
+                rows.append((
+                    num_cards,
+                    game_type,
+                    encoding,
+                    json_bytes,
+                    len(encoded),
+                    f"{len(encoded) / json_bytes:.2f}",
+                    f"{measure(lambda payload=payload, encoding=encoding: encode_payload(payload, encoding)) * 1e6:.0f}",
+                    f"{decode_us:.0f}",
+                ))
+
+    print(format_table(
+        ("cards", "game", "encoding", "json B", "embedded B", "ratio", "encode us",
+         "decode us (node)" if use_node else "decode us (python)"),
+        rows,
+    ))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
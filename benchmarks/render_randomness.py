@@ -0,0 +1,94 @@
+"""
+Per-render cost of generating obfuscation material for the matching game.
+
+Compares the previous approach (shared ``random`` module: one getrandbits call
+per key and two per UUID-like entry, retrying ``random.choices`` for variable
+names and identifiers) with RenderRandom, which slices one
+``secrets.token_bytes`` draw. Also reports the full MatchingHandlers.build_pages
+time, which includes page assembly and shuffling.
+
+Usage::
+
+    python -m benchmarks.render_randomness [--sizes 10 100 1000]
+"""
+
+import argparse
+import random
+import string
+import sys
+from unittest.mock import Mock
+
+from benchmarks.common import format_table, measure, setup_django
+from benchmarks.decks import make_deck
+
+VAR_KEYS = ["runtime", "elem", "tag", "payload", "err"]
+
+
+def legacy_material(num_items):
+    """Generate render material the way handlers did before RenderRandom."""
+    keys = [format(random.getrandbits(32), "08x") for _ in range(num_items)]
+    entries = []
+    for index, key in enumerate(keys):
+        index_hex = format(index, "08x")
+        rand_4 = format(random.getrandbits(16), "04x")
+        rand_12 = format(random.getrandbits(48), "012x")
+        entries.append(f"{key}-{index_hex[:4]}-{rand_4}-{index_hex[4:]}-{rand_12}")
+    used = set()
+    for _ in VAR_KEYS:
+        while True:
+            name = "".join(random.choices(string.ascii_lowercase, k=random.randint(1, 3)))
+            if name not in used:
+                used.add(name)
+                break
+    "".join(random.choices(string.ascii_lowercase + string.digits, k=16))
+    "".join(random.choices(string.ascii_lowercase + string.digits, k=8))
+    return entries
+
+
+def render_random_material(num_items):
+    """Generate the same render material with one RenderRandom."""
+    from games.randomness import RenderRandom  # pylint: disable=import-outside-toplevel
+
+    randomness = RenderRandom(item_count=num_items)
+    keys = randomness.key_hexes(num_items)
+    entries = [randomness.uuid_like(key, index) for index, key in enumerate(keys)]
+    randomness.var_names(VAR_KEYS, 1, 3)
+    randomness.identifier(16)
+    randomness.identifier(8)
+    return entries
+
+
+def main(argv=None):
+    """Run the comparison and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="deck sizes (cards)")
+    args = parser.parse_args(argv)
+
+    setup_django()
+    from games.handlers.matching import MatchingHandlers  # pylint: disable=import-outside-toplevel
+
+    xblock = Mock(is_shuffled=True)
+    rows = []
+    for num_cards in args.sizes:
+        deck = make_deck(num_cards)
+        num_items = num_cards * 2
+        legacy = measure(lambda num_items=num_items: legacy_material(num_items))
+        batched = measure(lambda num_items=num_items: render_random_material(num_items))
+        pages = measure(lambda deck=deck: MatchingHandlers.build_pages(xblock, deck))
+        rows.append((
+            num_cards,
+            f"{legacy * 1e6:.0f}",
+            f"{batched * 1e6:.0f}",
+            f"{legacy / batched:.2f}x",
+            f"{pages * 1e6:.0f}",
+        ))
+
+    print(format_table(
+        ("cards", "legacy us", "RenderRandom us", "speedup", "build_pages us"),
+        rows,
+    ))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""
+Static asset pipeline for the Games XBlock.
+
+By default game CSS/JS is attached to fragments by URL. Each URL embeds a
+content hash of the file (``css/matching.<hash>.css``), so the runtime, browser
+and any CDN in front of it can cache the response indefinitely and every block
+on a page references the same URL. Inline mode, which embeds the asset text
+into each fragment, is kept for runtimes that cannot serve local resources.
+
+The Inter font is self-hosted the same way (Latin subset, ``font-display:
+swap``) with the regular weight preloaded. In inline mode the games fall back
+to the system sans-serif font rather than embedding the font files.
+"""
+
+import hashlib
+import re
+
+from django.conf import settings
+
+from . import resources
+from .constants import ASSET_MODE, GAME_TYPE
+
+STATIC_DIR = "static"
+
+GAME_ASSETS = {
+    GAME_TYPE.FLASHCARDS: {
+        "css": ["css/flashcards.css"],
+        "js": ["js/src/payload.js", "js/src/flashcards.js"],
+    },
+    GAME_TYPE.MATCHING: {
+        "css": ["css/matching.css", "css/confetti.css"],
+        "js": ["js/src/payload.js", "js/src/matching.js", "js/src/confetti.js"],
+    },
+}
+
+# Inter, subset to the Latin range below (see static/fonts/Inter-LICENSE.txt)
+FONT_ASSETS = {
+    "fonts/Inter-Regular-latin.woff2": 400,
+    "fonts/Inter-Medium-latin.woff2": 500,
+    "fonts/Inter-SemiBold-latin.woff2": 600,
+    "fonts/Inter-Bold-latin.woff2": 700,
+}
+PRELOADED_FONT = "fonts/Inter-Regular-latin.woff2"
+FONT_UNICODE_RANGE = (
+    "U+0000-00FF, U+0131, U+0152-0153, U+02BB-02BC, U+02C6, U+02DA, U+02DC, U+0304, U+0308, "
+    "U+0329, U+2000-206F, U+20AC, U+2122, U+2191, U+2193, U+2212, U+2215, U+FEFF, U+FFFD"
+)
+
+SERVED_ASSETS = frozenset(
+    [path for assets in GAME_ASSETS.values() for paths in assets.values() for path in paths]
+    + list(FONT_ASSETS)
+)
+
+FINGERPRINT_LENGTH = 12
+FINGERPRINT_RE = re.compile(rf"^(?P<base>.+)\.(?P<fingerprint>[0-9a-f]{{{FINGERPRINT_LENGTH}}})(?P<ext>\.[a-z0-9]+)$")
+
+_loaded = {}
+
+
+def _read_asset(path):
+    """Read an asset and compute its content fingerprint; fonts are returned as bytes."""
+    data = resources.read_bytes(f"{STATIC_DIR}/{path}")
+    fingerprint = hashlib.sha256(data).hexdigest()[:FINGERPRINT_LENGTH]
+    return (data if path in FONT_ASSETS else data.decode("utf8")), fingerprint
+
+
+def load_asset(path):
+    """
+    Return ``(text, fingerprint)`` for an asset under ``static/``.
+
+    Assets are read once per process, except in DEBUG where they are re-read so
+    that edits show up (with a fresh fingerprint) without a restart.
+    """
+    if settings.DEBUG:
+        return _read_asset(path)
+    entry = _loaded.get(path)
+    if entry is None:
+        entry = _loaded[path] = _read_asset(path)
+    return entry
+
+
+def fingerprinted_uri(path):
+    """Return the local resource URI of an asset with its content hash in the file name."""
+    _, fingerprint = load_asset(path)
+    base, ext = path.rsplit(".", 1)
+    return f"{STATIC_DIR}/{base}.{fingerprint}.{ext}"
+
+
+def resolve_fingerprinted_uri(uri):
+    """
+    Map a fingerprinted resource URI back to the packaged file URI.
+
+    Returns None if the URI does not name a served asset or its fingerprint
+    is not the hash of the asset this process serves. During a rolling deploy
+    a worker with other asset bytes then refuses the URL rather than letting a
+    CDN cache the wrong content under an immutable name.
+    """
+    prefix = f"{STATIC_DIR}/"
+    if not uri.startswith(prefix):
+        return None
+    match = FINGERPRINT_RE.match(uri[len(prefix):])
+    if not match:
+        return None
+    path = match.group("base") + match.group("ext")
+    if path not in SERVED_ASSETS or match.group("fingerprint") != load_asset(path)[1]:
+        return None
+    return prefix + path
+
+
+def font_face_css(font_urls):
+    """Return the @font-face rules for Inter given ``{font path: url}``."""
+    return "".join(
+        "@font-face{font-family:'Inter';font-style:normal;"
+        f"font-weight:{FONT_ASSETS[path]};font-display:swap;"
+        f"src:url('{url}') format('woff2');unicode-range:{FONT_UNICODE_RANGE};}}"
+        for path, url in font_urls.items()
+    )
+
+
+def get_asset_mode():
+    """Return the configured asset delivery mode."""
+    return getattr(settings, "GAMESXBLOCK_ASSET_MODE", ASSET_MODE.URL)
+
+
+def add_game_assets(frag, xblock, game_type):
+    """
+    Attach the CSS and JS for a game type to a fragment.
+
+    Falls back to inlining when the runtime does not implement
+    ``local_resource_url``.
+    """
+    assets = GAME_ASSETS[game_type]
+    if get_asset_mode() == ASSET_MODE.URL:
+        try:
+            css_urls = [
+                xblock.runtime.local_resource_url(xblock, fingerprinted_uri(path))
+                for path in assets["css"]
+            ]
+            js_urls = [
+                xblock.runtime.local_resource_url(xblock, fingerprinted_uri(path))
+                for path in assets["js"]
+            ]
+            font_urls = {
+                path: xblock.runtime.local_resource_url(xblock, fingerprinted_uri(path))
+                for path in FONT_ASSETS
+            }
+        except NotImplementedError:
+            pass
+        else:
+            frag.add_resource(
+                f'<link rel="preload" as="font" type="font/woff2" href="{font_urls[PRELOADED_FONT]}" crossorigin>',
+                "text/html",
+                "head",
+            )
+            frag.add_css(font_face_css(font_urls))
+            for url in css_urls:
+                frag.add_css_url(url)
+            for url in js_urls:
+                frag.add_javascript_url(url)
+            return
+
+    for path in assets["css"]:
+        frag.add_css(load_asset(path)[0])
+    for path in assets["js"]:
+        frag.add_javascript(load_asset(path)[0])
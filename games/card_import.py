@@ -0,0 +1,125 @@
+"""
+Streaming import of cards from CSV/TSV files.
+
+The file is decoded and parsed row by row, so memory is bounded by the cards
+being built rather than the size of the upload. The first row is a header
+naming the columns (``term``, ``definition``, and optionally ``term_image``,
+``definition_image``, ``card_key``), in any order and case.
+"""
+
+import csv
+import io
+import uuid
+
+from .constants import CARD_FIELD
+
+IMPORT_COLUMNS = (
+    CARD_FIELD.TERM,
+    CARD_FIELD.TERM_IMAGE,
+    CARD_FIELD.DEFINITION,
+    CARD_FIELD.DEFINITION_IMAGE,
+    CARD_FIELD.CARD_KEY,
+)
+REQUIRED_COLUMNS = (CARD_FIELD.TERM, CARD_FIELD.DEFINITION)
+DELIMITERS = {"csv": ",", "tsv": "\t", "txt": "\t"}
+MAX_REPORTED_ERRORS = 50
+
+
+class CardImportError(ValueError):
+    """Raised when a file cannot be imported; carries per-row errors."""
+
+    def __init__(self, message, row_errors=None, error_count=0):
+        super().__init__(message)
+        self.row_errors = row_errors or []
+        self.error_count = error_count or len(self.row_errors)
+
+
+def get_delimiter(file_name):
+    """
+    Return the delimiter for a file name's extension.
+
+    Raises:
+        CardImportError: If the extension is not a supported table format.
+    """
+    ext = file_name.rsplit(".", 1)[-1].lower() if "." in file_name else ""
+    if ext not in DELIMITERS:
+        raise CardImportError(
+            f"Unsupported file type '.{ext}'. Allowed: {', '.join(sorted(DELIMITERS))}"
+        )
+    return DELIMITERS[ext]
+
+
+def read_cards(binary_file, delimiter, existing_keys=(), start_order=0, max_cards=None):
+    """
+    Parse cards from a binary CSV/TSV stream in one pass.
+
+    Each data row is validated like save_settings (term and definition are
+    required), gets a card_key (kept from the file if given and unique) and an
+    order following start_order. Blank rows are skipped.
+
+    Returns:
+        List of card dicts in file order.
+
+    Raises:
+        CardImportError: If the header is invalid or any row fails validation.
+            Up to MAX_REPORTED_ERRORS row errors are listed.
+    """
+    text = io.TextIOWrapper(binary_file, encoding="utf-8-sig", newline="")
+    reader = csv.reader(text, delimiter=delimiter)
+    row_errors = []
+    error_count = 0
+
+    def row_error(message):
+        nonlocal error_count
+        error_count += 1
+        if len(row_errors) < MAX_REPORTED_ERRORS:
+            row_errors.append({"row": reader.line_num, "error": message})
+
+    try:
+        header = [name.strip().lower() for name in next(reader, [])]
+        missing = [name for name in REQUIRED_COLUMNS if name not in header]
+        if missing:
+            raise CardImportError(f"Header row must include {', '.join(missing)} columns")
+        unknown = [name for name in header if name and name not in IMPORT_COLUMNS]
+        if unknown:
+            raise CardImportError(f"Unknown columns: {', '.join(unknown)}")
+        columns = [(index, name) for index, name in enumerate(header) if name]
+
+        seen_keys = set(existing_keys)
+        cards = []
+        for row in reader:
+            if not any(value.strip() for value in row):
+                continue
+            if len(row) > len(header):
+                row_error(f"Expected {len(header)} columns, found {len(row)}")
+                continue
+            values = {name: row[index].strip() if index < len(row) else "" for index, name in columns}
+            if not values[CARD_FIELD.TERM] or not values[CARD_FIELD.DEFINITION]:
+                row_error("Each card must have term and definition")
+                continue
+            card_key = values.get(CARD_FIELD.CARD_KEY) or str(uuid.uuid4())
+            if card_key in seen_keys:
+                row_error(f"Duplicate card_key '{card_key}'")
+                continue
+            seen_keys.add(card_key)
+            if max_cards is not None and len(cards) >= max_cards:
+                raise CardImportError(f"Too many cards; the limit is {max_cards}")
+            cards.append({
+                CARD_FIELD.TERM: values[CARD_FIELD.TERM],
+                CARD_FIELD.TERM_IMAGE: values.get(CARD_FIELD.TERM_IMAGE, ""),
+                CARD_FIELD.DEFINITION: values[CARD_FIELD.DEFINITION],
+                CARD_FIELD.DEFINITION_IMAGE: values.get(CARD_FIELD.DEFINITION_IMAGE, ""),
+                CARD_FIELD.ORDER: start_order + len(cards),
+                CARD_FIELD.CARD_KEY: card_key,
+            })
+    except UnicodeDecodeError as e:
+        raise CardImportError(f"File is not valid UTF-8 (near row {reader.line_num + 1})") from e
+    except csv.Error as e:
+        raise CardImportError(f"Row {reader.line_num}: {e}") from e
+    finally:
+        # Leave the upload open for the caller
+        text.detach()
+
+    if error_count:
+        raise CardImportError(f"{error_count} rows could not be imported", row_errors, error_count)
+    return cards
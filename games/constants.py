@@ -36,6 +36,16 @@ class CARD_FIELD:
     ORDER = "order"
 
 
+class CARD_OP:
+    """Operations accepted by the patch_cards handler."""
+
+    ADD = "add"
+    UPDATE = "update"
+    DELETE = "delete"
+    MOVE = "move"
+    VALID = [ADD, UPDATE, DELETE, MOVE]
+
+
 class CONTAINER_TYPE:
     """Container types for matching game."""
 
@@ -43,10 +53,80 @@ class CONTAINER_TYPE:
     DEFINITION = "definition"
 
 
+class ASSET_MODE:
+    """How game CSS/JS is delivered to the browser."""
+
+    URL = "url"  # Content-hashed local resource URLs
+    INLINE = "inline"  # Asset text embedded in every fragment
+
+
+class CIPHER_BACKEND:
+    """Cipher backends for encrypted game payloads."""
+
+    FERNET = "fernet"  # AES-128-CBC + HMAC-SHA256, base64 token (default)
+    AES_GCM = "aesgcm"  # AES-256-GCM in a compact binary container
+    VALID = [FERNET, AES_GCM]
+
+
+class PAYLOAD_ENCODING:
+    """Encodings for the game data embedded in student_view."""
+
+    BASE64_JSON = "base64json"  # base64(json), readable by every client (default)
+    DEFLATE = "deflate"  # Compact keys, deflate-compressed, base64; decoded with DecompressionStream
+    VALID = [BASE64_JSON, DEFLATE]
+
+
 class UPLOAD:
     """File upload settings."""
 
     PATH_PREFIX = "games"
+    CONTENT_DIR = "cas"  # Under PATH_PREFIX: content-addressed images shared across blocks
+    REFS_DIR = "refs"  # Under CONTENT_DIR: one marker per (image, block usage) reference
+    PENDING_DIR = "pending"  # Under a block's directory: one marker per re-uploaded image, keeping it from collection
+    MAX_SIZE = 10 * 1024 * 1024  # Largest accepted image, in bytes
+    CHUNK_SIZE = 64 * 1024  # Bytes read per step while hashing an upload
+    ALLOWED_EXTENSIONS = ("jpg", "jpeg", "png", "gif", "webp", "svg")
+    MAX_BATCH_FILES = 100  # Files accepted by one upload_images request
+    BATCH_WORKERS = 8  # Concurrent storage writes per upload_images request
+
+
+class IMAGE_LAYOUT:
+    """Storage layouts for uploaded images (GAMESXBLOCK_IMAGE_LAYOUT)."""
+
+    BLOCK = "block"  # games/<block_id>/<md5>.<ext> (default)
+    CONTENT = "content"  # games/cas/<md5[:2]>/<md5>.<ext>, shared by every block and course rerun
+    VALID = [BLOCK, CONTENT]
+
+
+class IMAGE_DERIVATIVES:
+    """Defaults for resized image variants (GAMESXBLOCK_IMAGE_DERIVATIVES)."""
+
+    WIDTHS = (200, 400, 800)  # Widths in px; variants are never wider than the original
+    FORMAT = "webp"  # Any format the installed Pillow can write, e.g. "webp" or "avif"
+    QUALITY = 80
+    WORKERS = 2  # Threads generating variants in the background
+    SOURCE_EXTENSIONS = ("jpg", "jpeg", "png", "webp")  # Uploads that get variants
+
+
+class TRACING:
+    """Stage timing sinks and statsd defaults (GAMESXBLOCK_TRACING)."""
+
+    LOGGING = "logging"  # One log line per call
+    STATSD = "statsd"  # statsd timers over UDP
+    MEMORY = "memory"  # Kept in process, for tests
+    VALID = [LOGGING, STATSD, MEMORY]
+    STATSD_HOST = "127.0.0.1"
+    STATSD_PORT = 8125
+    STATSD_PREFIX = "gamesxblock"
+
+
+class PROFILING:
+    """Defaults for sampled profiles (GAMESXBLOCK_PROFILING)."""
+
+    CPROFILE = "cprofile"
+    SAMPLE_RATE = 0.01  # Fraction of calls profiled
+    MAX_PER_MINUTE = 6  # Profiles written per process in any 60 seconds
+    MAX_BYTES = 100 * 1024 * 1024  # Profiles kept on disk; the oldest are deleted beyond this
 
 
 class CONFIG:
@@ -56,3 +136,6 @@ class CONFIG:
     SALT_LENGTH = 12  # Length of random salt added to obfuscated payloads
     MATCHES_PER_PAGE = 5  # Number of matches displayed per page
     ENCRYPTION_SALT = "gamesxblock_secure_salt_v1"  # Salt for encryption key generation
+    CIPHER_CACHE_MAX_SIZE = 1024  # Per-block ciphers kept in memory per process
+    CIPHER_CACHE_TTL = None  # Seconds before a cached cipher is re-derived (None = never)
+    IMPORT_MAX_CARDS = 10000  # Cards accepted by one import_cards upload
@@ -1,12 +1,16 @@
 """An XBlock providing gamification capabilities."""
 
-import pkg_resources
 from django.utils.translation import gettext_lazy as _
 from xblock.core import XBlock
+from xblock.exceptions import DisallowedFileError
 from xblock.fields import Boolean, Integer, List, Scope, String
 
+from . import resources
+from .assets import STATIC_DIR, resolve_fingerprinted_uri
 from .constants import DEFAULT
 from .handlers import CommonHandlers, FlashcardsHandlers, MatchingHandlers
+from .profiling import profiled
+from .tracing import traced
 
 
 class GamesXBlock(XBlock):
@@ -19,6 +23,8 @@ class GamesXBlock(XBlock):
     The editor view will allow course authors to create and manipulate the games.
     """
 
+    public_dir = STATIC_DIR
+
     title = String(
         default=DEFAULT.MATCHING_TITLE,
         scope=Scope.content,
@@ -49,12 +55,24 @@ class GamesXBlock(XBlock):
         help=_("A field for the length of the list for convenience."),
     )
 
+    cards_version = Integer(
+        default=0,
+        scope=Scope.content,
+        help=_("Incremented on every card change; used to reject stale edits."),
+    )
+
     best_time = Integer(
         default=None,
         scope=Scope.user_state,
         help=_("Best time (in seconds) for completing the matching game."),
     )
 
+    attempt = Integer(
+        default=0,
+        scope=Scope.user_state,
+        help=_("Attempt counter seeding the shuffle when seeded renders are enabled."),
+    )
+
     is_shuffled = Boolean(
         default=DEFAULT.IS_SHUFFLED,
         scope=Scope.settings,
@@ -69,8 +87,17 @@ class GamesXBlock(XBlock):
 
     def resource_string(self, path):
         """Handy helper for getting resources from our kit."""
-        data = pkg_resources.resource_string(__name__, path)
-        return data.decode("utf8")
+        return resources.read_text(path)
+
+    @classmethod
+    def open_local_resource(cls, uri):
+        """Serve the content-hashed game assets referenced by student_view."""
+        if isinstance(uri, bytes):
+            uri = uri.decode("utf-8")
+        resolved_uri = resolve_fingerprinted_uri(uri)
+        if resolved_uri is None:
+            raise DisallowedFileError(f"Only fingerprinted game assets are served: {uri!r}")
+        return super().open_local_resource(resolved_uri)
 
     def get_mode(self):
         """Detect if in preview/author mode."""
@@ -78,6 +105,8 @@ class GamesXBlock(XBlock):
             return "preview"
         return "normal"
 
+    @traced
+    @profiled
     def student_view(self, context=None):
         """
         The primary view of the GamesXBlock, shown to students
@@ -93,11 +122,15 @@ class GamesXBlock(XBlock):
 
         return frag
 
+    @traced
+    @profiled
     @XBlock.json_handler
     def get_settings(self, data, suffix=""):
         """Get game type, cards, and shuffle setting in one call."""
         return CommonHandlers.get_settings(self, data, suffix)
 
+    @traced
+    @profiled
     @XBlock.handler
     def upload_image(self, request, suffix=""):
         """
@@ -105,6 +138,22 @@ class GamesXBlock(XBlock):
         """
         return CommonHandlers.upload_image(self, request, suffix)
 
+    @traced
+    @profiled
+    @XBlock.handler
+    def upload_images(self, request, suffix=""):
+        """Upload several image files in one request, writing them to storage concurrently."""
+        return CommonHandlers.upload_images(self, request, suffix)
+
+    @traced
+    @profiled
+    @XBlock.handler
+    def import_cards(self, request, suffix=""):
+        """Import cards from an uploaded CSV/TSV file."""
+        return CommonHandlers.import_cards(self, request, suffix)
+
+    @traced
+    @profiled
     @XBlock.json_handler
     def delete_image_handler(self, data, suffix=""):
         """
@@ -113,21 +162,67 @@ class GamesXBlock(XBlock):
         """
         return CommonHandlers.delete_image_handler(self, data, suffix)
 
+    @traced
+    @profiled
+    @XBlock.json_handler
+    def delete_images(self, data, suffix=""):
+        """
+        Delete several images and their resized variants.
+        Expected: { "keys": ["games/<block_id>/<hash>.ext", ...] }
+        """
+        return CommonHandlers.delete_images(self, data, suffix)
+
+    @traced
+    @profiled
     @XBlock.json_handler
     def save_settings(self, data, suffix=""):
         """Save game type, shuffle setting, and all cards in one API call."""
         return CommonHandlers.save_settings(self, data, suffix)
 
+    @traced
+    @profiled
+    @XBlock.json_handler
+    def patch_cards(self, data, suffix=""):
+        """Apply add/update/delete/move operations to the cards."""
+        return CommonHandlers.patch_cards(self, data, suffix)
+
+    @traced
+    @profiled
     @XBlock.json_handler
     def complete_matching_game(self, data, suffix=""):
         """Complete the matching game and compare the user's time to the best_time field."""
         return MatchingHandlers.complete_matching_game(self, data, suffix)
 
+    @traced
+    @profiled
     @XBlock.json_handler
     def start_matching_game(self, data, suffix=""):
         """Decrypt and return the key mapping for matching game validation."""
         return MatchingHandlers.get_matching_key_mapping(self, data, suffix)
 
+    @traced
+    @profiled
+    @XBlock.json_handler
+    def get_matching_page(self, data, suffix=""):
+        """Return one page of the matching game and its encrypted key slice."""
+        return MatchingHandlers.get_matching_page(self, data, suffix)
+
+    @traced
+    @profiled
+    @XBlock.json_handler
+    def reshuffle_matching_game(self, data, suffix=""):
+        """Return newly shuffled matching pages and their encrypted key."""
+        return MatchingHandlers.reshuffle_matching_game(self, data, suffix)
+
+    @traced
+    @profiled
+    @XBlock.json_handler
+    def get_flashcards_window(self, data, suffix=""):
+        """Return the next window of flashcards for a signed cursor."""
+        return FlashcardsHandlers.get_flashcards_window(self, data, suffix)
+
+    @traced
+    @profiled
     @XBlock.handler
     def refresh_game(self, request, suffix=""):
         """Refresh the game view with new shuffled data."""
@@ -4,41 +4,285 @@ Common handler methods for the Games XBlock.
 
 import base64
 import hashlib
+import hmac
 import json
-import random
-import string
+import logging
+import os
+import struct
+import threading
 import uuid
 
-from django.core.files.base import ContentFile
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 from django.utils.translation import gettext as _
 from xblock.core import Response
-from cryptography.fernet import Fernet
 
-from games.utils import delete_image, get_gamesxblock_storage
+from games.utils import LRUCache, UploadTooLargeError, delete_image, get_gamesxblock_storage, hash_file
 
-from ..constants import CARD_FIELD, CONFIG, DEFAULT, GAME_TYPE, UPLOAD
+from ..card_import import CardImportError, get_delimiter, read_cards
+from ..constants import (
+    CARD_FIELD,
+    CARD_OP,
+    CIPHER_BACKEND,
+    CONFIG,
+    DEFAULT,
+    GAME_TYPE,
+    IMAGE_LAYOUT,
+    PAYLOAD_ENCODING,
+    UPLOAD,
+)
+from ..image_gc import (
+    block_prefix,
+    content_path,
+    delete_paths,
+    get_image_layout,
+    image_stem,
+    is_content_path,
+    pending_marker_path,
+    ref_marker_path,
+    touch_marker,
+    update_refs,
+)
+from ..images import derivative_path, get_derivative_settings, schedule_derivatives
+from ..payload import get_payload_encoding
+from ..randomness import RenderRandom
+from ..tracing import stage
+
+log = logging.getLogger(__name__)
+
+
+class CipherBackend:
+    """
+    Interface for ciphers that protect game payloads.
+
+    Backends are built from the 32-byte key returned by
+    CommonHandlers.generate_encryption_key and turn bytes into URL-safe text
+    tokens. Each backend recognises its own tokens, so payloads produced by one
+    backend keep decrypting after the configured backend changes.
+
+    Deterministic encryption (used by seeded renders) takes the nonce from an
+    HMAC of the plaintext, so equal plaintexts give equal tokens while different
+    plaintexts never share a nonce.
+    """
+
+    name = None
+
+    def __init__(self, encryption_key):
+        self.encryption_key = encryption_key
+        self._nonce_key = hashlib.sha256(base64.urlsafe_b64decode(encryption_key) + b":nonce").digest()
+
+    def synthetic_nonce(self, plaintext, length):
+        """Return a nonce derived from the plaintext for deterministic encryption."""
+        return hmac.new(self._nonce_key, plaintext, hashlib.sha256).digest()[:length]
+
+    @classmethod
+    def owns_token(cls, token):
+        """Return whether a token was produced by this backend."""
+        raise NotImplementedError
+
+    def encrypt(self, plaintext, deterministic=False):
+        """Encrypt bytes and return a text token; with deterministic, equal plaintexts give equal tokens."""
+        raise NotImplementedError
+
+    def decrypt(self, token):
+        """Decrypt a text token and return the plaintext bytes."""
+        raise NotImplementedError
+
+
+class FernetCipher(CipherBackend):
+    """Fernet tokens: AES-128-CBC with HMAC-SHA256, base64 encoded."""
+
+    name = CIPHER_BACKEND.FERNET
+
+    def __init__(self, encryption_key):
+        from cryptography.fernet import Fernet  # pylint: disable=import-outside-toplevel
+
+        super().__init__(encryption_key)
+        self._fernet = Fernet(encryption_key)
+        key_bytes = base64.urlsafe_b64decode(encryption_key)
+        self._signing_key, self._aes_key = key_bytes[:16], key_bytes[16:]
+
+    @classmethod
+    def owns_token(cls, token):
+        # Fernet tokens start with the version byte 0x80, i.e. "gA" in base64
+        return token.startswith("gA")
+
+    def encrypt(self, plaintext, deterministic=False):
+        if deterministic:
+            # Fixed timestamp and synthetic IV; Fernet has no public API for either
+            return self.token_from_parts(plaintext, 0, self.synthetic_nonce(plaintext, 16))
+        return self._fernet.encrypt(plaintext).decode()
+
+    def token_from_parts(self, plaintext, timestamp, iv):
+        """
+        Build a Fernet token with the given timestamp and IV.
+
+        Follows the Fernet spec with public primitives: version 0x80, the
+        timestamp, the IV, and the AES-128-CBC ciphertext under the second half of
+        the key, all signed with HMAC-SHA256 under the first half.
+        """
+        # pylint: disable=import-outside-toplevel
+        from cryptography.hazmat.primitives import padding
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+        padder = padding.PKCS7(algorithms.AES.block_size).padder()
+        padded = padder.update(plaintext) + padder.finalize()
+        encryptor = Cipher(algorithms.AES(self._aes_key), modes.CBC(iv)).encryptor()
+        basic_parts = b"\x80" + struct.pack(">Q", timestamp) + iv + encryptor.update(padded) + encryptor.finalize()
+        signature = hmac.new(self._signing_key, basic_parts, hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(basic_parts + signature).decode()
+
+    def decrypt(self, token):
+        return self._fernet.decrypt(token.encode())
+
+
+class AESGCMCipher(CipherBackend):
+    """
+    Compact AES-256-GCM tokens.
+
+    Token layout: ``PREFIX + base64url(nonce || ciphertext || tag)`` without
+    padding; 12-byte nonce and 16-byte tag, no timestamp or HMAC block.
+    """
+
+    name = CIPHER_BACKEND.AES_GCM
+    PREFIX = "~1"
+    NONCE_LENGTH = 12
+
+    def __init__(self, encryption_key):
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM  # pylint: disable=import-outside-toplevel
+
+        super().__init__(encryption_key)
+        # Use a key separate from the Fernet one derived from the same block secret
+        key_bytes = hashlib.sha256(base64.urlsafe_b64decode(encryption_key) + b":aesgcm").digest()
+        self._aesgcm = AESGCM(key_bytes)
+
+    @classmethod
+    def owns_token(cls, token):
+        return token.startswith(cls.PREFIX)
+
+    def encrypt(self, plaintext, deterministic=False):
+        if deterministic:
+            nonce = self.synthetic_nonce(plaintext, self.NONCE_LENGTH)
+        else:
+            nonce = os.urandom(self.NONCE_LENGTH)
+        blob = nonce + self._aesgcm.encrypt(nonce, plaintext, None)
+        return self.PREFIX + base64.urlsafe_b64encode(blob).rstrip(b"=").decode()
+
+    def decrypt(self, token):
+        from cryptography.exceptions import InvalidTag  # pylint: disable=import-outside-toplevel
+
+        if not self.owns_token(token):
+            raise ValueError("Invalid token")
+        encoded = token[len(self.PREFIX):]
+        try:
+            blob = base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4))
+            return self._aesgcm.decrypt(blob[:self.NONCE_LENGTH], blob[self.NONCE_LENGTH:], None)
+        except (InvalidTag, ValueError) as e:
+            raise ValueError("Invalid token") from e
+
+
+CIPHER_BACKENDS = {backend.name: backend for backend in (FernetCipher, AESGCMCipher)}
+
+
+def get_cipher_backend_name():
+    """Return the configured cipher backend for new payloads (GAMESXBLOCK_CIPHER_BACKEND)."""
+    name = getattr(settings, "GAMESXBLOCK_CIPHER_BACKEND", CIPHER_BACKEND.FERNET)
+    if name not in CIPHER_BACKENDS:
+        raise ValueError(f"Unknown cipher backend '{name}'. Valid: {', '.join(CIPHER_BACKEND.VALID)}")
+    return name
+
+
+def get_token_backend_name(token):
+    """Return the name of the backend that produced a token (Fernet if unrecognised)."""
+    for name, backend in CIPHER_BACKENDS.items():
+        if backend.owns_token(token):
+            return name
+    return CIPHER_BACKEND.FERNET
+
+
+_cipher_cache = None
+_cipher_cache_lock = threading.Lock()
+
+
+def get_cipher_cache():
+    """
+    Return the process-wide cache of per-block ciphers.
+
+    Sized from the GAMESXBLOCK_CIPHER_CACHE setting on first use, e.g.
+    ``{"max_size": 1024, "ttl": 3600}``.
+    """
+    global _cipher_cache  # pylint: disable=global-statement
+    if _cipher_cache is None:
+        with _cipher_cache_lock:
+            if _cipher_cache is None:
+                cache_settings = getattr(settings, "GAMESXBLOCK_CIPHER_CACHE", None) or {}
+                _cipher_cache = LRUCache(
+                    max_size=cache_settings.get("max_size", CONFIG.CIPHER_CACHE_MAX_SIZE),
+                    ttl=cache_settings.get("ttl", CONFIG.CIPHER_CACHE_TTL),
+                )
+    return _cipher_cache
+
+
+def reset_cipher_cache():
+    """Discard the cipher cache so it is rebuilt from current settings."""
+    global _cipher_cache  # pylint: disable=global-statement
+    with _cipher_cache_lock:
+        _cipher_cache = None
+
+
+@receiver(setting_changed)
+def _reset_cipher_cache_on_change(setting, **kwargs):  # pylint: disable=unused-argument
+    """Drop cached ciphers when GAMESXBLOCK_CIPHER_CACHE is overridden (e.g. override_settings)."""
+    if setting == "GAMESXBLOCK_CIPHER_CACHE":
+        reset_cipher_cache()
 
 
 class CommonHandlers:
     """Handlers that work across all game types."""
 
     @staticmethod
-    def generate_unique_var_names(keys, min_len=3, max_len=6, max_attempts=1000):
+    def generate_unique_var_names(keys, min_len=3, max_len=6, randomness=None):
         """
         Generate unique random variable names for obfuscation.
+
+        Names are sampled from the render's RenderRandom (a new one if not given).
         """
-        used = set()
-        names = {}
-        for key in keys:
-            for _ in range(max_attempts):
-                name = "".join(random.choices(string.ascii_lowercase, k=random.randint(min_len, max_len)))
-                if name not in used:
-                    used.add(name)
-                    names[key] = name
-                    break
-            else:
-                raise RuntimeError(f"Unable to generate a unique variable name after {max_attempts} attempts. Consider increasing min_len/max_len.")
-        return names
+        return (randomness or RenderRandom()).var_names(keys, min_len, max_len)
+
+    @staticmethod
+    def build_decoder(init_function_name, data_element_id, var_names, init_body):
+        """
+        Build the obfuscated init function that decodes the embedded payload.
+
+        Args:
+            init_function_name: Name of the generated JS init function
+            data_element_id: Id of the script tag holding the encoded payload
+            var_names: Obfuscated names for "runtime", "elem", "tag", "payload", "err"
+            init_body: JS run with the decoded payload in var_names["payload"]
+
+        Returns:
+            JS source. Payloads in the deflate encoding are decoded asynchronously
+            through GamesXBlockPayload.decode; base64(json) is decoded inline.
+        """
+        runtime, elem, tag = var_names["runtime"], var_names["elem"], var_names["tag"]
+        payload, err = var_names["payload"], var_names["err"]
+        header = (
+            f"function {init_function_name}({runtime},{elem}){{"  # function header
+            f"var {tag}=$('#{data_element_id}',{elem});"  # locate script tag
+            f"if(!{tag}.length)return;"  # guard
+        )
+        if get_payload_encoding() == PAYLOAD_ENCODING.DEFLATE:
+            return header + (
+                f"GamesXBlockPayload.decode({tag}.text()).then(function({payload}){{"  # decode
+                f"{tag}.remove();{init_body}"  # remove script, init
+                f"}}).catch(function({err}){{console.warn('Decode failed');}});}}"
+            )
+        return header + (
+            f"try{{var {payload}=JSON.parse(atob({tag}.text()));"  # decode
+            f"{tag}.remove();{init_body}"  # remove script, init
+            f"}}catch({err}){{console.warn('Decode failed');}}}}"
+        )
 
     @staticmethod
     def generate_encryption_key(xblock):
@@ -67,6 +311,10 @@ class CommonHandlers:
         """
         Encrypt data using Fernet (symmetric encryption).
 
+        Legacy raw-key helper: it builds a new Fernet on every call and is not
+        used by the game handlers, which go through encrypt_for_block and the
+        cached per-block cipher from get_cipher.
+
         Args:
             data: Dictionary or any JSON-serializable data to encrypt
             encryption_key: Base64-encoded encryption key
@@ -74,6 +322,8 @@ class CommonHandlers:
         Returns:
             Base64-encoded encrypted string
         """
+        from cryptography.fernet import Fernet  # pylint: disable=import-outside-toplevel
+
         fernet = Fernet(encryption_key)
         data_json = json.dumps(data)
         encrypted_data = fernet.encrypt(data_json.encode())
@@ -84,6 +334,9 @@ class CommonHandlers:
         """
         Decrypt encrypted data back to original format.
 
+        Legacy raw-key counterpart of encrypt_data; game payloads are decrypted
+        with decrypt_for_block.
+
         Args:
             encrypted_hash: Base64-encoded encrypted string
             encryption_key: Base64-encoded encryption key
@@ -91,11 +344,63 @@ class CommonHandlers:
         Returns:
             Decrypted data (dictionary or original data structure)
         """
+        from cryptography.fernet import Fernet  # pylint: disable=import-outside-toplevel
+
         fernet = Fernet(encryption_key)
         # Fernet.decrypt expects bytes (base64-encoded), so just encode the string
         decrypted_json = fernet.decrypt(encrypted_hash.encode()).decode()
         return json.loads(decrypted_json)
 
+    @staticmethod
+    def get_cipher(xblock, backend=None):
+        """
+        Return a ready-to-use cipher for the block, derived once and cached per process.
+
+        Args:
+            xblock: The xblock instance
+            backend: Cipher backend name; defaults to GAMESXBLOCK_CIPHER_BACKEND
+
+        Returns:
+            CipherBackend instance keyed with generate_encryption_key(xblock)
+        """
+        backend = backend or get_cipher_backend_name()
+        block_id = str(xblock.scope_ids.usage_id.block_id)
+
+        def derive():
+            with stage("key_derivation"):
+                return CIPHER_BACKENDS[backend](CommonHandlers.generate_encryption_key(xblock))
+
+        return get_cipher_cache().get_or_create((block_id, backend), derive)
+
+    @staticmethod
+    def encrypt_for_block(xblock, data, deterministic=False):
+        """
+        Encrypt JSON-serializable data with the block's configured cipher.
+
+        With deterministic, the same data always gives the same token (see CipherBackend).
+        """
+        cipher = CommonHandlers.get_cipher(xblock)
+        with stage("encrypt"):
+            data_json = json.dumps(data, separators=(",", ":"))
+            return cipher.encrypt(data_json.encode(), deterministic)
+
+    @staticmethod
+    def decrypt_for_block(xblock, encrypted_hash):
+        """
+        Decrypt data produced by encrypt_for_block or encrypt_data with the block's key.
+
+        The backend is chosen from the token itself, so payloads keep decrypting
+        after GAMESXBLOCK_CIPHER_BACKEND changes.
+        """
+        cipher = CommonHandlers.get_cipher(xblock, get_token_backend_name(encrypted_hash))
+        with stage("decrypt"):
+            return json.loads(cipher.decrypt(encrypted_hash).decode())
+
+    @staticmethod
+    def cipher_cache_stats():
+        """Return hit/miss/eviction counters of the cipher cache for monitoring."""
+        return get_cipher_cache().stats()
+
     @staticmethod
     def get_settings(xblock, data, suffix=""):
         """Get game type, cards, and shuffle setting in one call."""
@@ -104,40 +409,121 @@ class CommonHandlers:
             "cards": xblock.cards,
             "is_shuffled": xblock.is_shuffled,
             "has_timer": xblock.has_timer,
+            "cards_version": xblock.cards_version,
         }
 
+    @staticmethod
+    def image_extension(file_name):
+        """
+        Return the lowercased extension of an image upload's file name.
+
+        Raises:
+            ValueError: If the name has no extension or it is not an allowed image type.
+        """
+        if "." not in file_name:
+            raise ValueError("File must have an extension")
+        ext = file_name.rsplit(".", 1)[1].lower()
+        if ext not in UPLOAD.ALLOWED_EXTENSIONS:
+            raise ValueError(
+                f"Unsupported file type '.{ext}'. Allowed: {', '.join(sorted(UPLOAD.ALLOWED_EXTENSIONS))}"
+            )
+        return ext
+
+    @staticmethod
+    def image_path(xblock, file_hash, ext):
+        """
+        Return the content-addressed storage path of an image for this block.
+
+        In the "content" GAMESXBLOCK_IMAGE_LAYOUT the path is shared by every block.
+        """
+        if get_image_layout() == IMAGE_LAYOUT.CONTENT:
+            return content_path(file_hash, ext)
+        return f"{UPLOAD.PATH_PREFIX}/{xblock.scope_ids.usage_id.block_id}/{file_hash}.{ext}"
+
+    @staticmethod
+    def update_image_refs(xblock, previous_cards):
+        """
+        Update the reference index of shared images after the block's cards changed.
+
+        Only content-addressed image URLs are tracked. Failures are logged
+        rather than failing the save, as collect_game_images re-checks every
+        block's cards before deleting anything.
+        """
+        try:
+            update_refs(get_gamesxblock_storage(), xblock.scope_ids.usage_id, previous_cards, xblock.cards)
+        except Exception:  # pylint: disable=broad-except
+            log.exception("Failed to update image references for %s", xblock.scope_ids.usage_id)
+
+    @staticmethod
+    def release_image(xblock, storage, key):
+        """Drop this block's reference to a shared image; the object is left for collection."""
+        storage.delete(ref_marker_path(image_stem(key), xblock.scope_ids.usage_id))
+
+    @staticmethod
+    def mark_upload(xblock, storage, file_path, deduplicated):
+        """
+        Keep an upload from being collected before the author saves cards using it.
+
+        In the content layout the block's reference marker is written, or
+        refreshed. A block-layout upload matching an existing object gets a
+        pending marker, because the object still has the modification time of
+        its first upload.
+        """
+        if is_content_path(file_path):
+            touch_marker(storage, ref_marker_path(image_stem(file_path), xblock.scope_ids.usage_id))
+        elif deduplicated:
+            touch_marker(storage, pending_marker_path(xblock.scope_ids.usage_id.block_id, image_stem(file_path)))
+
+    @staticmethod
+    def store_image(xblock, asset_storage, file_path, upload_file, file_name):
+        """
+        Write an upload to its content-addressed path and queue its resized variants.
+
+        The path is content-addressed, so an existing object already holds these
+        bytes and the write is skipped. Either way the upload is marked as
+        recent (see mark_upload).
+
+        Returns:
+            (saved_path, deduplicated, derivatives_queued)
+        """
+        from django.core.files import File  # pylint: disable=import-outside-toplevel
+
+        deduplicated = asset_storage.exists(file_path)
+        if deduplicated:
+            saved_path = file_path
+        else:
+            saved_path = asset_storage.save(file_path, File(upload_file, name=file_name))
+        CommonHandlers.mark_upload(xblock, asset_storage, saved_path, deduplicated)
+        derivatives = schedule_derivatives(asset_storage, saved_path)
+        return saved_path, deduplicated, derivatives is not None
+
     @staticmethod
     def upload_image(xblock, request, suffix=""):
         """
         Upload an image file to configured storage (S3 if set) and return URL.
+
+        The upload is hashed in chunks straight from the request's file and
+        stored under games/<block_id>/<md5>.<ext>. If that object already exists
+        the write is skipped; otherwise the file is streamed into storage.
+        Files over GAMESXBLOCK_MAX_UPLOAD_SIZE bytes are rejected with status 413.
+        With GAMESXBLOCK_IMAGE_DERIVATIVES on, resized variants are queued in the background.
         """
         asset_storage = get_gamesxblock_storage()
         try:
             upload_file = request.params["file"].file
             file_name = request.params["file"].filename
-            if "." not in file_name:
-                return Response(
-                    json_body={
-                        "success": False,
-                        "error": "File must have an extension",
-                    },
-                    status=400,
-                )
-            _, ext = file_name.rsplit(".", 1)
-            ext = ext.lower()
-            allowed_exts = ["jpg", "jpeg", "png", "gif", "webp", "svg"]
-            if ext not in allowed_exts:
-                return Response(
-                    json_body={
-                        "success": False,
-                        "error": f"Unsupported file type '.{ext}'. Allowed: {', '.join(sorted(allowed_exts))}",
-                    },
-                    status=400,
+            try:
+                ext = CommonHandlers.image_extension(file_name)
+            except ValueError as e:
+                return Response(json_body={"success": False, "error": str(e)}, status=400)
+            max_size = getattr(settings, "GAMESXBLOCK_MAX_UPLOAD_SIZE", UPLOAD.MAX_SIZE)
+            with stage("hash"):
+                file_hash, size = hash_file(upload_file, max_size, UPLOAD.CHUNK_SIZE)
+            file_path = CommonHandlers.image_path(xblock, file_hash, ext)
+            with stage("storage"):
+                saved_path, deduplicated, derivatives_queued = CommonHandlers.store_image(
+                    xblock, asset_storage, file_path, upload_file, file_name
                 )
-            blob = upload_file.read()
-            file_hash = hashlib.md5(blob).hexdigest()
-            file_path = f"{UPLOAD.PATH_PREFIX}/{xblock.scope_ids.usage_id.block_id}/{file_hash}.{ext}"
-            saved_path = asset_storage.save(file_path, ContentFile(blob))
             file_url = asset_storage.url(saved_path)
             return Response(
                 json_body={
@@ -145,13 +531,158 @@ class CommonHandlers:
                     "url": file_url,
                     "filename": file_name,
                     "file_path": file_path,
+                    "size": size,
+                    "deduplicated": deduplicated,
+                    "derivatives_queued": derivatives_queued,
                 }
             )
+        except UploadTooLargeError as e:
+            return Response(json_body={"success": False, "error": str(e)}, status=413)
         except Exception as e:
             return Response(json_body={"success": False, "error": str(e)}, status=400)
 
     @staticmethod
-    def delete_image_handler(self, data, suffix=""):
+    def upload_images(xblock, request, suffix=""):
+        """
+        Upload several image files in one request.
+
+        Expected multipart params: one ``files`` entry per image. Every file is
+        validated and hashed before anything is written; if any is rejected the
+        whole batch is (status 400, or 413 for oversized files). Files are then
+        written to storage concurrently on a bounded thread pool, with identical
+        files in the batch written once.
+
+        Returns:
+            ``{"success": bool, "results": [...]}`` with one upload_image-style
+            result per file, in request order.
+        """
+        uploads = request.params.getall("files")
+        if not uploads:
+            return Response(json_body={"success": False, "error": "No files uploaded"}, status=400)
+        if len(uploads) > UPLOAD.MAX_BATCH_FILES:
+            return Response(
+                json_body={"success": False, "error": f"At most {UPLOAD.MAX_BATCH_FILES} files per batch"},
+                status=400,
+            )
+
+        max_size = getattr(settings, "GAMESXBLOCK_MAX_UPLOAD_SIZE", UPLOAD.MAX_SIZE)
+        results, errors, status = [], 0, 400
+        for upload in uploads:
+            if not hasattr(upload, "filename") or not hasattr(upload, "file"):
+                # A plain form value rather than a file
+                results.append({"filename": None, "success": False, "error": "Not a file upload"})
+                errors += 1
+                continue
+            result = {"filename": upload.filename}
+            try:
+                ext = CommonHandlers.image_extension(upload.filename)
+                file_hash, result["size"] = hash_file(upload.file, max_size, UPLOAD.CHUNK_SIZE)
+                result["file_path"] = CommonHandlers.image_path(xblock, file_hash, ext)
+            except UploadTooLargeError as e:
+                result.update(success=False, error=str(e))
+                errors, status = errors + 1, 413
+            except ValueError as e:
+                result.update(success=False, error=str(e))
+                errors += 1
+            results.append(result)
+        if errors:
+            for result in results:
+                result.setdefault("success", False)
+            return Response(
+                json_body={"success": False, "error": f"{errors} files were rejected", "results": results},
+                status=status,
+            )
+
+        from concurrent.futures import ThreadPoolExecutor  # pylint: disable=import-outside-toplevel
+
+        asset_storage = get_gamesxblock_storage()
+        # Identical files share a path, so each path is written by exactly one worker
+        first_upload = {}
+        for result, upload in zip(results, uploads):
+            first_upload.setdefault(result["file_path"], upload)
+        workers = min(UPLOAD.BATCH_WORKERS, len(first_upload))
+        with stage("storage"), ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gamesxblock-upload") as pool:
+            writes = {
+                path: pool.submit(CommonHandlers.store_image, xblock, asset_storage, path, upload.file, upload.filename)
+                for path, upload in first_upload.items()
+            }
+
+        for result, upload in zip(results, uploads):
+            try:
+                saved_path, deduplicated, derivatives_queued = writes[result["file_path"]].result()
+                result.update(
+                    success=True,
+                    url=asset_storage.url(saved_path),
+                    deduplicated=deduplicated or first_upload[result["file_path"]] is not upload,
+                    derivatives_queued=derivatives_queued,
+                )
+            except Exception as e:  # pylint: disable=broad-except
+                result.update(success=False, error=str(e))
+        return Response(json_body={"success": all(result["success"] for result in results), "results": results})
+
+    @staticmethod
+    def import_cards(xblock, request, suffix=""):
+        """
+        Import cards from an uploaded CSV/TSV file.
+
+        Expected multipart params:
+            file: .csv (comma) or .tsv/.txt (tab) file with a header row
+            mode: "replace" (default) or "append"
+            cards_version: optional; rejects the import if the cards changed since
+
+        The file is parsed as a stream and nothing is saved unless every row is valid.
+        """
+        try:
+            upload = request.params["file"]
+            delimiter = get_delimiter(upload.filename)
+            mode = request.params.get("mode", "replace")
+            if mode not in ("replace", "append"):
+                raise CardImportError(f"Unknown mode '{mode}'")
+
+            version = request.params.get("cards_version")
+            if version not in (None, "") and str(version) != str(xblock.cards_version):
+                return Response(json_body=CommonHandlers.stale_cards_error(xblock), status=409)
+
+            existing = list(xblock.cards) if mode == "append" else []
+            cards = read_cards(
+                upload.file,
+                delimiter,
+                existing_keys={card.get(CARD_FIELD.CARD_KEY) for card in existing},
+                start_order=len(existing),
+                max_cards=getattr(settings, "GAMESXBLOCK_IMPORT_MAX_CARDS", CONFIG.IMPORT_MAX_CARDS),
+            )
+        except CardImportError as e:
+            return Response(
+                json_body={
+                    "success": False,
+                    "error": str(e),
+                    "row_errors": e.row_errors,
+                    "error_count": e.error_count,
+                },
+                status=400,
+            )
+        except (KeyError, AttributeError):
+            return Response(json_body={"success": False, "error": "Missing file"}, status=400)
+
+        previous_cards = xblock.cards
+        xblock.cards = existing + cards
+        xblock.list_length = len(xblock.cards)
+        xblock.cards_version += 1
+        xblock.save()
+        if get_image_layout() == IMAGE_LAYOUT.CONTENT:
+            CommonHandlers.update_image_refs(xblock, previous_cards)
+
+        return Response(
+            json_body={
+                "success": True,
+                "imported": len(cards),
+                "count": xblock.list_length,
+                "cards_version": xblock.cards_version,
+            }
+        )
+
+    @staticmethod
+    def delete_image_handler(xblock, data, suffix=""):
         """
         Delete an image by storage key.
         Expected: { "key": "gamesxblock/<block_id>/<hash>.ext" }
@@ -161,11 +692,64 @@ class CommonHandlers:
             return {"success": False, "error": "Missing key"}
         try:
             storage = get_gamesxblock_storage()
+            if is_content_path(key):
+                CommonHandlers.release_image(xblock, storage, key)
+                return {"success": True, "key": key}
             is_deleted = delete_image(storage, key)
             return {"success": is_deleted, "key": key}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+    @staticmethod
+    def delete_images(xblock, data, suffix=""):
+        """
+        Delete several of this block's images, and their resized variants, in one call.
+
+        Expected: { "keys": ["games/<block_id>/<hash>.ext", ...] }
+
+        Keys outside the block's upload directory reject the whole request.
+        Deletes run concurrently and need no existence check. Shared images of
+        the content-addressed layout are not deleted; only this block's
+        reference to them is dropped.
+        """
+        keys = data.get("keys")
+        if not keys or not isinstance(keys, list):
+            return {"success": False, "error": "Missing keys"}
+        prefix = block_prefix(xblock.scope_ids.usage_id.block_id) + "/"
+        invalid = [
+            key for key in keys
+            if not isinstance(key, str) or ".." in key or not (key.startswith(prefix) or is_content_path(key))
+        ]
+        if invalid:
+            return {"success": False, "error": "Keys must belong to this block", "invalid_keys": invalid}
+
+        shared = [key for key in keys if is_content_path(key)]
+        paths = [key for key in keys if key not in shared]
+        derivative_settings = get_derivative_settings()
+        if derivative_settings:
+            for key in list(paths):
+                paths.extend(
+                    derivative_path(key, width, derivative_settings["format"])
+                    for width in derivative_settings["widths"]
+                )
+        failed = {}
+        try:
+            storage = get_gamesxblock_storage()
+            result = delete_paths(storage, paths, UPLOAD.BATCH_WORKERS, measure=False)
+            for key in shared:
+                try:
+                    CommonHandlers.release_image(xblock, storage, key)
+                except Exception as e:  # pylint: disable=broad-except
+                    failed[key] = str(e)
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+        failed.update({key: error for key, error in result["failed"].items() if key in keys})
+        return {
+            "success": not failed,
+            "deleted": [key for key in keys if key not in failed],
+            "failed": failed,
+        }
+
     @staticmethod
     def save_settings(xblock, data, suffix=""):
         """
@@ -183,10 +767,14 @@ class CommonHandlers:
                     'definition_image': 'http://...'
                 },
                 ...
-            ]
+            ],
+            'cards_version': 3  # optional; rejects the save if the cards changed since
         }
         """
         try:
+            if "cards_version" in data and data["cards_version"] != xblock.cards_version:
+                return CommonHandlers.stale_cards_error(xblock)
+
             new_game_type = data.get("game_type", GAME_TYPE.FLASHCARDS)
             new_is_shuffled = data.get("is_shuffled", DEFAULT.IS_SHUFFLED)
             new_has_timer = data.get("has_timer", DEFAULT.HAS_TIMER)
@@ -225,13 +813,17 @@ class CommonHandlers:
                 xblock.title = DEFAULT.FLASHCARDS_TITLE
             else:
                 xblock.title = DEFAULT.MATCHING_TITLE
+            previous_cards = xblock.cards
             xblock.cards = validated_cards
             xblock.game_type = new_game_type
             xblock.is_shuffled = new_is_shuffled
             xblock.has_timer = new_has_timer
             xblock.list_length = len(validated_cards)
+            xblock.cards_version += 1
 
             xblock.save()
+            if get_image_layout() == IMAGE_LAYOUT.CONTENT:
+                CommonHandlers.update_image_refs(xblock, previous_cards)
 
             return {
                 "success": True,
@@ -240,12 +832,167 @@ class CommonHandlers:
                 "count": len(xblock.cards),
                 "is_shuffled": xblock.is_shuffled,
                 "has_timer": xblock.has_timer,
+                "cards_version": xblock.cards_version,
             }
         except Exception as e:
             return {"success": False, "error": str(e)}
 
     @staticmethod
-    def format_as_uuid_like(key_hex, index):
+    def stale_cards_error(xblock):
+        """Return the response for an edit based on an outdated cards_version."""
+        return {
+            "success": False,
+            "error": _("The cards were changed by someone else. Reload and try again."),
+            "conflict": True,
+            "cards_version": xblock.cards_version,
+        }
+
+    @staticmethod
+    def patch_cards(xblock, data, suffix=""):
+        """
+        Apply incremental card changes, keyed by card_key, without resending the deck.
+
+        Expected data format:
+        {
+            'cards_version': 3,
+            'operations': [
+                {'op': 'add', 'card': {'term': ..., 'definition': ...}, 'position': 0},
+                {'op': 'update', 'card_key': '...', 'fields': {'definition': ...}},
+                {'op': 'delete', 'card_key': '...'},
+                {'op': 'move', 'card_key': '...', 'position': 2}
+            ]
+        }
+
+        Only the cards named by the operations are validated and rebuilt. The
+        operations are applied in order and all-or-nothing; cards_version must
+        match the stored version or the patch is rejected as stale.
+        """
+        if data.get("cards_version") != xblock.cards_version:
+            return CommonHandlers.stale_cards_error(xblock)
+        operations = data.get("operations")
+        if not isinstance(operations, list):
+            return {"success": False, "error": _("operations must be a list")}
+
+        cards = list(xblock.cards)
+        # Positions are computed once and kept valid below dirty_from; adds,
+        # deletes and moves only lower dirty_from, and the shifted tail is
+        # re-indexed only if a later operation names a card in it.
+        positions = {card.get(CARD_FIELD.CARD_KEY): i for i, card in enumerate(cards)}
+        dirty_from = len(cards)
+        editable_fields = (
+            CARD_FIELD.TERM, CARD_FIELD.TERM_IMAGE, CARD_FIELD.DEFINITION,
+            CARD_FIELD.DEFINITION_IMAGE, CARD_FIELD.ORDER,
+        )
+        added_keys = []
+
+        def find(card_key):
+            nonlocal dirty_from
+            position = positions.get(card_key)
+            if position is not None and position >= dirty_from:
+                for i in range(dirty_from, len(cards)):
+                    positions[cards[i].get(CARD_FIELD.CARD_KEY)] = i
+                dirty_from = len(cards)
+                position = positions[card_key]
+            return position
+
+        def clamp(position):
+            if position is None:
+                return len(cards)
+            if not isinstance(position, int) or isinstance(position, bool):
+                raise ValueError(position)
+            return max(0, min(position, len(cards)))
+
+        for number, operation in enumerate(operations, start=1):
+            op = operation.get("op") if isinstance(operation, dict) else None
+            if op not in CARD_OP.VALID:
+                return {"success": False, "error": _("Operation {number}: unknown op").format(number=number)}
+
+            if op == CARD_OP.ADD:
+                card = operation.get("card")
+                if (
+                    not isinstance(card, dict)
+                    or CARD_FIELD.TERM not in card
+                    or CARD_FIELD.DEFINITION not in card
+                ):
+                    return {
+                        "success": False,
+                        "error": _("Operation {number}: card must have term and definition").format(number=number),
+                    }
+                card_key = card.get(CARD_FIELD.CARD_KEY) or str(uuid.uuid4())
+                if card_key in positions:
+                    return {
+                        "success": False,
+                        "error": _("Operation {number}: card_key already exists").format(number=number),
+                    }
+                try:
+                    position = clamp(operation.get("position"))
+                except ValueError:
+                    return {
+                        "success": False,
+                        "error": _("Operation {number}: invalid position").format(number=number),
+                    }
+                new_card = {field: card.get(field, "") for field in editable_fields}
+                new_card[CARD_FIELD.CARD_KEY] = card_key
+                cards.insert(position, new_card)
+                positions[card_key] = position
+                dirty_from = min(dirty_from, position)
+                added_keys.append(card_key)
+                continue
+
+            card_key = operation.get("card_key")
+            if not isinstance(card_key, str) or not card_key:
+                return {
+                    "success": False,
+                    "error": _("Operation {number}: card_key must be a non-empty string").format(number=number),
+                }
+            position = find(card_key)
+            if position is None:
+                return {
+                    "success": False,
+                    "error": _("Operation {number}: card not found").format(number=number),
+                }
+
+            if op == CARD_OP.UPDATE:
+                fields = operation.get("fields")
+                if not isinstance(fields, dict) or not set(fields) <= set(editable_fields):
+                    return {
+                        "success": False,
+                        "error": _("Operation {number}: invalid fields").format(number=number),
+                    }
+                cards[position] = {**cards[position], **fields}
+            elif op == CARD_OP.DELETE:
+                positions.pop(cards.pop(position).get(CARD_FIELD.CARD_KEY), None)
+                dirty_from = min(dirty_from, position)
+            else:
+                try:
+                    target = clamp(operation.get("position"))
+                except ValueError:
+                    return {
+                        "success": False,
+                        "error": _("Operation {number}: invalid position").format(number=number),
+                    }
+                card = cards.pop(position)
+                target = min(target, len(cards))
+                cards.insert(target, card)
+                dirty_from = min(dirty_from, position, target)
+
+        previous_cards = xblock.cards
+        xblock.cards = cards
+        xblock.list_length = len(cards)
+        xblock.cards_version += 1
+        xblock.save()
+        if get_image_layout() == IMAGE_LAYOUT.CONTENT:
+            CommonHandlers.update_image_refs(xblock, previous_cards)
+
+        return {
+            "success": True,
+            "count": len(cards),
+            "added_keys": added_keys,
+            "cards_version": xblock.cards_version,
+        }
+
+    @staticmethod
+    def format_as_uuid_like(key_hex, index, randomness=None):
         """
         Format key and index as UUID-like string for maximum obfuscation.
         Format: key-index_part1-rand4-index_part2-rand12
@@ -253,13 +1000,9 @@ class CommonHandlers:
         Args:
             key_hex: 8-char hex string (key)
             index: integer index
+            randomness: RenderRandom supplying the filler bytes (a new one if not given)
 
         Returns:
             UUID-like formatted string (36 chars total: 8-4-4-4-12)
         """
-        index_hex = format(index, '08x')
-        index_part1 = index_hex[:4]
-        index_part2 = index_hex[4:]
-        rand_4 = format(random.getrandbits(16), '04x')
-        rand_12 = format(random.getrandbits(48), '012x')
-        return f"{key_hex}-{index_part1}-{rand_4}-{index_part2}-{rand_12}"
+        return (randomness or RenderRandom(item_count=1, extra_bytes=0)).uuid_like(key_hex, index)
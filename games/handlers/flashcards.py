@@ -3,21 +3,107 @@ Flashcards game handler methods.
 """
 
 import random
-import base64
-import json
 import string
 
-import pkg_resources
-from django.template import Context, Template
+from django.conf import settings
+from django.core import signing
 from web_fragments.fragment import Fragment
 
-from ..constants import CARD_FIELD, CONFIG, DEFAULT
+from ..assets import add_game_assets
+from ..constants import CARD_FIELD, CONFIG, DEFAULT, GAME_TYPE
+from ..images import build_srcset, get_derivative_settings
+from ..payload import encode_payload
+from ..randomness import IDENTIFIER_BYTES, RenderRandom
+from ..template_registry import get_template
+from ..tracing import record_fragment_sizes, record_size, stage
 from .common import CommonHandlers
 
 
 class FlashcardsHandlers:
     """Handlers specific to the flashcards game."""
 
+    CURSOR_SALT = "games.flashcards.window"
+
+    @staticmethod
+    def get_window_size(xblock):
+        """
+        Return the number of cards embedded per window, or 0 if windowing is off.
+
+        Controlled by the GAMESXBLOCK_FLASHCARDS_WINDOW_SIZE setting. Always off
+        in author preview, where handlers are not available.
+        """
+        window_size = getattr(settings, "GAMESXBLOCK_FLASHCARDS_WINDOW_SIZE", 0) or 0
+        if window_size <= 0 or xblock.get_mode() == "preview":
+            return 0
+        return window_size
+
+    @staticmethod
+    def payload_card(card, derivative_settings=None):
+        """
+        Return the client-side representation of a stored card.
+
+        Given image variant settings (see get_derivative_settings), uploaded
+        images also carry a srcset of their resized variants.
+        """
+        payload = {
+            "id": card.get(CARD_FIELD.CARD_KEY, ""),
+            "term": card.get(CARD_FIELD.TERM, ""),
+            "definition": card.get(CARD_FIELD.DEFINITION, ""),
+            "term_image": card.get(CARD_FIELD.TERM_IMAGE, ""),
+            "definition_image": card.get(CARD_FIELD.DEFINITION_IMAGE, ""),
+        }
+        if derivative_settings:
+            for field in ("term_image", "definition_image"):
+                srcset = build_srcset(payload[field], derivative_settings)
+                if srcset:
+                    payload[field.replace("_image", "_srcset")] = srcset
+        return payload
+
+    @staticmethod
+    def deck_order(card_count, seed):
+        """
+        Return the order in which cards are shown.
+
+        A seed of None keeps the authored order; otherwise the order is a
+        shuffle seeded with it, so later windows can rebuild the same order.
+        """
+        order = list(range(card_count))
+        if seed is not None:
+            random.Random(seed).shuffle(order)
+        return order
+
+    @staticmethod
+    def cursor_salt(xblock):
+        """Return the signing salt for cursors, scoped to one block usage."""
+        return f"{FlashcardsHandlers.CURSOR_SALT}:{xblock.scope_ids.usage_id}"
+
+    @staticmethod
+    def make_cursor(xblock, seed, offset, card_count):
+        """
+        Return a signed cursor pointing at the next window of the deck.
+
+        The cursor carries the block's cards_version, so any edit to the deck,
+        including one that keeps its size, invalidates cursors issued before it.
+        """
+        return signing.dumps(
+            {"seed": seed, "offset": offset, "count": card_count, "version": xblock.cards_version},
+            salt=FlashcardsHandlers.cursor_salt(xblock),
+            compress=True,
+        )
+
+    @staticmethod
+    def read_cursor(xblock, cursor):
+        """
+        Return the data signed into a cursor.
+
+        Raises:
+            signing.BadSignature: If the cursor was tampered with or issued for another block.
+        """
+        return signing.loads(
+            cursor,
+            salt=FlashcardsHandlers.cursor_salt(xblock),
+        )
+
     @staticmethod
     def student_view(xblock, context=None):
         """
@@ -25,51 +111,57 @@ class FlashcardsHandlers:
         """
         cards = list(xblock.cards) if xblock.cards else []
         list_length = len(cards)
-
-        if xblock.is_shuffled and cards:
-            random.shuffle(cards)
+        window_size = FlashcardsHandlers.get_window_size(xblock)
+        # All random material for this render comes from one entropy draw
+        with stage("randomness"):
+            randomness = RenderRandom.for_render(xblock, extra_bytes=IDENTIFIER_BYTES + CONFIG.SALT_LENGTH)
 
         # Build payload with salt for light obfuscation (pattern similar to matching)
-        salt = "".join(random.choices(string.ascii_letters + string.digits, k=CONFIG.SALT_LENGTH))
-        payload_cards = []
-        for card in cards:
-            payload_cards.append(
-                {
-                    "id": card.get(CARD_FIELD.CARD_KEY, ""),
-                    "term": card.get(CARD_FIELD.TERM, ""),
-                    "definition": card.get(CARD_FIELD.DEFINITION, ""),
-                    "term_image": card.get(CARD_FIELD.TERM_IMAGE, ""),
-                    "definition_image": card.get(CARD_FIELD.DEFINITION_IMAGE, ""),
+        salt = randomness.identifier(CONFIG.SALT_LENGTH, string.ascii_letters + string.digits)
+        derivative_settings = get_derivative_settings()
+
+        with stage("shuffle"):
+            if window_size and list_length > window_size:
+                # Embed the first window; the rest is fetched with get_flashcards_window
+                seed = randomness.rng.getrandbits(32) if xblock.is_shuffled else None
+                order = FlashcardsHandlers.deck_order(list_length, seed)
+                mapping_payload = {
+                    "cards": [
+                        FlashcardsHandlers.payload_card(cards[i], derivative_settings) for i in order[:window_size]
+                    ],
+                    "salt": salt,
+                    "cursor": FlashcardsHandlers.make_cursor(xblock, seed, window_size, list_length),
+                    "total": list_length,
                 }
-            )
-        mapping_payload = {"cards": payload_cards, "salt": salt}
-        encoded_mapping = base64.b64encode(json.dumps(mapping_payload).encode()).decode()
+            else:
+                if xblock.is_shuffled and cards:
+                    randomness.rng.shuffle(cards)
+                payload_cards = [FlashcardsHandlers.payload_card(card, derivative_settings) for card in cards]
+                mapping_payload = {"cards": payload_cards, "salt": salt}
+        with stage("encode"):
+            encoded_mapping = encode_payload(mapping_payload)
+        record_size("encoded_mapping", encoded_mapping)
+        first_card = mapping_payload["cards"][0] if mapping_payload["cards"] else {}
 
         # Random variable names for light obfuscation
         var_names = CommonHandlers.generate_unique_var_names(
-            ["runtime", "elem", "tag", "payload", "err"], min_len=3, max_len=6
+            ["runtime", "elem", "tag", "payload", "err"], min_len=3, max_len=6, randomness=randomness
         )
 
         # Unique id for embedded data element (script tag)
-        data_element_id = "".join(
-            random.choices(string.ascii_lowercase + string.digits, k=16)
-        )
+        data_element_id = randomness.identifier(16)
 
         # Generate unique function name per XBlock to avoid conflicts
-        init_function_name = "FlashcardsInit_" + "".join(
-            random.choices(string.ascii_lowercase + string.digits, k=8)
-        )
+        init_function_name = "FlashcardsInit_" + randomness.identifier(8)
 
         # Obfuscated decoder with unique function name
-        obf_decoder = (
-            f"function {init_function_name}({var_names['runtime']},{var_names['elem']}){{"  # function header
-            f"var {var_names['tag']}=$('#{data_element_id}',{var_names['elem']});"  # locate script tag
-            f"if(!{var_names['tag']}.length)return;try{{"  # guard
-            f"var {var_names['payload']}=JSON.parse(atob({var_names['tag']}.text()));"  # decode
-            f"{var_names['tag']}.remove();"  # remove script
+        obf_decoder = CommonHandlers.build_decoder(
+            init_function_name,
+            data_element_id,
+            var_names,
             f"if({var_names['payload']}&&{var_names['payload']}.cards)"  # validate
-            f"GamesXBlockFlashcardsInit({var_names['runtime']},{var_names['elem']},{var_names['payload']}.cards);"  # init
-            f"}}catch({var_names['err']}){{console.warn('Decode failed');}}}}"
+            f"GamesXBlockFlashcardsInit({var_names['runtime']},{var_names['elem']},"  # init
+            f"{var_names['payload']}.cards,{var_names['payload']});",
         )
 
         template_context = {
@@ -78,24 +170,52 @@ class FlashcardsHandlers:
             "encoded_mapping": encoded_mapping,
             "obf_decoder": obf_decoder,
             "data_element_id": data_element_id,
+            # Variants are picked in the browser, so only a single-URL first image is preloaded
+            "preload_image": "" if first_card.get("term_srcset") else first_card.get("term_image", ""),
         }
 
-        template_str = pkg_resources.resource_string(
-            __name__, "../static/html/flashcards.html"
-        ).decode("utf8")
-        template = Template(template_str)
-        html = template.render(Context(template_context))
+        from django.template import Context  # pylint: disable=import-outside-toplevel
+
+        with stage("template_load"):
+            template = get_template(GAME_TYPE.FLASHCARDS)
+        with stage("template_render"):
+            html = template.render(Context(template_context))
+        record_size("html", html)
 
         frag = Fragment(html)
-        frag.add_css(
-            pkg_resources.resource_string(__name__, "../static/css/flashcards.css").decode(
-                "utf8"
-            )
-        )
-        frag.add_javascript(
-            pkg_resources.resource_string(
-                __name__, "../static/js/src/flashcards.js"
-            ).decode("utf8")
-        )
+        with stage("assets"):
+            add_game_assets(frag, xblock, GAME_TYPE.FLASHCARDS)
+        record_fragment_sizes(frag)
         frag.initialize_js(init_function_name)
         return frag
+
+    @staticmethod
+    def get_flashcards_window(xblock, data, suffix=""):
+        """Return the window of cards a cursor points at and the cursor for the one after it."""
+        cursor = data.get("cursor")
+        if not cursor:
+            return {"success": False, "error": "Missing cursor parameter"}
+        try:
+            position = FlashcardsHandlers.read_cursor(xblock, cursor)
+        except signing.BadSignature:
+            return {"success": False, "error": "Invalid cursor"}
+
+        cards = list(xblock.cards) if xblock.cards else []
+        if position["count"] != len(cards) or position.get("version") != xblock.cards_version:
+            return {"success": False, "error": "Cards have changed, reload the game"}
+
+        window_size = getattr(settings, "GAMESXBLOCK_FLASHCARDS_WINDOW_SIZE", 0) or len(cards)
+        offset = position["offset"]
+        end = min(offset + window_size, len(cards))
+        order = FlashcardsHandlers.deck_order(len(cards), position["seed"])
+        derivative_settings = get_derivative_settings()
+        return {
+            "success": True,
+            "cards": [FlashcardsHandlers.payload_card(cards[i], derivative_settings) for i in order[offset:end]],
+            "offset": offset,
+            "total": len(cards),
+            "cursor": (
+                FlashcardsHandlers.make_cursor(xblock, position["seed"], end, len(cards))
+                if end < len(cards) else None
+            ),
+        }
@@ -4,16 +4,15 @@ Matching game handler methods.
 This module contains handlers specific to the matching game type.
 """
 
-import base64
-import json
-import random
-import string
-
-import pkg_resources
+from django.conf import settings
 from xblock.core import Response
-from django.template import Context, Template
 from web_fragments.fragment import Fragment
-from ..constants import CONFIG, DEFAULT
+from ..assets import add_game_assets
+from ..constants import CONFIG, DEFAULT, GAME_TYPE
+from ..payload import encode_payload
+from ..randomness import RenderRandom, seeded_renders_enabled
+from ..template_registry import get_template
+from ..tracing import record_fragment_sizes, record_size, stage
 from .common import CommonHandlers
 
 
@@ -21,80 +20,145 @@ class MatchingHandlers:
     """Handlers specific to the matching game type."""
 
     @staticmethod
-    def student_view(xblock, context=None):
-        """Render the student view for the matching game."""
-        # Prepare cards
-        cards = list(xblock.cards) if xblock.cards else []
-        list_length = len(cards)
+    def lazy_pages_enabled(xblock):
+        """
+        Return whether only the first page is embedded and later pages are fetched on demand.
+
+        Controlled by the GAMESXBLOCK_MATCHING_LAZY_PAGES setting. Always off in
+        author preview, where handlers are not available.
+        """
+        if not getattr(settings, "GAMESXBLOCK_MATCHING_LAZY_PAGES", False):
+            return False
+        return xblock.get_mode() != "preview"
 
-        # Split cards into pages based on MATCHES_PER_PAGE
+    @staticmethod
+    def count_pages(cards):
+        """Return the number of pages needed for a deck."""
+        matches_per_page = CONFIG.MATCHES_PER_PAGE
+        return (len(cards) + matches_per_page - 1) // matches_per_page
+
+    @staticmethod
+    def build_pages(xblock, cards, first_page=0, page_count=None, randomness=None):
+        """
+        Build page data and answer key entries for consecutive pages of the deck.
+
+        Items are numbered across the whole deck (card i gets term index 2i and
+        definition index 2i + 1), so pages built separately share one index space.
+        Keys and shuffles come from randomness (a RenderRandom sized for these
+        pages if not given).
+
+        Returns:
+            Tuple (pages, matched_entries, offset): pages is a list of
+            {"left_items", "right_items"} dicts and matched_entries holds the
+            UUID-like key entry for every item index starting at offset.
+        """
         matches_per_page = CONFIG.MATCHES_PER_PAGE
-        pages = []
-        for i in range(0, len(cards), matches_per_page):
-            page_cards = cards[i:i + matches_per_page]
-            pages.append(page_cards)
+        start = first_page * matches_per_page
+        end = len(cards)
+        if page_count is not None:
+            end = min(end, start + page_count * matches_per_page)
+        offset = start * 2
 
         # Pre-generate all random keys in one batch (hex digits for maximum confusion)
-        total_items = len(cards) * 2
-        key_length = CONFIG.RANDOM_STRING_LENGTH
-        bits_needed = key_length * 4  # Each hex char = 4 bits
-        all_keys = [
-            format(random.getrandbits(bits_needed), f"0{key_length}x")
-            for _ in range(total_items)
-        ]
+        total_items = max(end - start, 0) * 2
+        randomness = randomness or RenderRandom(item_count=total_items, extra_bytes=0)
+        all_keys = randomness.key_hexes(total_items)
 
         # Pre-allocate array with None slots (will be filled with {key, index} objects)
         matched_entries = [None] * total_items
         all_pages_data = []
 
         # Process each page with unique incremental indices per item (term + definition distinct)
-        global_counter = 0
-        for _, page_cards in enumerate(pages):
+        for page_start in range(start, end, matches_per_page):
             left_items = []
             right_items = []
 
-            for card in page_cards:
+            for card_position in range(page_start, min(page_start + matches_per_page, end)):
+                card = cards[card_position]
+
                 # Generate term item
-                term_index = global_counter
-                term_key = all_keys[term_index]
-                term_text = card.get("term", "")
-                left_items.append({"text": term_text, "index": term_index})
-                global_counter += 1
+                term_index = card_position * 2
+                term_key = all_keys[term_index - offset]
+                left_items.append({"text": card.get("term", ""), "index": term_index})
 
                 # Generate definition item
-                def_index = global_counter
-                def_key = all_keys[def_index]
-                def_text = card.get("definition", "")
-                right_items.append({"text": def_text, "index": def_index})
-                global_counter += 1
+                def_index = term_index + 1
+                def_key = all_keys[def_index - offset]
+                right_items.append({"text": card.get("definition", ""), "index": def_index})
 
                 # Add bidirectional mapping entries as UUID-like strings for obfuscation
-                matched_entries[term_index] = CommonHandlers.format_as_uuid_like(
-                    term_key, def_index
-                )
-                matched_entries[def_index] = CommonHandlers.format_as_uuid_like(
-                    def_key, term_index
-                )
+                matched_entries[term_index - offset] = randomness.uuid_like(term_key, def_index)
+                matched_entries[def_index - offset] = randomness.uuid_like(def_key, term_index)
 
             # Shuffle left and right items per page if enabled
             if xblock.is_shuffled:
-                random.shuffle(left_items)
-                random.shuffle(right_items)
+                randomness.rng.shuffle(left_items)
+                randomness.rng.shuffle(right_items)
 
             all_pages_data.append(
                 {"left_items": left_items, "right_items": right_items}
             )
 
-        encryption_key = CommonHandlers.generate_encryption_key(xblock)
-        encrypted_hash = CommonHandlers.encrypt_data(matched_entries, encryption_key)
+        return all_pages_data, matched_entries, offset
 
-        # Include all pages data in payload; encrypted "key" now holds list of pairs
-        mapping_payload = {"key": encrypted_hash, "pages": all_pages_data}
-        encoded_mapping = base64.b64encode(
-            json.dumps(mapping_payload).encode()
-        ).decode()
+    @staticmethod
+    def build_payload(xblock, cards, randomness=None):
+        """
+        Shuffle the deck into pages and encrypt their answer key.
+
+        Returns:
+            Tuple (mapping_payload, all_pages_data, total_pages). In lazy mode
+            mapping_payload and all_pages_data hold only the first page.
+        """
+        total_pages = MatchingHandlers.count_pages(cards)
+        if randomness is None:
+            with stage("randomness"):
+                randomness = RenderRandom.for_render(xblock, item_count=len(cards) * 2)
+
+        if total_pages > 1 and MatchingHandlers.lazy_pages_enabled(xblock):
+            # Embed only the first page; later pages come from get_matching_page
+            with stage("shuffle"):
+                all_pages_data, matched_entries, _ = MatchingHandlers.build_pages(
+                    xblock, cards, 0, 1, randomness
+                )
+            encrypted_hash = CommonHandlers.encrypt_for_block(
+                xblock, matched_entries, randomness.deterministic
+            )
+            mapping_payload = {
+                "key": encrypted_hash,
+                "pages": all_pages_data,
+                "total_pages": total_pages,
+                "lazy": True,
+            }
+        else:
+            with stage("shuffle"):
+                all_pages_data, matched_entries, _ = MatchingHandlers.build_pages(
+                    xblock, cards, randomness=randomness
+                )
+            encrypted_hash = CommonHandlers.encrypt_for_block(
+                xblock, matched_entries, randomness.deterministic
+            )
+            # Include all pages data in payload; encrypted "key" now holds list of pairs
+            mapping_payload = {"key": encrypted_hash, "pages": all_pages_data}
+
+        return mapping_payload, all_pages_data, total_pages
+
+    @staticmethod
+    def student_view(xblock, context=None):
+        """Render the student view for the matching game."""
+        # Prepare cards
+        cards = list(xblock.cards) if xblock.cards else []
+        list_length = len(cards)
+        # All random material for this render comes from one entropy draw
+        with stage("randomness"):
+            randomness = RenderRandom.for_render(xblock, item_count=list_length * 2)
+        mapping_payload, all_pages_data, total_pages = MatchingHandlers.build_payload(
+            xblock, cards, randomness
+        )
 
-        total_pages = len(pages)
+        with stage("encode"):
+            encoded_mapping = encode_payload(mapping_payload)
+        record_size("encoded_mapping", encoded_mapping)
 
         template_context = {
             "title": getattr(xblock, "title", DEFAULT.MATCHING_TITLE),
@@ -105,32 +169,26 @@ class MatchingHandlers:
         }
 
         var_names = CommonHandlers.generate_unique_var_names(
-            ["runtime", "elem", "tag", "payload", "err"], min_len=1, max_len=3
+            ["runtime", "elem", "tag", "payload", "err"], min_len=1, max_len=3, randomness=randomness
         )
 
-        data_element_id = "".join(
-            random.choices(string.ascii_lowercase + string.digits, k=16)
-        )
+        data_element_id = randomness.identifier(16)
 
         # Generate unique function name per XBlock to avoid conflicts
-        init_function_name = "MatchingInit_" + "".join(
-            random.choices(string.ascii_lowercase + string.digits, k=8)
-        )
+        init_function_name = "MatchingInit_" + randomness.identifier(8)
 
         runtime = var_names["runtime"]
         elem = var_names["elem"]
         payload = var_names["payload"]
 
         # Build obfuscated decoder function; initializes JS via payload
-        obf_decoder = (
-            f"function {init_function_name}({var_names['runtime']},{var_names['elem']}){{"
-            f"var {var_names['tag']}=$('#{data_element_id}',{var_names['elem']});"
-            f"if(!{var_names['tag']}.length)return;try{{"
-            f"var {var_names['payload']}=JSON.parse(atob({var_names['tag']}.text()));"
-            f"{var_names['tag']}.remove();if({var_names['payload']}&&{var_names['payload']}.pages)"
-            f"GamesXBlockMatchingInit({runtime},{elem},{payload}.pages,{payload}.key);"
-            f"$('#obf_decoder_script',{var_names['elem']}).remove();"
-            f"}}catch({var_names['err']}){{console.warn('Decode failed');}}}}"
+        obf_decoder = CommonHandlers.build_decoder(
+            init_function_name,
+            data_element_id,
+            var_names,
+            f"if({payload}&&{payload}.pages)"
+            f"GamesXBlockMatchingInit({runtime},{elem},{payload}.pages,{payload}.key,{payload});"
+            f"$('#obf_decoder_script',{elem}).remove();",
         )
 
         template_context["encoded_mapping"] = encoded_mapping
@@ -138,33 +196,18 @@ class MatchingHandlers:
         template_context["data_element_id"] = data_element_id
         template_context["init_function_name"] = init_function_name
 
-        template_str = pkg_resources.resource_string(
-            __name__, "../static/html/matching.html"
-        ).decode("utf8")
-        template = Template(template_str)
-        html = template.render(Context(template_context))
+        from django.template import Context  # pylint: disable=import-outside-toplevel
+
+        with stage("template_load"):
+            template = get_template(GAME_TYPE.MATCHING)
+        with stage("template_render"):
+            html = template.render(Context(template_context))
+        record_size("html", html)
 
         frag = Fragment(html)
-        frag.add_css(
-            pkg_resources.resource_string(
-                __name__, "../static/css/matching.css"
-            ).decode("utf8")
-        )
-        frag.add_css(
-            pkg_resources.resource_string(
-                __name__, "../static/css/confetti.css"
-            ).decode("utf8")
-        )
-        frag.add_javascript(
-            pkg_resources.resource_string(
-                __name__, "../static/js/src/matching.js"
-            ).decode("utf8")
-        )
-        frag.add_javascript(
-            pkg_resources.resource_string(
-                __name__, "../static/js/src/confetti.js"
-            ).decode("utf8")
-        )
+        with stage("assets"):
+            add_game_assets(frag, xblock, GAME_TYPE.MATCHING)
+        record_fragment_sizes(frag)
         frag.initialize_js(init_function_name)
         return frag
 
@@ -176,16 +219,70 @@ class MatchingHandlers:
             if not matching_key:
                 return {"success": False, "error": "Missing matching_key parameter"}
 
-            encryption_key = CommonHandlers.generate_encryption_key(xblock)
-            key_mapping = CommonHandlers.decrypt_data(matching_key, encryption_key)
+            key_mapping = CommonHandlers.decrypt_for_block(xblock, matching_key)
 
             return {"success": True, "data": key_mapping, "mode": xblock.get_mode()}
         except Exception as e:  # pylint: disable=broad-exception-caught
             return {"success": False, "error": f"Failed to decrypt mapping: {str(e)}"}
 
+    @staticmethod
+    def get_matching_page(xblock, data, suffix=""):
+        """Return one page of the matching game with its own encrypted key slice."""
+        try:
+            page_number = int(data.get("page"))
+        except (TypeError, ValueError):
+            return {"success": False, "error": "Invalid page parameter"}
+
+        cards = list(xblock.cards) if xblock.cards else []
+        total_pages = MatchingHandlers.count_pages(cards)
+        if not 0 <= page_number < total_pages:
+            return {"success": False, "error": f"Page {page_number} out of range"}
+
+        with stage("randomness"):
+            randomness = RenderRandom.for_render(
+                xblock, "page", page_number, item_count=CONFIG.MATCHES_PER_PAGE * 2, extra_bytes=0
+            )
+        with stage("shuffle"):
+            pages, matched_entries, offset = MatchingHandlers.build_pages(
+                xblock, cards, page_number, 1, randomness
+            )
+        encrypted_hash = CommonHandlers.encrypt_for_block(
+            xblock, {"offset": offset, "entries": matched_entries}, randomness.deterministic
+        )
+        return {
+            "success": True,
+            "page": pages[0],
+            "page_number": page_number,
+            "total_pages": total_pages,
+            "key": encrypted_hash,
+        }
+
+    @staticmethod
+    def reshuffle_matching_game(xblock, data, suffix=""):
+        """
+        Return freshly shuffled pages and their encrypted key for "play again".
+
+        Same data as the payload embedded by student_view, without rendering the
+        template or the fragment, so the client can reuse the existing DOM.
+        """
+        cards = list(xblock.cards) if xblock.cards else []
+        if not cards:
+            return {"success": False, "error": "No cards to play"}
+
+        MatchingHandlers.advance_attempt(xblock)
+        mapping_payload, _, total_pages = MatchingHandlers.build_payload(xblock, cards)
+        return {"success": True, "total_pages": total_pages, **mapping_payload}
+
+    @staticmethod
+    def advance_attempt(xblock):
+        """Start a new attempt so that seeded renders produce a new shuffle."""
+        if seeded_renders_enabled():
+            xblock.attempt += 1
+
     @staticmethod
     def refresh_game(xblock, request, suffix=""):
         """Refresh the game view with new shuffled data."""
+        MatchingHandlers.advance_attempt(xblock)
         frag = MatchingHandlers.student_view(xblock, context=None)
 
         return Response(frag.content, content_type="text/html", charset="UTF-8")
@@ -0,0 +1,303 @@
+"""
+Image storage layouts, reference tracking and collection of unused images.
+
+By default uploads live under ``games/<block_id>/<md5>.<ext>`` (plus resized
+variants ``<md5>_w<width>.<format>``). Cards store image URLs, so an object is
+referenced when some scanned card has an image URL ending in the same
+``<md5>`` name; duplicated and pasted blocks keep the original's URLs.
+Images replaced or removed in save_settings stay in storage until they are
+collected here.
+
+With GAMESXBLOCK_IMAGE_LAYOUT set to ``"content"``, uploads are keyed by
+content alone, ``games/cas/<md5[:2]>/<md5>.<ext>``, so every block and course
+rerun using an image shares one object. Saving cards keeps a reference index
+in the same storage: an empty marker ``games/cas/refs/<md5>/<usage>`` per
+block usage referencing the image. A shared object is only collected when
+no scanned block references it and no marker from an unscanned usage remains.
+
+Uploads are deduplicated, so re-uploading an existing image does not change
+its modification time. To keep an upload from being collected before the
+author saves the cards using it, uploads leave a marker: the block's
+reference marker in the content layout, or ``games/<block_id>/pending/<md5>``
+when a block upload matches an existing object. Images with a marker newer
+than the collection's minimum age are kept.
+"""
+
+import hashlib
+import os
+import re
+from datetime import datetime, timezone
+from urllib.parse import unquote, urlparse
+
+from django.conf import settings
+
+from .constants import CARD_FIELD, IMAGE_LAYOUT, UPLOAD
+
+_VARIANT_SUFFIX_RE = re.compile(r"_w\d+$")
+
+
+def get_image_layout():
+    """Return the configured storage layout for new uploads (GAMESXBLOCK_IMAGE_LAYOUT)."""
+    layout = getattr(settings, "GAMESXBLOCK_IMAGE_LAYOUT", IMAGE_LAYOUT.BLOCK)
+    if layout not in IMAGE_LAYOUT.VALID:
+        raise ValueError(f"Unknown image layout '{layout}'. Valid: {', '.join(IMAGE_LAYOUT.VALID)}")
+    return layout
+
+
+def block_prefix(block_id):
+    """Return the storage directory holding a block's uploads."""
+    return f"{UPLOAD.PATH_PREFIX}/{block_id}"
+
+
+CONTENT_PREFIX = f"{UPLOAD.PATH_PREFIX}/{UPLOAD.CONTENT_DIR}"
+REFS_PREFIX = f"{CONTENT_PREFIX}/{UPLOAD.REFS_DIR}"
+
+
+def content_path(file_hash, ext):
+    """Return the shared storage path of an image in the content-addressed layout."""
+    return f"{CONTENT_PREFIX}/{file_hash[:2]}/{file_hash}.{ext}"
+
+
+def is_content_path(path_or_url):
+    """Return whether a storage path or URL points into the content-addressed layout."""
+    path = unquote(urlparse(path_or_url).path)
+    return path.startswith(CONTENT_PREFIX + "/") or f"/{CONTENT_PREFIX}/" in path
+
+
+def usage_marker(usage_id):
+    """Return the file name of a block usage's reference markers."""
+    return hashlib.sha256(str(usage_id).encode("utf-8")).hexdigest()[:32]
+
+
+def ref_marker_path(stem, usage_id):
+    """Return the path of the marker recording that a block usage references an image."""
+    return f"{REFS_PREFIX}/{stem}/{usage_marker(usage_id)}"
+
+
+def pending_marker_path(block_id, stem):
+    """Return the path of the marker recording a recent re-upload of an image to a block."""
+    return f"{block_prefix(block_id)}/{UPLOAD.PENDING_DIR}/{stem}"
+
+
+def touch_marker(storage, path):
+    """Write an empty marker, replacing any existing one so its modification time is now."""
+    # Imported lazily: the storage machinery is only needed by upload handlers
+    from django.core.files.base import ContentFile  # pylint: disable=import-outside-toplevel
+
+    storage.delete(path)
+    storage.save(path, ContentFile(b""))
+
+
+def image_stem(path_or_url):
+    """
+    Return the content name shared by an upload and its variants.
+
+    ``.../<md5>.png``, ``.../<md5>_w400.webp`` and their URLs all give ``<md5>``.
+    """
+    name = os.path.basename(unquote(urlparse(path_or_url).path))
+    return _VARIANT_SUFFIX_RE.sub("", name.split(".", 1)[0])
+
+
+def referenced_stems(card_lists):
+    """Return the image stems referenced by any card of any of the given card lists."""
+    stems = set()
+    for cards in card_lists:
+        for card in cards or []:
+            for field in (CARD_FIELD.TERM_IMAGE, CARD_FIELD.DEFINITION_IMAGE):
+                if card.get(field):
+                    stems.add(image_stem(card[field]))
+    return stems
+
+
+def content_stems(cards):
+    """Return the stems of the content-addressed images referenced by cards."""
+    return {
+        image_stem(card[field])
+        for card in cards or []
+        for field in (CARD_FIELD.TERM_IMAGE, CARD_FIELD.DEFINITION_IMAGE)
+        if card.get(field) and is_content_path(card[field])
+    }
+
+
+def update_refs(storage, usage_id, old_cards, new_cards):
+    """
+    Record which content-addressed images a block usage references after its cards change.
+
+    Markers are added for newly referenced images and removed for dropped ones.
+
+    Returns:
+        (added_stems, removed_stems)
+    """
+    # Imported lazily: the storage machinery is only needed when cards change
+    from django.core.files.base import ContentFile  # pylint: disable=import-outside-toplevel
+
+    old_stems, new_stems = content_stems(old_cards), content_stems(new_cards)
+    added, removed = sorted(new_stems - old_stems), sorted(old_stems - new_stems)
+    for stem in added:
+        marker = ref_marker_path(stem, usage_id)
+        if not storage.exists(marker):
+            storage.save(marker, ContentFile(b""))
+    for stem in removed:
+        storage.delete(ref_marker_path(stem, usage_id))
+    return added, removed
+
+
+def _listdir(storage, path):
+    """Return ``(dirs, files)`` under path, or empty lists if it does not exist."""
+    try:
+        return storage.listdir(path)
+    except FileNotFoundError:
+        return [], []
+
+
+def find_content_orphans(storage, usages, min_age=None, now=None):
+    """
+    Return shared images, and stale markers, that no block references any more.
+
+    Args:
+        usages: ``{usage_id: [cards, ...]}`` for every scanned block usage, with
+            every version of its cards that may still be served
+
+    An image is kept while any scanned card references it, a marker from a
+    usage outside the scan (e.g. a content library) remains, or, given
+    min_age, it or one of its markers is newer than min_age (an upload not
+    saved to cards yet). The remaining markers of an orphan belong to scanned
+    usages that dropped the image, so they are returned as stale, to be
+    deleted along with it.
+
+    Returns:
+        (orphan_paths, stale_marker_paths)
+    """
+    referenced = set()
+    for card_lists in usages.values():
+        referenced |= referenced_stems(card_lists)
+    scanned_markers = {usage_marker(usage_id) for usage_id in usages}
+    cutoff = (now or datetime.now(timezone.utc)) - min_age if min_age else None
+
+    orphans, stale_markers = [], []
+    shards, _ = _listdir(storage, CONTENT_PREFIX)
+    for shard in sorted(shards):
+        if shard == UPLOAD.REFS_DIR:
+            continue
+        _, files = _listdir(storage, f"{CONTENT_PREFIX}/{shard}")
+        for name in sorted(files):
+            path = f"{CONTENT_PREFIX}/{shard}/{name}"
+            stem = image_stem(path)
+            if stem in referenced or (cutoff and _modified_time(storage, path) > cutoff):
+                continue
+            _, markers = _listdir(storage, f"{REFS_PREFIX}/{stem}")
+            if any(marker not in scanned_markers for marker in markers):
+                continue
+            marker_paths = [f"{REFS_PREFIX}/{stem}/{marker}" for marker in markers]
+            if cutoff and any(_modified_time(storage, marker) > cutoff for marker in marker_paths):
+                continue
+            orphans.append(path)
+            stale_markers.extend(marker_paths)
+    return orphans, sorted(set(stale_markers))
+
+
+def list_block_images(storage, block_id):
+    """Return the storage paths of every object under a block's upload prefix."""
+    prefix = block_prefix(block_id)
+    _, files = _listdir(storage, prefix)
+    return [f"{prefix}/{name}" for name in files]
+
+
+def list_uploaded_images(storage):
+    """Return the storage paths of every upload and variant, in every block directory and the shared layout."""
+    paths = []
+    block_ids, _ = _listdir(storage, UPLOAD.PATH_PREFIX)
+    for block_id in sorted(block_ids):
+        if block_id != UPLOAD.CONTENT_DIR:
+            paths.extend(sorted(list_block_images(storage, block_id)))
+    shards, _ = _listdir(storage, CONTENT_PREFIX)
+    for shard in sorted(shards):
+        if shard != UPLOAD.REFS_DIR:
+            _, files = _listdir(storage, f"{CONTENT_PREFIX}/{shard}")
+            paths.extend(f"{CONTENT_PREFIX}/{shard}/{name}" for name in sorted(files))
+    return paths
+
+
+def find_orphans(storage, block_id, referenced, min_age=None, now=None):
+    """
+    Return the paths under a block's prefix whose images are not referenced.
+
+    Args:
+        referenced: Stems referenced by any scanned card, built with
+            referenced_stems over every version of every block's cards. A
+            duplicated or pasted block keeps the image URLs of the original,
+            under the original's block id, so other blocks' cards count too.
+
+    Given min_age (a timedelta), objects newer than it, or re-uploaded since
+    (a pending marker newer than it), are kept, since an author may have
+    uploaded them for cards that are not saved yet.
+
+    Returns:
+        (orphan_paths, stale_marker_paths), the stale markers being the
+        pending markers older than min_age, which no longer protect anything
+    """
+    cutoff = (now or datetime.now(timezone.utc)) - min_age if min_age else None
+    pending_prefix = f"{block_prefix(block_id)}/{UPLOAD.PENDING_DIR}"
+    _, pending = _listdir(storage, pending_prefix)
+    fresh, stale_markers = set(), []
+    for stem in sorted(pending):
+        path = f"{pending_prefix}/{stem}"
+        if cutoff and _modified_time(storage, path) > cutoff:
+            fresh.add(stem)
+        else:
+            stale_markers.append(path)
+
+    orphans = [
+        path
+        for path in list_block_images(storage, block_id)
+        if image_stem(path) not in referenced and image_stem(path) not in fresh
+    ]
+    if cutoff:
+        orphans = [path for path in orphans if _modified_time(storage, path) <= cutoff]
+    return orphans, stale_markers
+
+
+def _modified_time(storage, path):
+    """Return an object's modification time as an aware datetime."""
+    modified = storage.get_modified_time(path)
+    if modified.tzinfo is None:
+        modified = modified.replace(tzinfo=timezone.utc)
+    return modified
+
+
+def delete_paths(storage, paths, workers=UPLOAD.BATCH_WORKERS, dry_run=False, measure=True):
+    """
+    Delete storage objects concurrently on a bounded thread pool.
+
+    Deletes are issued without an ``exists`` check; Django storages treat
+    deleting a missing object as a no-op.
+
+    Args:
+        measure: Look up each object's size first to report reclaimed bytes
+        dry_run: Only measure; nothing is deleted
+
+    Returns:
+        ``{"deleted": [...], "failed": {path: error}, "bytes": total_size}``,
+        with deleted in input order.
+    """
+    from concurrent.futures import ThreadPoolExecutor  # pylint: disable=import-outside-toplevel
+
+    def remove(path):
+        size = storage.size(path) if measure or dry_run else 0
+        if not dry_run:
+            storage.delete(path)
+        return size
+
+    paths = list(dict.fromkeys(paths))
+    result = {"deleted": [], "failed": {}, "bytes": 0}
+    if not paths:
+        return result
+    with ThreadPoolExecutor(max_workers=min(workers, len(paths)), thread_name_prefix="gamesxblock-gc") as pool:
+        futures = [(path, pool.submit(remove, path)) for path in paths]
+    for path, future in futures:
+        try:
+            result["bytes"] += future.result()
+            result["deleted"].append(path)
+        except Exception as e:  # pylint: disable=broad-except
+            result["failed"][path] = str(e)
+    return result
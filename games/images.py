@@ -0,0 +1,182 @@
+"""
+Resized image variants for uploaded card images.
+
+Each raster upload stored at ``games/<block_id>/<md5>.<ext>`` can get
+variants named ``<md5>_w<width>.<format>`` next to it, one per configured
+width. They are generated with Pillow on a small background thread pool so
+the upload request does not wait for them, and are never wider than the
+original. Card payloads carry the variant URLs as a srcset string built from
+the image URL alone, so rendering never touches storage.
+
+Variants are opt-in through GAMESXBLOCK_IMAGE_DERIVATIVES and need the
+optional Pillow dependency (``pip install edx-games[images]``).
+"""
+
+import importlib.util
+import io
+import logging
+import re
+import threading
+
+from django.conf import settings
+
+from .constants import IMAGE_DERIVATIVES
+
+log = logging.getLogger(__name__)
+
+# Content-addressed image URLs (as written by upload_image) that may have variants
+_SOURCE_URL_RE = re.compile(
+    r"^(?P<stem>.*/[0-9a-f]{32})\.(?P<ext>" + "|".join(IMAGE_DERIVATIVES.SOURCE_EXTENSIONS) + r")$"
+)
+
+_pillow_available = None
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def pillow_available():
+    """Return whether Pillow can be imported, without importing it."""
+    global _pillow_available  # pylint: disable=global-statement
+    if _pillow_available is None:
+        _pillow_available = importlib.util.find_spec("PIL") is not None
+        if not _pillow_available:
+            log.warning("GAMESXBLOCK_IMAGE_DERIVATIVES is set but Pillow is not installed; skipping variants")
+    return _pillow_available
+
+
+def get_derivative_settings(configured=None):
+    """
+    Return the image variant settings, or None when variants are off.
+
+    GAMESXBLOCK_IMAGE_DERIVATIVES is True for the defaults or a dict overriding
+    them, e.g. ``{"widths": [320, 640], "format": "avif", "quality": 60}``.
+    A value given as configured is read instead of the setting.
+    """
+    if configured is None:
+        configured = getattr(settings, "GAMESXBLOCK_IMAGE_DERIVATIVES", None)
+    if not configured or not pillow_available():
+        return None
+    overrides = configured if isinstance(configured, dict) else {}
+    return {
+        "widths": tuple(sorted(overrides.get("widths", IMAGE_DERIVATIVES.WIDTHS))),
+        "format": overrides.get("format", IMAGE_DERIVATIVES.FORMAT).lower(),
+        "quality": overrides.get("quality", IMAGE_DERIVATIVES.QUALITY),
+        "workers": overrides.get("workers", IMAGE_DERIVATIVES.WORKERS),
+    }
+
+
+def is_derivative_source(path_or_url):
+    """Return whether an image path or URL was written by upload_image in a format that gets variants."""
+    return bool(_SOURCE_URL_RE.match(path_or_url or ""))
+
+
+def derivative_path(path, width, image_format):
+    """Return the storage path of the ``width`` variant of the image at path."""
+    stem = path.rsplit(".", 1)[0]
+    return f"{stem}_w{width}.{image_format}"
+
+
+def build_srcset(url, derivative_settings=None):
+    """
+    Return a srcset string of variant URLs for an uploaded image URL.
+
+    Returns an empty string when variants are off or the URL was not produced
+    by upload_image (external links, signed URLs with a query string, GIF/SVG).
+    """
+    derivative_settings = derivative_settings or get_derivative_settings()
+    match = _SOURCE_URL_RE.match(url or "")
+    if not derivative_settings or not match:
+        return ""
+    stem, image_format = match.group("stem"), derivative_settings["format"]
+    return ", ".join(f"{stem}_w{width}.{image_format} {width}w" for width in derivative_settings["widths"])
+
+
+def create_derivatives(storage, path, derivative_settings=None):
+    """
+    Write the configured variants of the image at path and return their paths.
+
+    The original is decoded once; each variant is resized from it (never
+    enlarged) and saved unless a variant with that name already exists.
+    Animated images are skipped.
+    """
+    # Imported lazily: Pillow is optional and only needed while generating variants
+    from django.core.files.base import ContentFile  # pylint: disable=import-outside-toplevel
+    from PIL import Image, ImageOps  # pylint: disable=import-outside-toplevel
+
+    derivative_settings = derivative_settings or get_derivative_settings()
+    if not derivative_settings:
+        return []
+    image_format = derivative_settings["format"]
+    targets = [(width, derivative_path(path, width, image_format)) for width in derivative_settings["widths"]]
+    targets = [(width, target) for width, target in targets if not storage.exists(target)]
+    if not targets:
+        return []
+
+    with storage.open(path, "rb") as source, Image.open(source) as opened:
+        if getattr(opened, "is_animated", False):
+            return []
+        # JPEG can decode straight to a smaller scale, which is much cheaper for large photos.
+        # Both sides are kept at least the largest width, as EXIF rotation may swap them.
+        largest = targets[-1][0]
+        opened.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(opened)
+        image.load()
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info or "A" in image.mode else "RGB")
+
+    created = []
+    for width, target in targets:
+        variant = image
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            variant = image.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+        buffer = io.BytesIO()
+        variant.save(buffer, format=image_format.upper(), quality=derivative_settings["quality"])
+        created.append(storage.save(target, ContentFile(buffer.getvalue())))
+    return created
+
+
+def get_derivative_executor(workers=IMAGE_DERIVATIVES.WORKERS):
+    """Return the process-wide thread pool generating variants, created on first use."""
+    global _executor  # pylint: disable=global-statement
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                from concurrent.futures import ThreadPoolExecutor  # pylint: disable=import-outside-toplevel
+
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gamesxblock-images")
+    return _executor
+
+
+def shutdown_derivative_executor(wait=True):
+    """Stop the variant thread pool; a new one is created on the next upload."""
+    global _executor  # pylint: disable=global-statement
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
+
+
+def _create_derivatives_logged(storage, path, derivative_settings):
+    """Run create_derivatives, logging instead of raising since nothing awaits the result."""
+    try:
+        return create_derivatives(storage, path, derivative_settings)
+    except Exception:  # pylint: disable=broad-except
+        log.exception("Failed to create image variants for %s", path)
+        return []
+
+
+def schedule_derivatives(storage, path):
+    """
+    Queue variant generation for an uploaded image.
+
+    Returns:
+        A Future resolving to the created paths, or None if variants are off or
+        the file type does not get variants.
+    """
+    derivative_settings = get_derivative_settings()
+    ext = path.rsplit(".", 1)[-1].lower()
+    if not derivative_settings or ext not in IMAGE_DERIVATIVES.SOURCE_EXTENSIONS:
+        return None
+    executor = get_derivative_executor(derivative_settings["workers"])
+    return executor.submit(_create_derivatives_logged, storage, path, derivative_settings)
@@ -0,0 +1,115 @@
+"""
+Delete uploaded game images that no games block references any more.
+
+Usage::
+
+    ./manage.py cms collect_game_images --dry-run
+    ./manage.py cms collect_game_images --min-age-hours 48 --workers 16
+
+Every course is scanned, in both its draft and published branches, because
+course reruns keep block ids and therefore share upload directories. An
+image is kept while any scanned card references it, since duplicated and
+pasted blocks keep the original block's image URLs. Only the directories of
+blocks found in the scan are examined, plus the shared
+content-addressed directory (GAMESXBLOCK_IMAGE_LAYOUT = "content"), whose
+images are kept while a block outside the scan still holds a reference marker.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from games.constants import UPLOAD
+from games.image_gc import delete_paths, find_content_orphans, find_orphans, referenced_stems
+from games.utils import get_gamesxblock_storage
+
+
+class Command(BaseCommand):
+    """Garbage-collect orphaned games images from GAMESXBLOCK_STORAGE."""
+
+    help = "Delete uploaded games images that are no longer referenced by any card."
+    total_files = total_bytes = failures = 0
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report orphaned images and their size without deleting them.",
+        )
+        parser.add_argument(
+            "--min-age-hours",
+            type=float,
+            default=24,
+            help="Keep images newer than this, which may belong to unsaved edits (default: 24; 0 disables).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=UPLOAD.BATCH_WORKERS,
+            help=f"Concurrent storage deletes (default: {UPLOAD.BATCH_WORKERS}).",
+        )
+
+    def iter_game_blocks(self):
+        """
+        Yield ``(block_id, usage_id, cards)`` for every version of every games block.
+
+        Requires the Open edX modulestore, so the command runs inside the LMS/CMS.
+        """
+        # pylint: disable=import-error,import-outside-toplevel
+        from xmodule.modulestore import ModuleStoreEnum
+        from xmodule.modulestore.django import modulestore
+
+        store = modulestore()
+        for course in store.get_course_summaries():
+            for branch in (ModuleStoreEnum.Branch.draft_preferred, ModuleStoreEnum.Branch.published_only):
+                with store.branch_setting(branch, course.id):
+                    for block in store.get_items(course.id, qualifiers={"category": "games"}):
+                        yield block.location.block_id, str(block.location), list(block.cards or [])
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        min_age = timedelta(hours=options["min_age_hours"]) if options["min_age_hours"] else None
+
+        block_ids = set()
+        usages = defaultdict(list)
+        for block_id, usage_id, cards in self.iter_game_blocks():
+            block_ids.add(block_id)
+            usages[usage_id].append(cards)
+        referenced = referenced_stems(cards for card_lists in usages.values() for cards in card_lists)
+
+        storage = get_gamesxblock_storage()
+        self.total_files = self.total_bytes = self.failures = 0
+        stale_markers = []
+        for block_id in sorted(block_ids):
+            orphans, stale_pending = find_orphans(storage, block_id, referenced, min_age=min_age)
+            self.delete(storage, orphans, options)
+            stale_markers.extend(stale_pending)
+
+        content_orphans, stale_refs = find_content_orphans(storage, usages, min_age=min_age)
+        self.delete(storage, content_orphans, options)
+        stale_markers.extend(stale_refs)
+        if stale_markers and not dry_run:
+            self.failures += len(delete_paths(storage, stale_markers, options["workers"], measure=False)["failed"])
+
+        verb = "Would reclaim" if dry_run else "Reclaimed"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {self.total_bytes} bytes from {self.total_files} orphaned images "
+                f"in {len(block_ids)} games blocks ({self.failures} failures)"
+            )
+        )
+
+    def delete(self, storage, paths, options):
+        """Delete (or, in a dry run, measure) paths and add them to the totals."""
+        if not paths:
+            return
+        dry_run = options["dry_run"]
+        result = delete_paths(storage, paths, options["workers"], dry_run=dry_run)
+        self.total_files += len(result["deleted"])
+        self.total_bytes += result["bytes"]
+        self.failures += len(result["failed"])
+        for path in result["deleted"]:
+            self.stdout.write(f"{'Would delete' if dry_run else 'Deleted'} {path}")
+        for path, error in result["failed"].items():
+            self.stderr.write(f"Failed to delete {path}: {error}")
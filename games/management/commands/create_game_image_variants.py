@@ -0,0 +1,102 @@
+"""
+Create the resized variants of games images uploaded before variants were on.
+
+Usage::
+
+    ./manage.py cms create_game_image_variants --dry-run
+    ./manage.py cms create_game_image_variants --widths 200 400 800 --format webp --workers 4
+
+Card payloads advertise variants from the image URL alone once
+GAMESXBLOCK_IMAGE_DERIVATIVES is on, so run this first: it walks every block
+directory and the shared content-addressed directory and writes the missing
+variants of each jpg/png/webp upload. Widths, format and quality default to
+GAMESXBLOCK_IMAGE_DERIVATIVES, or to the built-in defaults while it is off.
+Existing variants are kept, so the command can be re-run after a failure.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from games.constants import UPLOAD
+from games.image_gc import list_uploaded_images
+from games.images import create_derivatives, derivative_path, get_derivative_settings, is_derivative_source
+from games.utils import get_gamesxblock_storage
+
+
+class Command(BaseCommand):
+    """Backfill resized image variants in GAMESXBLOCK_STORAGE."""
+
+    help = "Create the missing resized variants of uploaded games images."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="List images missing variants without creating them.",
+        )
+        parser.add_argument("--widths", type=int, nargs="+", help="Variant widths in px (default: from settings).")
+        parser.add_argument("--format", help="Variant format, e.g. webp or avif (default: from settings).")
+        parser.add_argument("--quality", type=int, help="Encoder quality (default: from settings).")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=UPLOAD.BATCH_WORKERS,
+            help=f"Images processed concurrently (default: {UPLOAD.BATCH_WORKERS}).",
+        )
+
+    def get_settings(self, options):
+        """Return the variant settings: GAMESXBLOCK_IMAGE_DERIVATIVES, or the defaults, with the options applied."""
+        configured = getattr(settings, "GAMESXBLOCK_IMAGE_DERIVATIVES", None)
+        overrides = dict(configured) if isinstance(configured, dict) else {}
+        for key in ("widths", "format", "quality"):
+            if options[key] is not None:
+                overrides[key] = options[key]
+        derivative_settings = get_derivative_settings(overrides or True)
+        if not derivative_settings:
+            raise CommandError("Pillow is required to create image variants: pip install edx-games[images]")
+        return derivative_settings
+
+    def handle(self, *args, **options):
+        derivative_settings = self.get_settings(options)
+        storage = get_gamesxblock_storage()
+
+        def is_missing(path):
+            return any(
+                not storage.exists(derivative_path(path, width, derivative_settings["format"]))
+                for width in derivative_settings["widths"]
+            )
+
+        sources = [path for path in list_uploaded_images(storage) if is_derivative_source(path)]
+        missing = [path for path in sources if is_missing(path)]
+        if options["dry_run"]:
+            for path in missing:
+                self.stdout.write(f"Would create variants of {path}")
+            self.stdout.write(self.style.SUCCESS(f"{len(missing)} of {len(sources)} images are missing variants"))
+            return
+
+        created = failures = 0
+        if missing:
+            with ThreadPoolExecutor(
+                max_workers=min(options["workers"], len(missing)), thread_name_prefix="gamesxblock-images"
+            ) as pool:
+                futures = [
+                    (path, pool.submit(create_derivatives, storage, path, derivative_settings)) for path in missing
+                ]
+            for path, future in futures:
+                try:
+                    variants = future.result()
+                except Exception as e:  # pylint: disable=broad-except
+                    failures += 1
+                    self.stderr.write(f"Failed to create variants of {path}: {e}")
+                    continue
+                created += len(variants)
+                for variant in variants:
+                    self.stdout.write(f"Created {variant}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {created} variants for {len(missing) - failures} of {len(sources)} images "
+                f"({failures} failures)"
+            )
+        )
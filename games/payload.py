@@ -0,0 +1,85 @@
+"""
+Encoding of the game data embedded in student_view.
+
+Two formats are supported:
+
+- ``base64json``: ``base64(json)``, the original format (default).
+- ``deflate``: keys are shortened with COMPACT_KEYS, the JSON is
+  zlib/deflate-compressed and base64 encoded, then prefixed with
+  DEFLATE_PREFIX. Browsers decode it with ``DecompressionStream('deflate')``
+  (see ``static/js/src/payload.js``).
+
+The prefix contains a character outside the base64 alphabet, so the two
+formats cannot be confused and decoders accept both.
+"""
+
+import base64
+import json
+import zlib
+
+from django.conf import settings
+
+from .constants import PAYLOAD_ENCODING
+
+DEFLATE_PREFIX = "z1:"
+
+# Long payload keys and their compact form. Keep in sync with payload.js.
+COMPACT_KEYS = {
+    "cards": "c",
+    "salt": "s",
+    "id": "i",
+    "term": "t",
+    "definition": "d",
+    "term_image": "ti",
+    "definition_image": "di",
+    "term_srcset": "ts",
+    "definition_srcset": "ds",
+    "key": "k",
+    "pages": "p",
+    "left_items": "l",
+    "right_items": "r",
+    "text": "x",
+    "index": "n",
+    "total_pages": "tp",
+    "lazy": "z",
+}
+EXPANDED_KEYS = {short: full for full, short in COMPACT_KEYS.items()}
+
+
+def _rename_keys(value, names):
+    """Recursively rename dict keys found in names."""
+    if isinstance(value, dict):
+        return {names.get(key, key): _rename_keys(item, names) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_rename_keys(item, names) for item in value]
+    return value
+
+
+def get_payload_encoding():
+    """Return the configured payload encoding (GAMESXBLOCK_PAYLOAD_ENCODING)."""
+    encoding = getattr(settings, "GAMESXBLOCK_PAYLOAD_ENCODING", PAYLOAD_ENCODING.BASE64_JSON)
+    if encoding not in PAYLOAD_ENCODING.VALID:
+        raise ValueError(
+            f"Unknown payload encoding '{encoding}'. Valid: {', '.join(PAYLOAD_ENCODING.VALID)}"
+        )
+    return encoding
+
+
+def encode_payload(data, encoding=None):
+    """Encode game data for embedding in the page."""
+    encoding = encoding or get_payload_encoding()
+    if encoding == PAYLOAD_ENCODING.DEFLATE:
+        compact_json = json.dumps(
+            _rename_keys(data, COMPACT_KEYS), separators=(",", ":"), ensure_ascii=False
+        )
+        compressed = zlib.compress(compact_json.encode(), 9)
+        return DEFLATE_PREFIX + base64.b64encode(compressed).decode()
+    return base64.b64encode(json.dumps(data).encode()).decode()
+
+
+def decode_payload(text):
+    """Decode a payload produced by encode_payload in either format."""
+    if text.startswith(DEFLATE_PREFIX):
+        compact_json = zlib.decompress(base64.b64decode(text[len(DEFLATE_PREFIX):])).decode()
+        return _rename_keys(json.loads(compact_json), EXPANDED_KEYS)
+    return json.loads(base64.b64decode(text))
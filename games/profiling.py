@@ -0,0 +1,215 @@
+"""
+Sampled profiles of renders and handler calls.
+
+With GAMESXBLOCK_PROFILING set, a random fraction of student_view and
+handler calls runs under a profiler and the profile is written to a local
+directory as ``<handler>-<block_id>-<utc time>-<pid>.prof``, e.g.::
+
+    GAMESXBLOCK_PROFILING = {
+        "directory": "/var/tmp/gamesxblock-profiles",
+        "sample_rate": 0.01,
+    }
+
+cProfile output can be read with ``python -m pstats`` or snakeviz. Another
+profiler can be named by dotted path under ``"profiler"``. It needs the
+``enable()``/``disable()``/``dump_stats(path)`` methods of
+``cProfile.Profile``.
+
+Hard caps bound the cost:
+
+- one profiled call at a time per process; other calls run as normal
+- at most ``max_per_minute`` profiles per process
+- at most ``max_bytes`` of profiles in the directory; the oldest are deleted
+  to make room
+
+While the setting is off, ``profiled`` calls straight through.
+"""
+
+import functools
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from .constants import PROFILING
+
+log = logging.getLogger(__name__)
+
+_UNSET = object()
+_sampler = _UNSET
+_sampler_lock = threading.Lock()
+
+_UNSAFE_FILENAME_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def _cprofile():
+    """Return a new cProfile profiler."""
+    import cProfile  # pylint: disable=import-outside-toplevel
+
+    return cProfile.Profile()
+
+
+class ProfileSampler:
+    """
+    Decide which calls to profile and write their profiles within the caps.
+
+    Args:
+        directory: Where profiles are written; created on first use
+        sample_rate: Fraction of calls profiled, between 0 and 1
+        max_per_minute: Profiles written per process in any 60 seconds
+        max_bytes: Total size of the profiles kept in directory
+        profiler: "cprofile" or the dotted path of a profiler class
+    """
+
+    def __init__(
+        self,
+        directory,
+        sample_rate=PROFILING.SAMPLE_RATE,
+        max_per_minute=PROFILING.MAX_PER_MINUTE,
+        max_bytes=PROFILING.MAX_BYTES,
+        profiler=PROFILING.CPROFILE,
+    ):
+        if not directory:
+            raise ImproperlyConfigured("GAMESXBLOCK_PROFILING.directory missing")
+        if not 0 <= sample_rate <= 1:
+            raise ImproperlyConfigured("GAMESXBLOCK_PROFILING.sample_rate must be between 0 and 1")
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.max_per_minute = max_per_minute
+        self.max_bytes = max_bytes
+        if profiler == PROFILING.CPROFILE:
+            self.profiler_factory = _cprofile
+        else:
+            try:
+                self.profiler_factory = import_string(profiler)
+            except ImportError as e:
+                raise ImproperlyConfigured(f"Failed importing profiler {profiler}: {e}") from e
+        self._active = threading.Lock()
+        self._recent = deque()
+        self._recent_lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Return whether to profile the current call, reserving the profiler if so.
+
+        A True result must be followed by release().
+        """
+        if random.random() >= self.sample_rate:
+            return False
+        if not self._active.acquire(blocking=False):
+            return False
+        now = time.monotonic()
+        with self._recent_lock:
+            while self._recent and now - self._recent[0] >= 60:
+                self._recent.popleft()
+            if len(self._recent) < self.max_per_minute:
+                self._recent.append(now)
+                return True
+        self._active.release()
+        return False
+
+    def release(self):
+        """Free the profiler for the next sampled call."""
+        self._active.release()
+
+    def profile_path(self, operation, block_id):
+        """Return the file a profile of one call is written to."""
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S.%f")
+        name = f"{operation}-{_UNSAFE_FILENAME_RE.sub('_', str(block_id))}-{stamp}-{os.getpid()}.prof"
+        return os.path.join(self.directory, name)
+
+    def make_room(self):
+        """Delete the oldest profiles until the rest fit in max_bytes."""
+        entries = []
+        with os.scandir(self.directory) as found:
+            for entry in found:
+                if entry.name.endswith(".prof") and entry.is_file():
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def write(self, profiler, operation, block_id):
+        """Write a finished profile and keep the directory within max_bytes."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.profile_path(operation, block_id)
+        profiler.dump_stats(path)
+        self.make_room()
+        return path
+
+
+def get_profile_sampler():
+    """Return the process-wide sampler, or None while profiling is off."""
+    global _sampler  # pylint: disable=global-statement
+    if _sampler is _UNSET:
+        with _sampler_lock:
+            if _sampler is _UNSET:
+                profiling_settings = getattr(settings, "GAMESXBLOCK_PROFILING", None)
+                _sampler = ProfileSampler(**profiling_settings) if profiling_settings else None
+    return _sampler
+
+
+def reset_profile_sampler():
+    """Discard the sampler so it is rebuilt from current settings."""
+    global _sampler  # pylint: disable=global-statement
+    with _sampler_lock:
+        _sampler = _UNSET
+
+
+@receiver(setting_changed)
+def _reset_profile_sampler_on_change(setting, **kwargs):  # pylint: disable=unused-argument
+    """Rebuild the sampler when GAMESXBLOCK_PROFILING is overridden (e.g. override_settings)."""
+    if setting == "GAMESXBLOCK_PROFILING":
+        reset_profile_sampler()
+
+
+def profiled(func):
+    """
+    Profile a sampled fraction of calls of an XBlock view or handler method.
+
+    Apply it above ``@XBlock.json_handler``/``@XBlock.handler`` so that
+    request decoding and response encoding are included.
+    """
+
+    @functools.wraps(func)
+    def wrapper(xblock, *args, **kwargs):
+        sampler = get_profile_sampler()
+        if sampler is None or not sampler.acquire():
+            return func(xblock, *args, **kwargs)
+        try:
+            profiler = sampler.profiler_factory()
+            profiler.enable()
+        except Exception:  # pylint: disable=broad-except
+            # e.g. another profiler is already running in this thread
+            sampler.release()
+            log.exception("Failed to start profiling %s", func.__name__)
+            return func(xblock, *args, **kwargs)
+        try:
+            return func(xblock, *args, **kwargs)
+        finally:
+            profiler.disable()
+            try:
+                sampler.write(profiler, func.__name__, xblock.scope_ids.usage_id.block_id)
+            except Exception:  # pylint: disable=broad-except
+                log.exception("Failed to write the %s profile", func.__name__)
+            finally:
+                sampler.release()
+
+    return wrapper
@@ -0,0 +1,182 @@
+"""
+Per-render randomness for payload obfuscation.
+
+A render needs random answer-key material for every matching item, a few
+identifiers (data element id, init function name, JS variable names) and a
+shuffle. RenderRandom draws all of it with one ``secrets.token_bytes`` call
+sized for the render and slices the buffer as values are requested. Shuffles use a
+``random.Random`` seeded from the same buffer, so renders never touch the
+shared module-level generator.
+
+With GAMESXBLOCK_SEEDED_RENDERS enabled, the buffer is instead expanded from a
+seed derived from (user, block, attempt) and SECRET_KEY, so re-rendering the
+same attempt reproduces the same shuffle, identifiers and answer keys.
+"""
+
+import hashlib
+import random
+import secrets
+import string
+
+from django.conf import settings
+
+from .constants import CONFIG
+
+IDENTIFIER_ALPHABET = string.ascii_lowercase + string.digits
+
+# Bytes consumed per matching item: the key plus the filler groups of uuid_like
+KEY_BYTES = CONFIG.RANDOM_STRING_LENGTH // 2
+ITEM_BYTES = KEY_BYTES + 2 + 6
+SEED_BYTES = 16
+# Data element id (16), init function suffix (8) and variable name picks of one render
+IDENTIFIER_BYTES = 64
+VAR_NAME_BYTES = 4
+
+# Names that must never be generated as JS variable names
+RESERVED_NAMES = frozenset({
+    "do", "if", "in", "for", "let", "new", "try", "var", "case", "else", "enum",
+    "eval", "null", "this", "true", "void", "with", "await", "break", "catch",
+    "class", "const", "false", "super", "throw", "while", "yield", "delete",
+    "export", "import", "public", "return", "static", "switch", "typeof",
+})
+
+
+def _pool_name(index, min_len):
+    """Return the name at ``index`` in the pool of lowercase names starting at length min_len."""
+    length = min_len
+    while index >= 26 ** length:
+        index -= 26 ** length
+        length += 1
+    chars = []
+    for _ in range(length):
+        index, digit = divmod(index, 26)
+        chars.append(string.ascii_lowercase[digit])
+    return "".join(reversed(chars))
+
+
+def seeded_renders_enabled():
+    """Return whether renders derive their randomness from get_render_seed."""
+    return getattr(settings, "GAMESXBLOCK_SEEDED_RENDERS", False)
+
+
+def get_render_seed(xblock, *parts):
+    """
+    Return the render seed for the learner's current attempt, or None if seeded renders are off.
+
+    Extra parts (e.g. a page number) derive independent seeds within the attempt.
+    """
+    if not seeded_renders_enabled():
+        return None
+    # Imported lazily so that loading the XBlock does not pull in django.utils.crypto
+    from django.utils.crypto import salted_hmac  # pylint: disable=import-outside-toplevel
+
+    scope_ids = xblock.scope_ids
+    value = ":".join(str(part) for part in (scope_ids.user_id, scope_ids.usage_id, xblock.attempt, *parts))
+    return salted_hmac("games.randomness.render_seed", value, algorithm="sha256").digest()
+
+
+class RenderRandom:
+    """
+    Random material for one render, drawn from a single bulk entropy read.
+
+    Args:
+        item_count: Number of matching items whose key entries will be generated
+        extra_bytes: Additional bytes to reserve for identifiers or other uses
+        seed: Bytes to expand deterministically instead of reading system entropy
+    """
+
+    def __init__(self, item_count=0, extra_bytes=IDENTIFIER_BYTES, seed=None):
+        self.seed = seed
+        self.draws = 0
+        self._buffer = self._draw(SEED_BYTES + item_count * ITEM_BYTES + extra_bytes)
+        self._position = SEED_BYTES
+        self._rng = None
+
+    @classmethod
+    def for_render(cls, xblock, *parts, item_count=0, extra_bytes=IDENTIFIER_BYTES):
+        """Return a RenderRandom seeded for the learner's attempt when seeded renders are on."""
+        return cls(item_count, extra_bytes, seed=get_render_seed(xblock, *parts))
+
+    @property
+    def deterministic(self):
+        """Return whether this render is reproducible from its seed."""
+        return self.seed is not None
+
+    def _draw(self, size):
+        """Read ``size`` bytes of system entropy, or expand the seed in seeded mode."""
+        self.draws += 1
+        if self.seed is None:
+            return secrets.token_bytes(size)
+        return hashlib.shake_256(self.seed + self.draws.to_bytes(4, "big")).digest(size)
+
+    @property
+    def rng(self):
+        """Return a random.Random for this render, seeded from the entropy buffer on first use."""
+        if self._rng is None:
+            self._rng = random.Random(int.from_bytes(self._buffer[:SEED_BYTES], "big"))
+        return self._rng
+
+    def take(self, size):
+        """Return the next ``size`` bytes, topping the buffer up if the estimate was short."""
+        end = self._position + size
+        if end > len(self._buffer):
+            self._buffer = self._buffer[self._position:] + self._draw(max(size, 256))
+            self._position, end = 0, size
+        chunk = self._buffer[self._position:end]
+        self._position = end
+        return chunk
+
+    def key_hex(self):
+        """Return a random hex key of CONFIG.RANDOM_STRING_LENGTH characters."""
+        return self.take(KEY_BYTES).hex()
+
+    def key_hexes(self, count):
+        """Return ``count`` random hex keys cut from one slice of the buffer."""
+        width = KEY_BYTES * 2
+        block = self.take(count * KEY_BYTES).hex()
+        return [block[i:i + width] for i in range(0, len(block), width)]
+
+    def uuid_like(self, key_hex, index):
+        """
+        Format key and index as a UUID-like string (8-4-4-4-12).
+
+        Format: key-index_part1-rand4-index_part2-rand12
+        """
+        index_hex = format(index, "08x")
+        filler = self.take(8).hex()
+        return f"{key_hex}-{index_hex[:4]}-{filler[:4]}-{index_hex[4:]}-{filler[4:]}"
+
+    def identifier(self, length, alphabet=IDENTIFIER_ALPHABET):
+        """Return a random string of ``length`` characters from alphabet."""
+        return "".join(alphabet[byte % len(alphabet)] for byte in self.take(length))
+
+    def var_names(self, keys, min_len=3, max_len=6):
+        """
+        Return distinct random lowercase variable names, one per key.
+
+        Names are picked from the fixed pool of all names with min_len to
+        max_len letters using one slice of the entropy buffer, with one spare
+        pick per name. Duplicates and reserved words are replaced by the spare
+        picks or, failing that, by the first unused names of the pool, so no
+        retries are needed.
+        """
+        keys = list(keys)
+        pool_size = sum(26 ** length for length in range(min_len, max_len + 1))
+        picks = self.take(2 * len(keys) * VAR_NAME_BYTES)
+        names = []
+        for offset in range(0, len(picks), VAR_NAME_BYTES):
+            index = int.from_bytes(picks[offset:offset + VAR_NAME_BYTES], "big") % pool_size
+            name = _pool_name(index, min_len)
+            if name not in RESERVED_NAMES and name not in names:
+                names.append(name)
+                if len(names) == len(keys):
+                    return dict(zip(keys, names))
+        for index in range(pool_size):
+            name = _pool_name(index, min_len)
+            if name not in RESERVED_NAMES and name not in names:
+                names.append(name)
+                if len(names) == len(keys):
+                    return dict(zip(keys, names))
+        raise ValueError(
+            f"Cannot generate {len(keys)} unique variable names of {min_len}-{max_len} letters"
+        )
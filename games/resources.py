@@ -0,0 +1,31 @@
+"""
+Access to files packaged with the Games XBlock.
+
+Uses importlib.resources rather than pkg_resources, which is slow to import.
+"""
+
+import os
+from importlib import resources
+
+
+def resource_path(path):
+    """Return a Traversable for a file relative to the games package."""
+    return resources.files(__package__).joinpath(path)
+
+
+def read_bytes(path):
+    """Read a packaged file as bytes."""
+    return resource_path(path).read_bytes()
+
+
+def read_text(path):
+    """Read a packaged file as UTF-8 text."""
+    return resource_path(path).read_text(encoding="utf8")
+
+
+def get_mtime(path):
+    """Return the modification time of a packaged file, or None if it is not on disk."""
+    try:
+        return os.path.getmtime(resource_path(path))
+    except (OSError, TypeError):
+        return None
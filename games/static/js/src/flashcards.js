@@ -1,13 +1,22 @@
 /* Javascript for FlashcardsXBlock. */
 
-function GamesXBlockFlashcardsInit(runtime, element, cards) {
+function GamesXBlockFlashcardsInit(runtime, element, cards, options) {
     'use strict';
 
+    options = options || {};
+
     // State
     var currentIndex = 0;
-    var totalCards = cards.length;
+    var totalCards = options.total || cards.length;
     var flipClassName = 'flashcard-flipped';
 
+    // Windowed decks: only the first window is embedded; later windows are
+    // fetched with the signed cursor once the learner is half way through the
+    // cards loaded so far.
+    var cursor = options.cursor || null;
+    var windowLength = cards.length;
+    var windowRequest = null;
+
     // DOM references
     var $element = $(element);
     var $startScreen = $element.find('.flashcards-start-screen');
@@ -23,6 +32,52 @@ function GamesXBlockFlashcardsInit(runtime, element, cards) {
     var $prevBtn = $element.find('#flashcard-prev');
     var $nextBtn = $element.find('#flashcard-next');
 
+    // Pick the smallest resized variant covering the card at this screen's pixel density.
+    // Variants are never wider than the original, so their srcset width descriptors can
+    // overstate small images; choosing one URL keeps the image at its natural size.
+    function pickVariant(srcset) {
+        var needed = ($card.width() || 400) * (window.devicePixelRatio || 1);
+        var candidates = srcset.split(',').map(function(entry) {
+            var parts = entry.trim().split(/\s+/);
+            return {url: parts[0], width: parseInt(parts[1], 10) || 0};
+        }).sort(function(a, b) { return a.width - b.width; });
+        for (var i = 0; i < candidates.length; i++) {
+            if (candidates[i].width >= needed) return candidates[i].url;
+        }
+        return candidates[candidates.length - 1].url;
+    }
+
+    function showImage($image, url, srcset, alt) {
+        if (!url || url.trim() === '') {
+            $image.hide();
+            return;
+        }
+        // Fall back to the original while a variant is still being generated
+        $image.off('error').on('error', function() {
+            if ($image.attr('src') !== url) $image.attr('src', url);
+        });
+        $image.attr('src', srcset ? pickVariant(srcset) : url).attr('alt', alt).show();
+    }
+
+    // Fetch and decode a card's images off the main thread before they are shown
+    var warmedImages = {};
+    function warmImage(url, srcset) {
+        if (!url || url.trim() === '') return;
+        var src = srcset ? pickVariant(srcset) : url;
+        if (warmedImages[src]) return;
+        var image = new Image();
+        image.decoding = 'async';
+        image.src = src;
+        warmedImages[src] = image.decode ? image.decode().catch(function() {}) : true;
+    }
+
+    function warmCard(index) {
+        var card = cards[index];
+        if (!card) return;
+        warmImage(card.term_image, card.term_srcset);
+        warmImage(card.definition_image, card.definition_srcset);
+    }
+
     // Render current card
     function renderCard() {
         if (totalCards === 0) return;
@@ -36,19 +91,13 @@ function GamesXBlockFlashcardsInit(runtime, element, cards) {
         $('.flashcard-back-content').attr('title', card.definition || '');
 
 
-        // Handle term image
-        if (card.term_image && card.term_image.trim() !== '') {
-            $termImage.attr('src', card.term_image).attr('alt', card.term).show();
-        } else {
-            $termImage.hide();
-        }
+        // Handle term and definition images
+        showImage($termImage, card.term_image, card.term_srcset, card.term);
+        showImage($definitionImage, card.definition_image, card.definition_srcset, card.definition);
 
-        // Handle definition image
-        if (card.definition_image && card.definition_image.trim() !== '') {
-            $definitionImage.attr('src', card.definition_image).attr('alt', card.definition).show();
-        } else {
-            $definitionImage.hide();
-        }
+        // The back face is only seen after a flip and the next card after a click
+        warmImage(card.definition_image, card.definition_srcset);
+        warmCard(currentIndex + 1);
 
         // Update progress (1-indexed for display)
         $progress.text((currentIndex + 1));
@@ -61,6 +110,36 @@ function GamesXBlockFlashcardsInit(runtime, element, cards) {
         if ($card.hasClass(flipClassName)) {
             $card.removeClass(flipClassName);
         }
+
+        if (cursor && currentIndex >= cards.length - Math.ceil(windowLength / 2)) {
+            fetchWindow();
+        }
+    }
+
+    // Fetch the window of cards the cursor points at
+    function fetchWindow() {
+        if (!cursor) {
+            return $.Deferred().resolve().promise();
+        }
+        if (windowRequest) {
+            return windowRequest;
+        }
+        windowRequest = $.ajax({
+            type: 'POST',
+            url: runtime.handlerUrl(element, 'get_flashcards_window'),
+            data: JSON.stringify({ cursor: cursor }),
+            contentType: 'application/json',
+            dataType: 'json'
+        }).then(function(response) {
+            if (!response.success) {
+                return $.Deferred().reject(response.error).promise();
+            }
+            Array.prototype.push.apply(cards, response.cards);
+            cursor = response.cursor;
+        }).always(function() {
+            windowRequest = null;
+        });
+        return windowRequest;
     }
 
     // Flip card
@@ -81,10 +160,19 @@ function GamesXBlockFlashcardsInit(runtime, element, cards) {
     }
 
     function goToNext() {
-        if (currentIndex < totalCards - 1) {
+        if (currentIndex >= totalCards - 1) return;
+        if (currentIndex + 1 < cards.length) {
             currentIndex++;
             renderCard();
+            return;
         }
+        // Next window not loaded yet; advance once it arrives
+        fetchWindow().done(function() {
+            if (currentIndex + 1 < cards.length) {
+                currentIndex++;
+                renderCard();
+            }
+        });
     }
 
     // Start game
@@ -95,6 +183,9 @@ function GamesXBlockFlashcardsInit(runtime, element, cards) {
         renderCard();
     }
 
+    // Learners land on the start screen, so the first card can be decoded meanwhile
+    warmCard(0);
+
     // Event handlers
     $startButton.on('click', function(e) {
         e.preventDefault();
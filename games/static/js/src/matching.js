@@ -1,5 +1,5 @@
 /* Matching game isolated script */
-function GamesXBlockMatchingInit(runtime, element, pages, matching_key) {
+function GamesXBlockMatchingInit(runtime, element, pages, matching_key, options) {
     const container = $('.gamesxblock-matching', element);
     const has_timer = $(container).data('timed') === true || $(container).data('timed') === 'true';
 
@@ -14,7 +14,10 @@ function GamesXBlockMatchingInit(runtime, element, pages, matching_key) {
     let indexLink = null; // maps self_index -> partner_index
     let allPages = pages;
     let currentPageIndex = 0;
-    let totalPages = pages.length;
+    let totalPages = (options && options.total_pages) || pages.length;
+    // In lazy mode only the first page is embedded; the rest are fetched on demand
+    let lazyPages = !!(options && options.lazy);
+    let pageRequests = {};
 
     let timerInterval = null;
     let timeSeconds = 0;
@@ -47,39 +50,109 @@ function GamesXBlockMatchingInit(runtime, element, pages, matching_key) {
         }
     }
 
-    function refreshGame() {
-        MatchInit = null;
-        $.ajax({
-            type: 'GET',
-            url: runtime.handlerUrl(element, 'refresh_game'),
-            dataType: 'html',
-            success: function(html) {
-                $(element).html(html);
-                var decoderScript = $(element).find('#obf_decoder_script');
-
-                if (decoderScript.length) {
-                    var scriptContent = decoderScript.text();
-                    decoderScript.remove();
-                    try {
-                        eval(scriptContent);
-                        if (typeof MatchingInit === 'function') {
-                            MatchingInit(runtime, element);
-                        }
-                    } catch (err) {
-                        console.error('Failed to initialize game:', err);
-                        window.location.reload();
-                    }
-                } else {
-                    window.location.reload();
+    // Add decrypted key entries to indexLink. Entries are either a list starting
+    // at index 0 or {offset, entries} for a page fetched with get_matching_page.
+    function mergeKeyEntries(data) {
+        let entries = data;
+        let offset = 0;
+        if (data && !Array.isArray(data)) {
+            entries = data.entries;
+            offset = data.offset || 0;
+        }
+        if (!Array.isArray(entries)) return;
+        entries.forEach((entry, i) => {
+            if (entry && typeof entry === 'string') {
+                const parts = entry.split('-');
+                if (parts.length === 5) {
+                    const indexHex = parts[1] + parts[3];
+                    indexLink[offset + i] = parseInt(indexHex, 16);
                 }
-            },
-            error: function(xhr, status, error) {
-                console.error('Failed to refresh game:', error);
+            }
+        });
+    }
+
+    // Fetch a page and its key slice once; resolves when the page is playable.
+    function fetchPage(pageIndex) {
+        if (!lazyPages || allPages[pageIndex] || pageIndex >= totalPages) {
+            return $.Deferred().resolve().promise();
+        }
+        if (pageRequests[pageIndex]) {
+            return pageRequests[pageIndex];
+        }
+        const request = $.ajax({
+            type: 'POST',
+            url: runtime.handlerUrl(element, 'get_matching_page'),
+            data: JSON.stringify({ page: pageIndex }),
+            contentType: 'application/json',
+            dataType: 'json'
+        }).then(function(pageResponse) {
+            if (!pageResponse.success) {
+                return $.Deferred().reject(pageResponse.error).promise();
+            }
+            return $.ajax({
+                type: 'POST',
+                url: runtime.handlerUrl(element, 'start_matching_game'),
+                data: JSON.stringify({ matching_key: pageResponse.key }),
+                contentType: 'application/json',
+                dataType: 'json'
+            }).then(function(keyResponse) {
+                if (!keyResponse.success) {
+                    return $.Deferred().reject(keyResponse.error).promise();
+                }
+                mergeKeyEntries(keyResponse.data);
+                allPages[pageIndex] = pageResponse.page;
+            });
+        });
+        request.fail(function() {
+            delete pageRequests[pageIndex];
+        });
+        pageRequests[pageIndex] = request;
+        return request;
+    }
+
+    // Start a new round in place with freshly shuffled pages from the server
+    function playAgain() {
+        $.ajax({
+            type: 'POST',
+            url: runtime.handlerUrl(element, 'reshuffle_matching_game'),
+            data: JSON.stringify({}),
+            contentType: 'application/json',
+            dataType: 'json'
+        }).done(function(response) {
+            if (!response.success || !response.pages || !response.pages.length) {
                 window.location.reload();
+                return;
             }
+            resetGame(response);
+        }).fail(function(xhr, status, error) {
+            console.error('Failed to reshuffle game:', error);
+            window.location.reload();
         });
     }
 
+    function resetGame(data) {
+        stopTimer();
+        timeSeconds = 0;
+        $('#matching-timer', element).text(formatTime(timeSeconds));
+
+        matching_key = data.key;
+        allPages = data.pages;
+        totalPages = data.total_pages || data.pages.length;
+        lazyPages = !!data.lazy;
+        pageRequests = {};
+        indexLink = null;
+        showPage(0);
+
+        $('.matching-end-screen, .matching-new-best, .matching-new-prev-best, .matching-prev-best, .matching-non-timer', element)
+            .removeClass('active');
+        $('.confetti-container', element).empty();
+        $('.matching-grid', element).removeClass('active');
+        $('.matching-footer', element).removeClass('active');
+        $('.matching-loading-spinner', element).removeClass('active');
+        $('.matching-start-button', element).prop('disabled', false);
+        $('.matching-start-screen', element).show();
+    }
+
     $('.matching-start-button', element).off('click').on('click', function() {
         if (!matching_key) {
             alert('Error: Game not initialized properly');
@@ -100,26 +173,17 @@ function GamesXBlockMatchingInit(runtime, element, pages, matching_key) {
             dataType: 'json',
             success: function(response) {
                 if (response.success && response.data) {
-                    const entries = response.data;
                     indexLink = {};
-                    if (Array.isArray(entries)) {
-                        entries.forEach((entry, selfIdx) => {
-                            if (entry && typeof entry === 'string') {
-                                const parts = entry.split('-');
-                                if (parts.length === 5) {
-                                    const indexHex = parts[1] + parts[3];
-                                    indexLink[selfIdx] = parseInt(indexHex, 16);
-                                }
-                            }
-                        });
-                    }
+                    mergeKeyEntries(response.data);
+                    // Prefetch the next page while the learner plays this one
+                    fetchPage(currentPageIndex + 1);
 
                     // Set current page pair count
                     if (allPages && allPages[currentPageIndex]) {
                         currentPagePairs = allPages[currentPageIndex].left_items.length;
                     }
 
-                    $('.matching-start-screen', element).remove();
+                    $('.matching-start-screen', element).hide();
                     $('.matching-grid', element).addClass('active');
                     $('.matching-footer', element).addClass('active');
 
@@ -149,7 +213,7 @@ function GamesXBlockMatchingInit(runtime, element, pages, matching_key) {
                         currentPagePairs = allPages[currentPageIndex].left_items.length;
                     }
 
-                    $('.matching-start-screen', element).remove();
+                    $('.matching-start-screen', element).hide();
                     $('.matching-grid', element).addClass('active');
                     $('.matching-footer', element).addClass('active');
 
@@ -167,7 +231,7 @@ function GamesXBlockMatchingInit(runtime, element, pages, matching_key) {
     });
 
     $('.matching-end-button', element).off('click').on('click', function() {
-        refreshGame();
+        playAgain();
     });
 
     let firstSelection = null;
@@ -220,8 +284,18 @@ function GamesXBlockMatchingInit(runtime, element, pages, matching_key) {
     }
 
     function loadNextPage() {
-        // Increment page index
-        currentPageIndex += 1;
+        const nextPageIndex = currentPageIndex + 1;
+        fetchPage(nextPageIndex).done(function() {
+            showPage(nextPageIndex);
+            fetchPage(nextPageIndex + 1);
+        }).fail(function(error) {
+            console.error('Failed to load page:', error);
+            alert('Failed to load the next page. Please try again.');
+        });
+    }
+
+    function showPage(pageIndex) {
+        currentPageIndex = pageIndex;
         updateProgress();
 
         // Reset match count for new page
@@ -301,10 +375,8 @@ function GamesXBlockMatchingInit(runtime, element, pages, matching_key) {
         if (!has_timer) {
             $('.matching-end-screen', element).addClass('active');
             $('.matching-non-timer', element).addClass('active');
-            $('.matching-new-best', element).remove();
-            $('.matching-prev-best', element).remove();
-            $('.matching-grid', element).remove();
-            $('.matching-footer', element).remove();
+            $('.matching-grid', element).removeClass('active');
+            $('.matching-footer', element).removeClass('active');
             if (typeof GamesConfetti !== 'undefined') {
                 GamesConfetti.trigger($('.confetti-container', element), 20);
             }
@@ -314,12 +386,10 @@ function GamesXBlockMatchingInit(runtime, element, pages, matching_key) {
         // In preview mode, skip server call and show completion directly
         if (isPreviewMode) {
             $('.matching-end-screen', element).addClass('active');
-            $('.matching-grid', element).remove();
-            $('.matching-footer', element).remove();
+            $('.matching-grid', element).removeClass('active');
+            $('.matching-footer', element).removeClass('active');
             $('.matching-new-best', element).addClass('active');
-            $('.matching-prev-best', element).remove();
             $('#matching-current-result', element).text(formatTime(timeSeconds));
-            $('.matching-new-prev-best', element).remove();
 
             if (typeof GamesConfetti !== 'undefined') {
                 GamesConfetti.trigger($('.confetti-container', element), 20);
@@ -340,19 +410,17 @@ function GamesXBlockMatchingInit(runtime, element, pages, matching_key) {
                 // if prev_best_time is not null and new_time >= prev_best_time, no new record
 
                 $('.matching-end-screen', element).addClass('active');
-                $('.matching-grid', element).remove();
-                $('.matching-footer', element).remove();
+                $('.matching-grid', element).removeClass('active');
+                $('.matching-footer', element).removeClass('active');
                 const { new_time, prev_best_time } = response;
                 if (prev_best_time === null || new_time < prev_best_time) {
                     $('.matching-new-best', element).addClass('active');
-                    $('.matching-prev-best', element).remove();
                     $('#matching-current-result', element).text(formatTime(new_time));
                     if (prev_best_time !== null) {
                         $('.matching-new-prev-best', element).addClass('active');
                         $('#matching-prev-best', element).text(formatTime(prev_best_time));
                     }
                 } else {
-                    $('.matching-new-best', element).remove();
                     $('.matching-prev-best', element).addClass('active');
                     $('#matching-personal-best-time', element).text(formatTime(prev_best_time));
                     $('#matching-prev-current-best-time', element).text(formatTime(new_time));
@@ -0,0 +1,71 @@
+/* Decoder for game data embedded by the Games XBlock (see games/payload.py). */
+var GamesXBlockPayload = (function() {
+    'use strict';
+
+    var DEFLATE_PREFIX = 'z1:';
+
+    // Compact payload keys and their full names. Keep in sync with COMPACT_KEYS in payload.py.
+    var EXPANDED_KEYS = {
+        c: 'cards',
+        s: 'salt',
+        i: 'id',
+        t: 'term',
+        d: 'definition',
+        ti: 'term_image',
+        di: 'definition_image',
+        ts: 'term_srcset',
+        ds: 'definition_srcset',
+        k: 'key',
+        p: 'pages',
+        l: 'left_items',
+        r: 'right_items',
+        x: 'text',
+        n: 'index',
+        tp: 'total_pages',
+        z: 'lazy'
+    };
+
+    function expandKeys(value) {
+        if (Array.isArray(value)) {
+            return value.map(expandKeys);
+        }
+        if (value && typeof value === 'object') {
+            var expanded = {};
+            Object.keys(value).forEach(function(key) {
+                expanded[EXPANDED_KEYS[key] || key] = expandKeys(value[key]);
+            });
+            return expanded;
+        }
+        return value;
+    }
+
+    function base64ToBytes(text) {
+        var binary = atob(text);
+        var bytes = new Uint8Array(binary.length);
+        for (var i = 0; i < binary.length; i++) {
+            bytes[i] = binary.charCodeAt(i);
+        }
+        return bytes;
+    }
+
+    // Returns a Promise resolving to the decoded payload. Accepts both the
+    // deflate format and the original base64(json) format.
+    function decode(text) {
+        text = (text || '').trim();
+        if (text.indexOf(DEFLATE_PREFIX) !== 0) {
+            return Promise.resolve(JSON.parse(atob(text)));
+        }
+        if (typeof DecompressionStream === 'undefined') {
+            return Promise.reject(new Error('DecompressionStream is not supported'));
+        }
+        // Inflating through a stream keeps decompression off the main thread
+        var stream = new Blob([base64ToBytes(text.slice(DEFLATE_PREFIX.length))])
+            .stream()
+            .pipeThrough(new DecompressionStream('deflate'));
+        return new Response(stream).text().then(function(json) {
+            return expandKeys(JSON.parse(json));
+        });
+    }
+
+    return {decode: decode};
+}());
@@ -0,0 +1,97 @@
+"""
+Process-wide registry of compiled game templates.
+
+Each game template is read and compiled once per process and reused for every
+render. When auto-reload is enabled (defaults to ``settings.DEBUG``), the
+template file's modification time is checked on each lookup and the template is
+recompiled after it changes on disk.
+"""
+
+import threading
+
+from django.conf import settings
+
+from . import resources
+from .constants import GAME_TYPE
+
+TEMPLATE_PATHS = {
+    GAME_TYPE.FLASHCARDS: "static/html/flashcards.html",
+    GAME_TYPE.MATCHING: "static/html/matching.html",
+}
+
+
+class TemplateRegistry:
+    """Thread-safe cache of compiled templates keyed by game type."""
+
+    def __init__(self, paths):
+        self._paths = dict(paths)
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def auto_reload_enabled():
+        """Return whether templates should be recompiled when their file changes."""
+        return getattr(settings, "GAMESXBLOCK_TEMPLATE_AUTO_RELOAD", settings.DEBUG)
+
+    @staticmethod
+    def _read_source(path):
+        """Read template source from the package."""
+        return resources.read_text(path)
+
+    @staticmethod
+    def _get_mtime(path):
+        """Return the modification time of a packaged file, or None if unknown."""
+        return resources.get_mtime(path)
+
+    def get(self, game_type):
+        """
+        Return the compiled template for a game type.
+
+        Raises:
+            ValueError: If no template is registered for the game type.
+        """
+        try:
+            path = self._paths[game_type]
+        except KeyError as e:
+            raise ValueError(f"No template registered for game type '{game_type}'") from e
+
+        mtime = self._get_mtime(path) if self.auto_reload_enabled() else None
+        with self._lock:
+            entry = self._entries.get(game_type)
+            if entry is not None and (mtime is None or entry[1] == mtime):
+                self.hits += 1
+                return entry[0]
+
+            # Imported lazily so that loading the XBlock does not pull in the template engine
+            from django.template import Template  # pylint: disable=import-outside-toplevel
+
+            self.misses += 1
+            template = Template(self._read_source(path))
+            self._entries[game_type] = (template, mtime)
+            return template
+
+    def stats(self):
+        """Return hit/miss counters and the number of compiled templates."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+            }
+
+    def clear(self):
+        """Drop all compiled templates and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+registry = TemplateRegistry(TEMPLATE_PATHS)
+
+
+def get_template(game_type):
+    """Return the compiled template for a game type from the shared registry."""
+    return registry.get(game_type)
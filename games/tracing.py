@@ -0,0 +1,366 @@
+"""
+Stage timing and output sizes for renders and handler calls.
+
+A handler call opens a trace (see ``traced``) and the code it runs marks its
+stages with ``stage``, e.g.::
+
+    with stage("encrypt"):
+        token = cipher.encrypt(plaintext)
+
+and reports the size of what it produces with ``record_size``. Handlers'
+response bodies are measured as ``"response"``. When the call returns, the
+trace hands the duration of every stage, plus the whole call as stage
+``"total"``, and every size to the configured sink. Each record is tagged
+with the block id, game type and deck size.
+
+Tracing is off unless GAMESXBLOCK_TRACING names a sink:
+
+- ``"logging"``: one log line per call on the ``games.tracing`` logger
+- ``"statsd"``: statsd timers over UDP, one packet per call, e.g.
+  ``{"sink": "statsd", "host": "127.0.0.1", "port": 8125, "prefix": "gamesxblock"}``
+- ``"memory"``: kept in a list, for tests and ad-hoc debugging
+- a dotted path to a TraceSink subclass, built with the remaining keys
+
+GAMESXBLOCK_SIZE_BUDGETS caps sizes, in bytes, by name (``"html"``) or by
+handler and name (``"get_settings.response"``). A budget is a number or
+``{"base": ..., "per_card": ...}`` to scale with the deck. Sizes over budget
+are logged as warnings, and sent to the sink with their budget.
+
+While neither is set, ``traced`` calls straight through, and ``stage`` and
+``record_size`` only check a context variable.
+"""
+
+import contextvars
+import functools
+import logging
+import threading
+import time
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from .constants import TRACING
+
+log = logging.getLogger(__name__)
+
+_current_trace = contextvars.ContextVar("gamesxblock_trace", default=None)
+_NO_STAGE = nullcontext()
+
+_UNSET = object()
+_config = _UNSET
+_config_lock = threading.Lock()
+
+
+class TraceSink:
+    """
+    Interface for destinations of stage timings and sizes.
+
+    ``emit`` receives the records of one call. Each is a dict with
+    ``operation``, ``stage``, ``block_id``, ``game_type`` and ``deck_size``,
+    plus either ``duration_ms`` or, for sizes, ``bytes`` (and ``budget``
+    when the size is over budget). It runs on the request thread, so it must
+    be quick.
+    """
+
+    def emit(self, timings):
+        """Record the stage timings and sizes of one call."""
+        raise NotImplementedError
+
+
+def _format_value(timing):
+    """Return a record's value for log lines."""
+    if "bytes" in timing:
+        return f"{timing['bytes']}B"
+    return f"{timing['duration_ms']:.3f}ms"
+
+
+class LoggingSink(TraceSink):
+    """Log one line per call with the duration of each stage and each size."""
+
+    def __init__(self, logger=__name__, level=logging.INFO):
+        self.logger = logging.getLogger(logger)
+        self.level = logging.getLevelName(level) if isinstance(level, str) else level
+
+    def emit(self, timings):
+        first = timings[0]
+        self.logger.log(
+            self.level,
+            "games %s block=%s game_type=%s deck_size=%s %s",
+            first["operation"],
+            first["block_id"],
+            first["game_type"],
+            first["deck_size"],
+            " ".join(f"{timing['stage']}={_format_value(timing)}" for timing in timings),
+        )
+
+
+class StatsdSink(TraceSink):
+    """
+    Send statsd metrics over UDP: timers ``<prefix>.<operation>.<stage>``,
+    size histograms ``<prefix>.<operation>.<name>_bytes`` and, for sizes over
+    budget, counters ``<prefix>.<operation>.<name>_over_budget``.
+
+    With tags on, metrics carry DogStatsD-style tags
+    (``|#block_id:...,game_type:...,deck_size:...``); turn them off for plain
+    statsd servers. Send errors are dropped, as UDP metrics are best effort.
+    """
+
+    def __init__(
+        self, host=TRACING.STATSD_HOST, port=TRACING.STATSD_PORT, prefix=TRACING.STATSD_PREFIX, tags=True
+    ):
+        import socket  # pylint: disable=import-outside-toplevel
+
+        self.address = (host, port)
+        self.prefix = prefix
+        self.tags = tags
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.setblocking(False)
+
+    def format(self, timing):
+        """Return the statsd lines of one record."""
+        name = f"{self.prefix}.{timing['operation']}.{timing['stage']}"
+        if "bytes" in timing:
+            lines = [f"{name}_bytes:{timing['bytes']}|h"]
+            if "budget" in timing:
+                lines.append(f"{name}_over_budget:1|c")
+        else:
+            lines = [f"{name}:{timing['duration_ms']:.3f}|ms"]
+        if self.tags:
+            tags = (
+                f"|#block_id:{timing['block_id']},game_type:{timing['game_type']},"
+                f"deck_size:{timing['deck_size']}"
+            )
+            lines = [line + tags for line in lines]
+        return "\n".join(lines)
+
+    def emit(self, timings):
+        packet = "\n".join(self.format(timing) for timing in timings).encode("utf-8")
+        try:
+            self._socket.sendto(packet, self.address)
+        except OSError:
+            pass
+
+
+class MemorySink(TraceSink):
+    """Keep every timing in ``timings``."""
+
+    def __init__(self):
+        self.timings = []
+        self._lock = threading.Lock()
+
+    def emit(self, timings):
+        with self._lock:
+            self.timings.extend(timings)
+
+    def stages(self, operation=None):
+        """Return the timed stage names, optionally only those of one operation."""
+        with self._lock:
+            return [
+                t["stage"] for t in self.timings
+                if "duration_ms" in t and (operation is None or t["operation"] == operation)
+            ]
+
+    def sizes(self, operation=None):
+        """Return ``{name: bytes}`` of the recorded sizes, optionally only those of one operation."""
+        with self._lock:
+            return {
+                t["stage"]: t["bytes"] for t in self.timings
+                if "bytes" in t and (operation is None or t["operation"] == operation)
+            }
+
+    def clear(self):
+        """Forget the recorded timings."""
+        with self._lock:
+            self.timings.clear()
+
+
+SINKS = {TRACING.LOGGING: LoggingSink, TRACING.STATSD: StatsdSink, TRACING.MEMORY: MemorySink}
+
+
+def _build_sink(tracing_settings):
+    """Instantiate the sink described by GAMESXBLOCK_TRACING."""
+    if isinstance(tracing_settings, str):
+        tracing_settings = {"sink": tracing_settings}
+    options = dict(tracing_settings)
+    sink_name = options.pop("sink", None)
+    if not sink_name:
+        raise ImproperlyConfigured("GAMESXBLOCK_TRACING.sink missing")
+    try:
+        sink_class = SINKS.get(sink_name) or import_string(sink_name)
+    except ImportError as e:
+        raise ImproperlyConfigured(
+            f"Unknown trace sink '{sink_name}'. Valid: {', '.join(TRACING.VALID)} or a dotted path"
+        ) from e
+    return sink_class(**options)
+
+
+def _get_config():
+    """Return ``(sink, budgets)`` read once from settings, or None while both are off."""
+    global _config  # pylint: disable=global-statement
+    if _config is _UNSET:
+        with _config_lock:
+            if _config is _UNSET:
+                tracing_settings = getattr(settings, "GAMESXBLOCK_TRACING", None)
+                sink = _build_sink(tracing_settings) if tracing_settings else None
+                budgets = getattr(settings, "GAMESXBLOCK_SIZE_BUDGETS", None) or None
+                _config = (sink, budgets) if sink or budgets else None
+    return _config
+
+
+def get_trace_sink():
+    """Return the process-wide trace sink, or None while tracing is off."""
+    config = _get_config()
+    return config[0] if config else None
+
+
+def get_size_budgets():
+    """Return the GAMESXBLOCK_SIZE_BUDGETS dict, or None when no budgets are set."""
+    config = _get_config()
+    return config[1] if config else None
+
+
+def size_budget(budgets, operation, name, deck_size):
+    """Return the byte budget of a size for a deck, or None if it has none."""
+    budget = budgets.get(f"{operation}.{name}", budgets.get(name))
+    if isinstance(budget, dict):
+        return budget.get("base", 0) + budget.get("per_card", 0) * deck_size
+    return budget
+
+
+def reset_trace_sink():
+    """Discard the trace sink and budgets so they are rebuilt from current settings."""
+    global _config  # pylint: disable=global-statement
+    with _config_lock:
+        _config = _UNSET
+
+
+@receiver(setting_changed)
+def _reset_trace_sink_on_change(setting, **kwargs):  # pylint: disable=unused-argument
+    """Rebuild the sink when GAMESXBLOCK_TRACING or the budgets are overridden (e.g. override_settings)."""
+    if setting in ("GAMESXBLOCK_TRACING", "GAMESXBLOCK_SIZE_BUDGETS"):
+        reset_trace_sink()
+
+
+class _Stage:
+    """Time one stage of the current trace."""
+
+    __slots__ = ("trace", "name", "start")
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.trace.add(self.name, time.perf_counter() - self.start)
+
+
+class _Trace:
+    """Collect the stage timings and sizes of one call and emit them when it ends."""
+
+    def __init__(self, sink, budgets, operation, xblock):
+        self.sink = sink
+        self.budgets = budgets
+        self.tags = {
+            "operation": operation,
+            "block_id": str(xblock.scope_ids.usage_id.block_id),
+            "game_type": getattr(xblock, "game_type", None),
+            "deck_size": len(getattr(xblock, "cards", None) or []),
+        }
+        self.timings = []
+
+    def add(self, name, seconds):
+        """Record the duration of a stage."""
+        self.timings.append({**self.tags, "stage": name, "duration_ms": seconds * 1000})
+
+    def add_size(self, name, size):
+        """Record a size in bytes, warning if it is over its budget."""
+        record = {**self.tags, "stage": name, "bytes": size}
+        budget = self.budgets and size_budget(self.budgets, self.tags["operation"], name, self.tags["deck_size"])
+        if budget and size > budget:
+            record["budget"] = budget
+            log.warning(
+                "games %s %s is %d bytes, over its %d byte budget (block=%s, game_type=%s, deck_size=%d)",
+                self.tags["operation"], name, size, budget,
+                self.tags["block_id"], self.tags["game_type"], self.tags["deck_size"],
+            )
+        self.timings.append(record)
+
+    def emit(self):
+        """Hand the collected records to the sink; sink errors never fail the call."""
+        if self.sink is None:
+            return
+        try:
+            self.sink.emit(self.timings)
+        except Exception:  # pylint: disable=broad-except
+            log.exception("Trace sink %r failed", self.sink)
+
+
+def stage(name):
+    """Return a context manager timing a stage of the current call (a no-op outside traces)."""
+    trace = _current_trace.get()
+    if trace is None:
+        return _NO_STAGE
+    return _Stage(trace, name)
+
+
+def record_size(name, data):
+    """Record the size of text, bytes or a byte count the current call produced (a no-op outside traces)."""
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    trace.add_size(name, data if isinstance(data, int) else len(data))
+
+
+def record_fragment_sizes(frag):
+    """Record the CSS and JS inlined into a fragment as ``inline_css`` and ``inline_js``."""
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    for name, mimetype in (("inline_css", "text/css"), ("inline_js", "application/javascript")):
+        trace.add_size(name, sum(
+            len(resource.data.encode("utf-8")) for resource in frag.resources
+            if resource.kind == "text" and resource.mimetype == mimetype
+        ))
+
+
+def traced(func):
+    """
+    Trace calls of an XBlock view or handler method, named after the method.
+
+    Stages and sizes recorded while it runs are reported with it, as is the
+    size of a returned response body. Apply it above
+    ``@XBlock.json_handler``/``@XBlock.handler`` so that the response is JSON
+    encoded within the trace.
+    """
+
+    @functools.wraps(func)
+    def wrapper(xblock, *args, **kwargs):
+        config = _get_config()
+        if config is None:
+            return func(xblock, *args, **kwargs)
+        trace = _Trace(*config, func.__name__, xblock)
+        token = _current_trace.set(trace)
+        start = time.perf_counter()
+        try:
+            result = func(xblock, *args, **kwargs)
+            body = getattr(result, "body", None)
+            if isinstance(body, bytes):
+                trace.add_size("response", len(body))
+            return result
+        finally:
+            trace.add("total", time.perf_counter() - start)
+            _current_trace.reset(token)
+            trace.emit()
+
+    return wrapper
@@ -2,26 +2,56 @@
 Utility methods for xblock
 """
 
+import hashlib
+import json
 import logging
+import threading
+import time
+from collections import OrderedDict
 
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
-from django.core.files.storage import default_storage
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 from django.utils.module_loading import import_string
 
 log = logging.getLogger(__name__)
 
 
+_storage_cache = {}
+_storage_cache_lock = threading.Lock()
+
+
 def get_gamesxblock_storage():
     """
     Returns storage for gamesxblock assets.
 
     If GAMESXBLOCK_STORAGE is not defined for S3, returns default_storage.
+
+    A configured storage is built once per distinct GAMESXBLOCK_STORAGE value
+    and shared by all handler calls in the process, so backends such as S3
+    reuse their clients and connection pools. The cache is cleared when the
+    setting changes (Django's setting_changed signal) or by reset_storage_cache.
     """
     storage_settings = getattr(settings, "GAMESXBLOCK_STORAGE", None)
     if not storage_settings:
+        # Imported lazily: the storage machinery is only needed by upload/delete handlers
+        from django.core.files.storage import default_storage  # pylint: disable=import-outside-toplevel
+
         return default_storage
 
+    fingerprint = json.dumps(storage_settings, sort_keys=True, default=repr)
+    storage = _storage_cache.get(fingerprint)
+    if storage is None:
+        with _storage_cache_lock:
+            storage = _storage_cache.get(fingerprint)
+            if storage is None:
+                storage = _storage_cache[fingerprint] = _build_storage(storage_settings)
+    return storage
+
+
+def _build_storage(storage_settings):
+    """Import and instantiate the storage class described by GAMESXBLOCK_STORAGE."""
     storage_class = storage_settings.get("storage_class")
     storage_kwargs = storage_settings.get("settings", {}) or {}
 
@@ -43,9 +73,112 @@ def get_gamesxblock_storage():
         ) from e
 
 
+def reset_storage_cache():
+    """Discard cached storage instances so the next call rebuilds them from settings."""
+    with _storage_cache_lock:
+        _storage_cache.clear()
+
+
+@receiver(setting_changed)
+def _reset_storage_cache_on_change(setting, **kwargs):  # pylint: disable=unused-argument
+    """Drop cached storage when GAMESXBLOCK_STORAGE is overridden (e.g. override_settings)."""
+    if setting == "GAMESXBLOCK_STORAGE":
+        reset_storage_cache()
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an uploaded file exceeds the configured size limit."""
+
+
+def hash_file(file_obj, max_size=None, chunk_size=64 * 1024):
+    """
+    Return ``(md5_hexdigest, size)`` of a file, read in chunks from its current position.
+
+    The file is rewound to where reading started so it can be streamed again.
+
+    Raises:
+        UploadTooLargeError: As soon as more than max_size bytes have been read.
+    """
+    start = file_obj.tell()
+    digest = hashlib.md5()
+    size = 0
+    for chunk in iter(lambda: file_obj.read(chunk_size), b""):
+        size += len(chunk)
+        if max_size is not None and size > max_size:
+            raise UploadTooLargeError(f"File is larger than the {max_size} byte limit")
+        digest.update(chunk)
+    file_obj.seek(start)
+    return digest.hexdigest(), size
+
+
 def delete_image(storage, key: str):
     """Delete an image from storage if it exists."""
     if storage.exists(key):
         storage.delete(key)
         return True
     return False
+
+
+class LRUCache:
+    """
+    Thread-safe, size-bounded LRU cache with optional time-based expiry.
+
+    A max_size of 0 disables caching: every lookup calls the factory.
+    """
+
+    def __init__(self, max_size=128, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_create(self, key, factory):
+        """Return the cached value for key, creating it with factory() on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+                self.evictions += 1
+            self.misses += 1
+
+        # Build outside the lock so a slow factory does not block other keys
+        value = factory()
+        if self.max_size <= 0:
+            return value
+
+        expires_at = now + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def stats(self):
+        """Return hit/miss/eviction counters and current size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._data),
+                "max_size": self.max_size,
+            }
+
+    def clear(self):
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
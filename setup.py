@@ -30,6 +30,8 @@ setup(
     packages=[
         "games",
         "games.handlers",
+        "games.management",
+        "games.management.commands",
     ],
     install_requires=[
         "XBlock>=1.2.0",
@@ -39,6 +41,10 @@ setup(
         "edx-toggles==5.4.1",
         "cryptography>=3.4.8",
     ],
+    extras_require={
+        # Resized image variants (GAMESXBLOCK_IMAGE_DERIVATIVES)
+        "images": ["Pillow>=9.1.0"],
+    },
     entry_points={
         "xblock.v1": [
             "games = games:GamesXBlock",
@@ -1,17 +1,33 @@
 """
 Tests for common handlers.
 """
+import io
 import json
 import hashlib
+import os
+import random
+import tempfile
+import time
+from datetime import timedelta
 from unittest.mock import Mock, patch, MagicMock
-from django.test import TestCase
+from django.core.files.storage import FileSystemStorage
+from django.test import TestCase, override_settings
 from faker import Faker
+from webob import Request
+from webob.multidict import MultiDict
 from xblock.field_data import DictFieldData
 from xblock.fields import ScopeIds
 
 from games.games import GamesXBlock
-from games.handlers.common import CommonHandlers
-from games.constants import GAME_TYPE, DEFAULT
+from games.handlers.common import (
+    AESGCMCipher,
+    CommonHandlers,
+    FernetCipher,
+    get_cipher_cache,
+    get_token_backend_name,
+)
+from games.constants import CARD_FIELD, CARD_OP, CIPHER_BACKEND, GAME_TYPE, DEFAULT
+from games.image_gc import find_content_orphans, find_orphans, pending_marker_path, ref_marker_path
 
 
 class TestCommonHandlers(TestCase):
@@ -74,6 +90,132 @@ class TestCommonHandlers(TestCase):
         decrypted = CommonHandlers.decrypt_data(encrypted, key)
         self.assertEqual(decrypted, original_data)
 
+    # Tests for the per-block cipher cache
+    def test_get_cipher_is_cached_per_block(self):
+        """Test the cipher is derived once per block and reused."""
+        with patch.object(CommonHandlers, 'generate_encryption_key',
+                          wraps=CommonHandlers.generate_encryption_key) as mock_generate:
+            first = CommonHandlers.get_cipher(self.xblock)
+            second = CommonHandlers.get_cipher(self.xblock)
+
+        self.assertIs(first, second)
+        mock_generate.assert_called_once_with(self.xblock)
+
+    def test_encrypt_decrypt_for_block(self):
+        """Test round trip through the cached block cipher."""
+        original_data = [self.fake.word(), None, self.fake.uuid4()]
+
+        encrypted = CommonHandlers.encrypt_for_block(self.xblock, original_data)
+
+        self.assertEqual(CommonHandlers.decrypt_for_block(self.xblock, encrypted), original_data)
+
+    def test_decrypt_for_block_reads_encrypt_data_output(self):
+        """Test payloads encrypted with the derived key decrypt with the cached cipher."""
+        key = CommonHandlers.generate_encryption_key(self.xblock)
+        original_data = {'term': self.fake.word()}
+
+        encrypted = CommonHandlers.encrypt_data(original_data, key)
+
+        self.assertEqual(CommonHandlers.decrypt_for_block(self.xblock, encrypted), original_data)
+
+    def test_cipher_cache_stats(self):
+        """Test cache statistics are exposed for monitoring."""
+        before = CommonHandlers.cipher_cache_stats()
+        CommonHandlers.get_cipher(self.xblock)
+        CommonHandlers.get_cipher(self.xblock)
+        after = CommonHandlers.cipher_cache_stats()
+
+        self.assertEqual(after['misses'] - before['misses'], 1)
+        self.assertEqual(after['hits'] - before['hits'], 1)
+
+    def test_cipher_cache_configured_from_settings(self):
+        """Test cache size and expiry come from GAMESXBLOCK_CIPHER_CACHE and follow overrides."""
+        get_cipher_cache()
+        with override_settings(GAMESXBLOCK_CIPHER_CACHE={'max_size': 3, 'ttl': 60}):
+            cache = get_cipher_cache()
+            self.assertEqual(cache.max_size, 3)
+            self.assertEqual(cache.ttl, 60)
+        self.assertIsNot(get_cipher_cache(), cache)
+
+    # Tests for cipher backends
+    @override_settings(GAMESXBLOCK_CIPHER_BACKEND=CIPHER_BACKEND.AES_GCM)
+    def test_aesgcm_backend_round_trip(self):
+        """Test the compact AES-GCM backend encrypts and decrypts."""
+        original_data = [self.fake.uuid4() for _ in range(10)]
+
+        encrypted = CommonHandlers.encrypt_for_block(self.xblock, original_data)
+
+        self.assertTrue(encrypted.startswith(AESGCMCipher.PREFIX))
+        self.assertEqual(get_token_backend_name(encrypted), CIPHER_BACKEND.AES_GCM)
+        self.assertEqual(CommonHandlers.decrypt_for_block(self.xblock, encrypted), original_data)
+
+    def test_aesgcm_tokens_are_smaller(self):
+        """Test AES-GCM tokens are smaller than Fernet tokens for the same data."""
+        plaintext = json.dumps([self.fake.uuid4() for _ in range(50)]).encode()
+
+        fernet_token = CommonHandlers.get_cipher(self.xblock, CIPHER_BACKEND.FERNET).encrypt(plaintext)
+        gcm_token = CommonHandlers.get_cipher(self.xblock, CIPHER_BACKEND.AES_GCM).encrypt(plaintext)
+
+        self.assertLess(len(gcm_token), len(fernet_token))
+
+    def test_aesgcm_rejects_tampered_token(self):
+        """Test a modified AES-GCM token fails authentication."""
+        cipher = CommonHandlers.get_cipher(self.xblock, CIPHER_BACKEND.AES_GCM)
+        token = cipher.encrypt(b'secret')
+        tampered = token[:-2] + ('A' if token[-2] != 'A' else 'B') + token[-1]
+
+        with self.assertRaises(ValueError):
+            cipher.decrypt(tampered)
+
+    @override_settings(GAMESXBLOCK_CIPHER_BACKEND=CIPHER_BACKEND.AES_GCM)
+    def test_existing_fernet_keys_decrypt_after_backend_switch(self):
+        """Test Fernet payloads still decrypt when AES-GCM is configured."""
+        original_data = {'term': self.fake.word()}
+        encrypted = CommonHandlers.encrypt_data(original_data, CommonHandlers.generate_encryption_key(self.xblock))
+
+        self.assertEqual(get_token_backend_name(encrypted), CIPHER_BACKEND.FERNET)
+        self.assertEqual(CommonHandlers.decrypt_for_block(self.xblock, encrypted), original_data)
+
+    def test_aesgcm_rejects_fernet_token(self):
+        """Test the AES-GCM backend refuses tokens it did not produce."""
+        key = CommonHandlers.generate_encryption_key(self.xblock)
+        fernet_token = FernetCipher(key).encrypt(b'data')
+
+        with self.assertRaises(ValueError):
+            AESGCMCipher(key).decrypt(fernet_token)
+
+    def test_deterministic_encryption(self):
+        """Test deterministic tokens repeat for equal data, differ otherwise and still decrypt."""
+        for backend in CIPHER_BACKEND.VALID:
+            with override_settings(GAMESXBLOCK_CIPHER_BACKEND=backend):
+                first = CommonHandlers.encrypt_for_block(self.xblock, ['a'], deterministic=True)
+                second = CommonHandlers.encrypt_for_block(self.xblock, ['a'], deterministic=True)
+                other = CommonHandlers.encrypt_for_block(self.xblock, ['b'], deterministic=True)
+
+                self.assertEqual(first, second)
+                self.assertNotEqual(first, other)
+                self.assertEqual(get_token_backend_name(first), backend)
+                self.assertEqual(CommonHandlers.decrypt_for_block(self.xblock, first), ['a'])
+                self.assertNotEqual(CommonHandlers.encrypt_for_block(self.xblock, ['a']), first)
+
+    def test_fernet_token_from_parts_matches_spec(self):
+        """Test deterministic Fernet tokens are built as the Fernet spec's test vector."""
+        cipher = FernetCipher(b'cw_0x689RpI-jtRR7oE8h_eQsKImvJapLeSbXpwF4e4=')
+
+        token = cipher.token_from_parts(b'hello', 499162800, bytes(range(16)))
+
+        self.assertEqual(
+            token,
+            'gAAAAAAdwJ6wAAECAwQFBgcICQoLDA0ODy021cpGVWKZ_eEwCGM4BLLF_5CV9dOPmrhuVUPgJobwOz7JcbmrR64jVmpU4IwqDA==',
+        )
+        self.assertEqual(cipher.decrypt(token), b'hello')
+
+    @override_settings(GAMESXBLOCK_CIPHER_BACKEND='rot13')
+    def test_unknown_cipher_backend(self):
+        """Test an unknown configured backend raises ValueError."""
+        with self.assertRaises(ValueError):
+            CommonHandlers.encrypt_for_block(self.xblock, [])
+
     # Tests for get_settings
     def test_get_settings(self):
         """Test getting game settings."""
@@ -91,6 +233,7 @@ class TestCommonHandlers(TestCase):
         self.assertEqual(result['cards'], cards)
         self.assertEqual(result['is_shuffled'], is_shuffled)
         self.assertEqual(result['has_timer'], has_timer)
+        self.assertEqual(result['cards_version'], 0)
 
     # Tests for upload_image
     @patch('games.handlers.common.get_gamesxblock_storage')
@@ -99,12 +242,12 @@ class TestCommonHandlers(TestCase):
         mock_storage = Mock()
         image_path = self.fake.file_path(extension='jpg')
         image_url = self.fake.image_url()
+        mock_storage.exists.return_value = False
         mock_storage.save.return_value = image_path
         mock_storage.url.return_value = image_url
         mock_get_storage.return_value = mock_storage
 
-        mock_file = Mock()
-        mock_file.read.return_value = self.fake.binary(length=100)
+        mock_file = io.BytesIO(self.fake.binary(length=100))
 
         filename = self.fake.file_name(extension='jpg')
         mock_file_obj = Mock()
@@ -121,6 +264,219 @@ class TestCommonHandlers(TestCase):
         self.assertTrue(response_data['success'])
         self.assertEqual(response_data['url'], image_url)
         self.assertEqual(response_data['filename'], filename)
+        self.assertFalse(response_data['deduplicated'])
+        # The upload itself is streamed into storage, rewound after hashing
+        saved_file = mock_storage.save.call_args[0][1]
+        self.assertIs(saved_file.file, mock_file)
+        self.assertEqual(mock_file.tell(), 0)
+
+    def _upload_request(self, blob, extension='png'):
+        """Return a request carrying blob as the uploaded file."""
+        mock_file_obj = Mock()
+        mock_file_obj.file = io.BytesIO(blob)
+        mock_file_obj.filename = self.fake.file_name(extension=extension)
+        request = Mock()
+        request.params = {'file': mock_file_obj}
+        return request
+
+    @patch('games.handlers.common.get_gamesxblock_storage')
+    def test_upload_image_existing_content_skips_write(self, mock_get_storage):
+        """Test re-uploading identical bytes reuses the content-addressed object."""
+        blob = self.fake.binary(length=300)
+        mock_storage = Mock()
+        mock_storage.exists.return_value = True
+        mock_storage.url.side_effect = lambda path: f'https://cdn/{path}'
+        mock_get_storage.return_value = mock_storage
+
+        response = CommonHandlers.upload_image(self.xblock, self._upload_request(blob))
+
+        response_data = json.loads(response.body.decode())
+        expected_path = f"games/{self.xblock.scope_ids.usage_id.block_id}/{hashlib.md5(blob).hexdigest()}.png"
+        self.assertTrue(response_data['deduplicated'])
+        self.assertEqual(response_data['file_path'], expected_path)
+        self.assertEqual(response_data['url'], f'https://cdn/{expected_path}')
+        mock_storage.exists.assert_called_once_with(expected_path)
+        # Only the pending marker is written, keeping the re-upload from collection
+        mock_storage.save.assert_called_once()
+        self.assertEqual(
+            mock_storage.save.call_args[0][0],
+            pending_marker_path(self.xblock.scope_ids.usage_id.block_id, hashlib.md5(blob).hexdigest()),
+        )
+
+    @patch('games.handlers.common.schedule_derivatives')
+    @patch('games.handlers.common.get_gamesxblock_storage')
+    def test_upload_image_queues_derivatives(self, mock_get_storage, mock_schedule):
+        """Test the stored image is handed to the variant pipeline."""
+        mock_storage = Mock()
+        mock_storage.exists.return_value = True
+        mock_storage.url.side_effect = lambda path: f'https://cdn/{path}'
+        mock_get_storage.return_value = mock_storage
+
+        response = CommonHandlers.upload_image(self.xblock, self._upload_request(b'image bytes'))
+
+        response_data = json.loads(response.body.decode())
+        mock_schedule.assert_called_once_with(mock_storage, response_data['file_path'])
+        self.assertTrue(response_data['derivatives_queued'])
+
+    @override_settings(GAMESXBLOCK_IMAGE_LAYOUT='content')
+    @patch('games.handlers.common.get_gamesxblock_storage')
+    def test_upload_image_content_layout(self, mock_get_storage):
+        """Test the content layout stores images by hash alone, shared across blocks."""
+        blob = self.fake.binary(length=50)
+        mock_storage = Mock()
+        mock_storage.exists.return_value = False
+        mock_storage.save.side_effect = lambda path, content: path
+        mock_storage.url.side_effect = lambda path: f'https://cdn/{path}'
+        mock_get_storage.return_value = mock_storage
+
+        response = CommonHandlers.upload_image(self.xblock, self._upload_request(blob))
+
+        file_hash = hashlib.md5(blob).hexdigest()
+        self.assertEqual(json.loads(response.body.decode())['file_path'], f'games/cas/{file_hash[:2]}/{file_hash}.png')
+
+    def test_reupload_is_kept_from_collection(self):
+        """Test an old image removed from the cards and re-uploaded survives collection until saved."""
+        blob = self.fake.binary(length=50)
+        old = time.time() - 3 * 86400
+        for layout in ('block', 'content'):
+            with self.subTest(layout=layout), override_settings(GAMESXBLOCK_IMAGE_LAYOUT=layout), \
+                    tempfile.TemporaryDirectory() as location:
+                storage = FileSystemStorage(location=location)
+                with patch('games.handlers.common.get_gamesxblock_storage', return_value=storage):
+                    first = json.loads(CommonHandlers.upload_image(self.xblock, self._upload_request(blob)).body)
+                    CommonHandlers.save_settings(self.xblock, {
+                        'game_type': GAME_TYPE.FLASHCARDS,
+                        'cards': [{'term': 't', 'definition': 'd', 'term_image': first['url']}],
+                    })
+                    CommonHandlers.save_settings(self.xblock, {'game_type': GAME_TYPE.FLASHCARDS, 'cards': []})
+                    for root, _, files in os.walk(location):
+                        for name in files:
+                            os.utime(os.path.join(root, name), (old, old))
+
+                    second = json.loads(CommonHandlers.upload_image(self.xblock, self._upload_request(blob)).body)
+
+                usage_id = self.xblock.scope_ids.usage_id
+                block_id = usage_id.block_id
+                orphans, _ = find_orphans(storage, block_id, set(), min_age=timedelta(hours=24))
+                content_orphans, _ = find_content_orphans(storage, {usage_id: [[]]}, min_age=timedelta(hours=24))
+                self.assertTrue(second['deduplicated'])
+                self.assertEqual(orphans + content_orphans, [])
+
+    @override_settings(GAMESXBLOCK_MAX_UPLOAD_SIZE=1000)
+    @patch('games.handlers.common.get_gamesxblock_storage')
+    def test_upload_image_too_large(self, mock_get_storage):
+        """Test files over the size limit are rejected before anything is stored."""
+        mock_storage = Mock()
+        mock_get_storage.return_value = mock_storage
+
+        response = CommonHandlers.upload_image(self.xblock, self._upload_request(b'x' * 1001))
+
+        self.assertEqual(response.status_code, 413)
+        self.assertIn('limit', json.loads(response.body.decode())['error'])
+        mock_storage.save.assert_not_called()
+
+    def _batch_request(self, *files):
+        """Return a request carrying (name, blob) pairs as the uploaded files."""
+        params = MultiDict()
+        for name, blob in files:
+            upload = Mock()
+            upload.file = io.BytesIO(blob)
+            upload.filename = name
+            params.add('files', upload)
+        request = Mock()
+        request.params = params
+        return request
+
+    def test_upload_images_writes_batch(self):
+        """Test every file is stored and results follow request order, writing duplicates once."""
+        files = [('a.png', b'first image'), ('b.JPG', b'second image'), ('c.png', b'first image')]
+        with tempfile.TemporaryDirectory() as location:
+            storage = FileSystemStorage(location=location, base_url='/media/')
+            with patch('games.handlers.common.get_gamesxblock_storage', return_value=storage):
+                response = CommonHandlers.upload_images(self.xblock, self._batch_request(*files))
+
+            response_data = json.loads(response.body.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response_data['success'])
+            results = response_data['results']
+            self.assertEqual([result['filename'] for result in results], ['a.png', 'b.JPG', 'c.png'])
+            self.assertEqual([result['deduplicated'] for result in results], [False, False, True])
+            self.assertEqual(results[0]['file_path'], results[2]['file_path'])
+            self.assertTrue(results[1]['file_path'].endswith(f"{hashlib.md5(b'second image').hexdigest()}.jpg"))
+            for result, (_, blob) in zip(results, files):
+                self.assertEqual(result['url'], f"/media/{result['file_path']}")
+                with storage.open(result['file_path']) as stored:
+                    self.assertEqual(stored.read(), blob)
+            _, block_files = storage.listdir(f'games/{self.xblock.scope_ids.usage_id.block_id}')
+            self.assertEqual(len(block_files), 2)
+
+    @patch('games.handlers.common.get_gamesxblock_storage')
+    def test_upload_images_rejects_batch_before_writing(self, mock_get_storage):
+        """Test one invalid file rejects the whole batch with per-file errors."""
+        request = self._batch_request(('a.png', b'image'), ('notes.txt', b'text'), ('noext', b'x'))
+
+        response = CommonHandlers.upload_images(self.xblock, request)
+
+        self.assertEqual(response.status_code, 400)
+        results = json.loads(response.body.decode())['results']
+        self.assertEqual([result['success'] for result in results], [False, False, False])
+        self.assertNotIn('error', results[0])
+        self.assertIn("Unsupported file type '.txt'", results[1]['error'])
+        self.assertEqual(results[2]['error'], 'File must have an extension')
+        mock_get_storage.assert_not_called()
+
+    @override_settings(GAMESXBLOCK_MAX_UPLOAD_SIZE=10)
+    @patch('games.handlers.common.get_gamesxblock_storage')
+    def test_upload_images_rejects_oversized_file(self, mock_get_storage):
+        """Test an oversized file rejects the batch with status 413."""
+        response = CommonHandlers.upload_images(self.xblock, self._batch_request(('a.png', b'x' * 11)))
+
+        self.assertEqual(response.status_code, 413)
+        self.assertIn('limit', json.loads(response.body.decode())['results'][0]['error'])
+        mock_get_storage.assert_not_called()
+
+    @patch('games.handlers.common.get_gamesxblock_storage')
+    def test_upload_images_reports_storage_errors_per_file(self, mock_get_storage):
+        """Test a failed write marks only that file as failed."""
+        def save(path, content):
+            if content.name == 'b.png':
+                raise OSError('disk full')
+            return path
+
+        mock_storage = Mock()
+        mock_storage.exists.return_value = False
+        mock_storage.save.side_effect = save
+        mock_storage.url.side_effect = lambda path: f'https://cdn/{path}'
+        mock_get_storage.return_value = mock_storage
+
+        response = CommonHandlers.upload_images(
+            self.xblock, self._batch_request(('a.png', b'first'), ('b.png', b'second'))
+        )
+
+        response_data = json.loads(response.body.decode())
+        self.assertFalse(response_data['success'])
+        self.assertTrue(response_data['results'][0]['success'])
+        self.assertEqual(response_data['results'][1]['error'], 'disk full')
+
+    @patch('games.handlers.common.get_gamesxblock_storage')
+    def test_upload_images_rejects_form_values(self, mock_get_storage):
+        """Test a plain form value among the files is a per-file 400 error, not a server error."""
+        request = Request.blank('/', POST=MultiDict([('files', ('a.png', b'image')), ('files', 'x')]))
+
+        response = CommonHandlers.upload_images(self.xblock, request)
+
+        self.assertEqual(response.status_code, 400)
+        results = json.loads(response.body.decode())['results']
+        self.assertEqual([result['success'] for result in results], [False, False])
+        self.assertEqual(results[0]['filename'], 'a.png')
+        self.assertEqual(results[1]['error'], 'Not a file upload')
+        mock_get_storage.assert_not_called()
+
+    def test_upload_images_requires_files(self):
+        """Test an empty batch is rejected."""
+        response = CommonHandlers.upload_images(self.xblock, self._batch_request())
+
+        self.assertEqual(response.status_code, 400)
 
     @patch('games.handlers.common.get_gamesxblock_storage')
     def test_upload_image_no_extension(self, mock_get_storage):
@@ -181,6 +537,37 @@ class TestCommonHandlers(TestCase):
         self.assertEqual(len(self.xblock.cards), 2)
         self.assertEqual(self.xblock.list_length, 2)
 
+    @override_settings(GAMESXBLOCK_IMAGE_LAYOUT='content')
+    def test_save_settings_tracks_shared_image_references(self):
+        """Test saving cards adds and removes this usage's markers for shared images."""
+        first, second = '0' * 32, '1' * 32
+        url = 'https://cdn.example.com/games/cas/{0:.2}/{0}.png'.format
+        with tempfile.TemporaryDirectory() as location:
+            storage = FileSystemStorage(location=location)
+            with patch('games.handlers.common.get_gamesxblock_storage', return_value=storage):
+                for image in (first, second):
+                    result = CommonHandlers.save_settings(self.xblock, {
+                        'game_type': GAME_TYPE.FLASHCARDS,
+                        'cards': [{'term': 't', 'definition': 'd', 'term_image': url(image)}],
+                    })
+                    self.assertTrue(result['success'])
+
+            self.assertFalse(storage.exists(ref_marker_path(first, self.xblock.scope_ids.usage_id)))
+            self.assertTrue(storage.exists(ref_marker_path(second, self.xblock.scope_ids.usage_id)))
+
+    @override_settings(GAMESXBLOCK_IMAGE_LAYOUT='content')
+    @patch('games.handlers.common.get_gamesxblock_storage')
+    def test_save_settings_survives_reference_errors(self, mock_get_storage):
+        """Test a failing reference index does not fail the save."""
+        mock_get_storage.side_effect = OSError('storage down')
+
+        result = CommonHandlers.save_settings(self.xblock, {
+            'game_type': GAME_TYPE.FLASHCARDS,
+            'cards': [{'term': 't', 'definition': 'd', 'term_image': f'/media/games/cas/00/{"0" * 32}.png'}],
+        })
+
+        self.assertTrue(result['success'])
+
     def test_save_settings_matching(self):
         """Test saving settings for matching game."""
         data = {
@@ -225,6 +612,206 @@ class TestCommonHandlers(TestCase):
         self.assertFalse(result['success'])
         self.assertIn('object', result['error'])
 
+    def test_save_settings_rejects_stale_version(self):
+        """Test save_settings bumps cards_version and rejects saves based on an older one."""
+        data = {'cards': [{'term': self.fake.word(), 'definition': self.fake.sentence()}]}
+
+        self.assertEqual(CommonHandlers.save_settings(self.xblock, data)['cards_version'], 1)
+        result = CommonHandlers.save_settings(self.xblock, {**data, 'cards_version': 0})
+
+        self.assertFalse(result['success'])
+        self.assertTrue(result['conflict'])
+        self.assertEqual(result['cards_version'], 1)
+
+    # Tests for patch_cards
+    def _set_cards(self, count):
+        """Store count cards keyed k0..k(count-1) and return their keys."""
+        self.xblock.cards = [
+            {CARD_FIELD.CARD_KEY: f'k{i}', CARD_FIELD.TERM: f'term-{i}', CARD_FIELD.DEFINITION: f'definition-{i}'}
+            for i in range(count)
+        ]
+        return [f'k{i}' for i in range(count)]
+
+    def _patch(self, *operations):
+        """Apply operations against the current version."""
+        return CommonHandlers.patch_cards(
+            self.xblock, {'cards_version': self.xblock.cards_version, 'operations': list(operations)}
+        )
+
+    def test_patch_cards_update(self):
+        """Test an update changes only the named fields of one card."""
+        self._set_cards(3)
+        untouched = self.xblock.cards[0]
+
+        result = self._patch({'op': CARD_OP.UPDATE, 'card_key': 'k1', 'fields': {CARD_FIELD.DEFINITION: 'fixed'}})
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['cards_version'], 1)
+        self.assertEqual(self.xblock.cards[1][CARD_FIELD.DEFINITION], 'fixed')
+        self.assertEqual(self.xblock.cards[1][CARD_FIELD.TERM], 'term-1')
+        self.assertEqual(self.xblock.cards[0], untouched)
+        self.runtime.save_block.assert_called()
+
+    def test_patch_cards_add_delete_move(self):
+        """Test a sequence of operations sees the effects of earlier ones."""
+        self._set_cards(4)
+
+        result = self._patch(
+            {'op': CARD_OP.DELETE, 'card_key': 'k0'},
+            {'op': CARD_OP.ADD, 'card': {CARD_FIELD.TERM: 'new', CARD_FIELD.DEFINITION: 'card'}, 'position': 1},
+            {'op': CARD_OP.MOVE, 'card_key': 'k3', 'position': 0},
+            {'op': CARD_OP.UPDATE, 'card_key': 'k2', 'fields': {CARD_FIELD.TERM: 'edited'}},
+        )
+
+        self.assertTrue(result['success'])
+        new_key = result['added_keys'][0]
+        self.assertEqual([card[CARD_FIELD.CARD_KEY] for card in self.xblock.cards], ['k3', 'k1', new_key, 'k2'])
+        self.assertEqual(self.xblock.cards[3][CARD_FIELD.TERM], 'edited')
+        self.assertEqual(self.xblock.list_length, 4)
+        self.assertEqual(result['count'], 4)
+
+    def test_patch_cards_rejects_stale_version(self):
+        """Test a patch based on an outdated version is rejected as a conflict."""
+        self._set_cards(2)
+        self.xblock.cards_version = 5
+
+        result = CommonHandlers.patch_cards(
+            self.xblock, {'cards_version': 4, 'operations': [{'op': CARD_OP.DELETE, 'card_key': 'k0'}]}
+        )
+
+        self.assertFalse(result['success'])
+        self.assertTrue(result['conflict'])
+        self.assertEqual(result['cards_version'], 5)
+        self.assertEqual(len(self.xblock.cards), 2)
+
+    def test_patch_cards_is_all_or_nothing(self):
+        """Test an invalid operation discards the earlier operations of the same patch."""
+        self._set_cards(2)
+        invalid_operations = [
+            {'op': 'rename', 'card_key': 'k0'},
+            {'op': CARD_OP.UPDATE, 'card_key': 'missing', 'fields': {}},
+            {'op': CARD_OP.UPDATE, 'card_key': 'k0', 'fields': {'card_key': 'k1'}},
+            {'op': CARD_OP.ADD, 'card': {CARD_FIELD.TERM: 'no definition'}},
+            {'op': CARD_OP.ADD, 'card': {CARD_FIELD.CARD_KEY: 'k1', CARD_FIELD.TERM: 't', CARD_FIELD.DEFINITION: 'd'}},
+            {'op': CARD_OP.MOVE, 'card_key': 'k0', 'position': 'first'},
+        ]
+
+        for operation in invalid_operations:
+            result = self._patch({'op': CARD_OP.DELETE, 'card_key': 'k0'}, operation)
+
+            self.assertFalse(result['success'], operation)
+            self.assertIn('Operation 2', result['error'])
+        self.assertEqual(len(self.xblock.cards), 2)
+        self.assertEqual(self.xblock.cards_version, 0)
+
+    def test_patch_cards_requires_card_key(self):
+        """Test update, delete and move without a card_key never match a stored card that lacks one."""
+        self._set_cards(2)
+        self.xblock.cards = [*self.xblock.cards, {CARD_FIELD.TERM: 'legacy', CARD_FIELD.DEFINITION: 'card'}]
+        original = list(self.xblock.cards)
+
+        for card_key in (None, '', 3):
+            for operation in (
+                {'op': CARD_OP.UPDATE, 'fields': {CARD_FIELD.TERM: 'edited'}},
+                {'op': CARD_OP.DELETE},
+                {'op': CARD_OP.MOVE, 'position': 0},
+            ):
+                if card_key is not None:
+                    operation = {**operation, 'card_key': card_key}
+                result = self._patch(operation)
+
+                self.assertFalse(result['success'], operation)
+                self.assertIn('card_key', result['error'])
+        self.assertEqual(self.xblock.cards, original)
+
+    def test_patch_cards_matches_sequential_edits(self):
+        """Test a long mixed batch gives the same deck as applying each edit to a plain list."""
+        rng = random.Random(0)
+        expected = self._set_cards(30)
+        operations = []
+        for number in range(200):
+            op = rng.choice(CARD_OP.VALID) if expected else CARD_OP.ADD
+            position = rng.randint(0, len(expected))
+            if op == CARD_OP.ADD:
+                key = f'new-{number}'
+                card = {CARD_FIELD.CARD_KEY: key, CARD_FIELD.TERM: 't', CARD_FIELD.DEFINITION: 'd'}
+                operations.append({'op': op, 'card': card, 'position': position})
+                expected.insert(position, key)
+                continue
+            key = rng.choice(expected)
+            if op == CARD_OP.UPDATE:
+                operations.append({'op': op, 'card_key': key, 'fields': {CARD_FIELD.TERM: f'edit-{number}'}})
+            elif op == CARD_OP.DELETE:
+                operations.append({'op': op, 'card_key': key})
+                expected.remove(key)
+            else:
+                operations.append({'op': op, 'card_key': key, 'position': position})
+                expected.remove(key)
+                expected.insert(min(position, len(expected)), key)
+
+        result = self._patch(*operations)
+
+        self.assertTrue(result['success'])
+        self.assertEqual([card[CARD_FIELD.CARD_KEY] for card in self.xblock.cards], expected)
+
+    # Tests for import_cards
+    def _import(self, data, file_name='deck.csv', **params):
+        """Call import_cards with an uploaded file and return (status, body)."""
+        upload = Mock()
+        upload.file = io.BytesIO(data.encode('utf-8'))
+        upload.filename = file_name
+        request = Mock()
+        request.params = {'file': upload, **params}
+        response = CommonHandlers.import_cards(self.xblock, request)
+        return response.status_code, json.loads(response.body.decode())
+
+    def test_import_cards_replace(self):
+        """Test importing replaces the deck and bumps the version."""
+        self._set_cards(2)
+
+        status, body = self._import('term,definition\na,b\nc,d\ne,f\n')
+
+        self.assertEqual(status, 200)
+        self.assertEqual(body['imported'], 3)
+        self.assertEqual(body['cards_version'], 1)
+        self.assertEqual([card[CARD_FIELD.TERM] for card in self.xblock.cards], ['a', 'c', 'e'])
+        self.assertEqual(self.xblock.list_length, 3)
+
+    def test_import_cards_append(self):
+        """Test append mode keeps existing cards and continues their order."""
+        self._set_cards(2)
+
+        status, body = self._import('term\tdefinition\na\tb\n', file_name='deck.tsv', mode='append')
+
+        self.assertEqual(status, 200)
+        self.assertEqual(body['count'], 3)
+        self.assertEqual(self.xblock.cards[2][CARD_FIELD.ORDER], 2)
+        self.assertEqual(self.xblock.cards[0][CARD_FIELD.CARD_KEY], 'k0')
+
+    def test_import_cards_is_atomic(self):
+        """Test nothing is saved when any row is invalid."""
+        self._set_cards(2)
+
+        status, body = self._import('term,definition\na,b\nc,\n')
+
+        self.assertEqual(status, 400)
+        self.assertFalse(body['success'])
+        self.assertEqual(body['row_errors'], [{'row': 3, 'error': 'Each card must have term and definition'}])
+        self.assertEqual(len(self.xblock.cards), 2)
+        self.assertEqual(self.xblock.cards_version, 0)
+
+    def test_import_cards_rejects_bad_requests(self):
+        """Test unsupported files, unknown modes and stale versions are rejected."""
+        self.assertEqual(self._import('x', file_name='deck.xlsx')[0], 400)
+        self.assertEqual(self._import('term,definition\na,b\n', mode='merge')[0], 400)
+        status, body = self._import('term,definition\na,b\n', cards_version='7')
+        self.assertEqual(status, 409)
+        self.assertTrue(body['conflict'])
+
+        request = Mock()
+        request.params = {}
+        self.assertEqual(CommonHandlers.import_cards(self.xblock, request).status_code, 400)
+
     # Tests for format_as_uuid_like
     def test_format_as_uuid_like(self):
         """Test UUID-like formatting for obfuscation."""
@@ -245,6 +832,69 @@ class TestCommonHandlers(TestCase):
         # First part should be the key
         self.assertEqual(parts[0], key_hex)
 
+    # Tests for delete_images
+    @override_settings(GAMESXBLOCK_IMAGE_DERIVATIVES={'widths': [200]})
+    @patch('games.handlers.common.get_gamesxblock_storage')
+    def test_delete_images_deletes_keys_and_variants(self, mock_get_storage):
+        """Test each key and its variants are deleted without existence checks."""
+        mock_storage = Mock()
+        mock_get_storage.return_value = mock_storage
+        prefix = f'games/{self.xblock.scope_ids.usage_id.block_id}'
+        keys = [f'{prefix}/a.png', f'{prefix}/b.svg']
+
+        result = CommonHandlers.delete_images(self.xblock, {'keys': keys})
+
+        self.assertEqual(result, {'success': True, 'deleted': keys, 'failed': {}})
+        deleted = sorted(call.args[0] for call in mock_storage.delete.call_args_list)
+        self.assertEqual(deleted, sorted(keys + [f'{prefix}/a_w200.webp', f'{prefix}/b_w200.webp']))
+        mock_storage.exists.assert_not_called()
+
+    @patch('games.handlers.common.get_gamesxblock_storage')
+    def test_delete_images_releases_shared_images(self, mock_get_storage):
+        """Test shared images are not deleted; only this block's reference marker is."""
+        mock_storage = Mock()
+        mock_get_storage.return_value = mock_storage
+        key = f'games/cas/00/{"0" * 32}.png'
+
+        result = CommonHandlers.delete_images(self.xblock, {'keys': [key]})
+
+        self.assertEqual(result['deleted'], [key])
+        mock_storage.delete.assert_called_once_with(ref_marker_path('0' * 32, self.xblock.scope_ids.usage_id))
+
+    @patch('games.handlers.common.get_gamesxblock_storage')
+    def test_delete_images_rejects_other_blocks_keys(self, mock_get_storage):
+        """Test keys outside the block's directory reject the request."""
+        own_key = f'games/{self.xblock.scope_ids.usage_id.block_id}/a.png'
+        foreign_key = 'games/other-block/a.png'
+
+        result = CommonHandlers.delete_images(self.xblock, {'keys': [own_key, foreign_key]})
+
+        self.assertFalse(result['success'])
+        self.assertEqual(result['invalid_keys'], [foreign_key])
+        mock_get_storage.assert_not_called()
+
+    @patch('games.handlers.common.get_gamesxblock_storage')
+    def test_delete_images_reports_failures(self, mock_get_storage):
+        """Test a failed delete is reported per key."""
+        def delete(key):
+            if key.endswith('b.png'):
+                raise OSError('denied')
+
+        prefix = f'games/{self.xblock.scope_ids.usage_id.block_id}'
+        mock_storage = Mock()
+        mock_storage.delete.side_effect = delete
+        mock_get_storage.return_value = mock_storage
+
+        result = CommonHandlers.delete_images(self.xblock, {'keys': [f'{prefix}/a.png', f'{prefix}/b.png']})
+
+        self.assertFalse(result['success'])
+        self.assertEqual(result['deleted'], [f'{prefix}/a.png'])
+        self.assertEqual(result['failed'], {f'{prefix}/b.png': 'denied'})
+
+    def test_delete_images_missing_keys(self):
+        """Test a request without keys is rejected."""
+        self.assertEqual(CommonHandlers.delete_images(self.xblock, {}), {'success': False, 'error': 'Missing keys'})
+
     # Tests for delete_image_handler
     @patch('games.handlers.common.get_gamesxblock_storage')
     @patch('games.handlers.common.delete_image')
@@ -262,6 +912,21 @@ class TestCommonHandlers(TestCase):
         self.assertEqual(result['key'], image_key)
         mock_delete.assert_called_once_with(mock_storage, image_key)
 
+    @patch('games.handlers.common.get_gamesxblock_storage')
+    @patch('games.handlers.common.delete_image')
+    def test_delete_image_handler_shared_image(self, mock_delete, mock_get_storage):
+        """Test deleting a shared image drops only this block's reference marker."""
+        mock_storage = Mock()
+        mock_get_storage.return_value = mock_storage
+        stem = '0' * 32
+        image_key = f'games/cas/00/{stem}.png'
+
+        result = CommonHandlers.delete_image_handler(self.xblock, {'key': image_key})
+
+        self.assertEqual(result, {'success': True, 'key': image_key})
+        mock_storage.delete.assert_called_once_with(ref_marker_path(stem, self.xblock.scope_ids.usage_id))
+        mock_delete.assert_not_called()
+
     @patch('games.handlers.common.get_gamesxblock_storage')
     def test_delete_image_handler_missing_key(self, mock_get_storage):
         """Test delete fails when key is missing."""
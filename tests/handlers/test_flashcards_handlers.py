@@ -3,14 +3,17 @@ Tests for flashcards and matching handlers.
 """
 import json
 from unittest.mock import Mock, patch, MagicMock
-from django.test import TestCase
+from django.template import Template
+from django.test import TestCase, override_settings
 from faker import Faker
 from xblock.field_data import DictFieldData
 from xblock.fields import ScopeIds
 
 from games.games import GamesXBlock
+from games.handlers.common import CommonHandlers
 from games.handlers.flashcards import FlashcardsHandlers
-from games.constants import GAME_TYPE, CARD_FIELD
+from games.constants import GAME_TYPE, CARD_FIELD, CARD_OP, PAYLOAD_ENCODING
+from games.payload import DEFLATE_PREFIX, decode_payload
 
 
 class TestFlashcardsHandlers(TestCase):
@@ -35,20 +38,20 @@ class TestFlashcardsHandlers(TestCase):
         self.xblock = GamesXBlock(self.runtime, self.field_data, self.scope_ids)
 
     # Tests for student_view rendering
-    @patch('games.handlers.flashcards.pkg_resources.resource_string')
-    def test_student_view_renders_fragment(self, mock_resource_string):
+    @patch('games.handlers.flashcards.get_template')
+    def test_student_view_renders_fragment(self, mock_get_template):
         """Test student view returns a fragment with cards."""
-        mock_resource_string.return_value = b'<div>{{ title }}</div>'
+        mock_get_template.return_value = Template('<div>{{ title }}</div>')
 
         frag = FlashcardsHandlers.student_view(self.xblock)
 
         self.assertIsNotNone(frag)
         self.assertIn(self.title, frag.content)
 
-    @patch('games.handlers.flashcards.pkg_resources.resource_string')
-    def test_student_view_with_no_cards(self, mock_resource_string):
+    @patch('games.handlers.flashcards.get_template')
+    def test_student_view_with_no_cards(self, mock_get_template):
         """Test student view with no cards."""
-        mock_resource_string.return_value = b'<div>{{ list_length }}</div>'
+        mock_get_template.return_value = Template('<div>{{ list_length }}</div>')
         self.xblock.cards = []
 
         frag = FlashcardsHandlers.student_view(self.xblock)
@@ -56,13 +59,184 @@ class TestFlashcardsHandlers(TestCase):
         self.assertIsNotNone(frag)
         self.assertIn('0', frag.content)
 
-    @patch('games.handlers.flashcards.pkg_resources.resource_string')
-    def test_student_view_with_shuffled_cards(self, mock_resource_string):
+    @patch('games.handlers.flashcards.get_template')
+    def test_student_view_with_shuffled_cards(self, mock_get_template):
         """Test student view with shuffled cards."""
-        mock_resource_string.return_value = b'<div>{{ list_length }}</div>'
+        mock_get_template.return_value = Template('<div>{{ list_length }}</div>')
         self.xblock.is_shuffled = True
 
         frag = FlashcardsHandlers.student_view(self.xblock)
 
         self.assertIsNotNone(frag)
-        self.assertIn('2', frag.content)
\ No newline at end of file
+        self.assertIn('2', frag.content)
+
+    @override_settings(GAMESXBLOCK_PAYLOAD_ENCODING=PAYLOAD_ENCODING.DEFLATE)
+    @patch('games.handlers.flashcards.get_template')
+    def test_student_view_deflate_payload(self, mock_get_template):
+        """Test the deflate encoding embeds a compressed payload and async decoder."""
+        mock_get_template.return_value = Template('{{ encoded_mapping }}|{{ obf_decoder|safe }}')
+
+        frag = FlashcardsHandlers.student_view(self.xblock)
+
+        encoded_mapping, obf_decoder = frag.content.split('|', 1)
+        self.assertTrue(encoded_mapping.startswith(DEFLATE_PREFIX))
+        payload = decode_payload(encoded_mapping)
+        self.assertEqual(len(payload['cards']), 2)
+        self.assertIn('GamesXBlockPayload.decode(', obf_decoder)
+        self.assertNotIn('atob(', obf_decoder)
+
+    def _make_cards(self, count):
+        """Return a deck of count cards."""
+        return [
+            {CARD_FIELD.CARD_KEY: f'key-{i}', CARD_FIELD.TERM: f'term-{i}', CARD_FIELD.DEFINITION: f'definition-{i}'}
+            for i in range(count)
+        ]
+
+    def _render_payload(self):
+        """Render the student view and decode its embedded payload."""
+        with patch('games.handlers.flashcards.get_template', return_value=Template('{{ encoded_mapping }}')):
+            frag = FlashcardsHandlers.student_view(self.xblock)
+        return decode_payload(frag.content)
+
+    @override_settings(GAMESXBLOCK_IMAGE_DERIVATIVES={'widths': [200]})
+    def test_uploaded_images_carry_srcset(self):
+        """Test cards with uploaded images carry a srcset of their variants."""
+        stem = 'https://cdn.example.com/games/block/0123456789abcdef0123456789abcdef'
+        self.xblock.cards = [{
+            CARD_FIELD.CARD_KEY: 'key-0',
+            CARD_FIELD.TERM: 'term',
+            CARD_FIELD.TERM_IMAGE: f'{stem}.jpg',
+            CARD_FIELD.DEFINITION: 'definition',
+            CARD_FIELD.DEFINITION_IMAGE: 'https://example.com/external.jpg',
+        }]
+
+        card = self._render_payload()['cards'][0]
+
+        self.assertEqual(card['term_srcset'], f'{stem}_w200.webp 200w')
+        self.assertNotIn('definition_srcset', card)
+
+    def test_student_view_preloads_first_term_image(self):
+        """Test only the first card's term image is preloaded, and only without variants."""
+        self.xblock.is_shuffled = False
+        self.xblock.cards = [
+            {CARD_FIELD.CARD_KEY: f'key-{i}', CARD_FIELD.TERM: 'term', CARD_FIELD.TERM_IMAGE: f'https://example.com/{i}.png'}
+            for i in range(2)
+        ]
+
+        frag = FlashcardsHandlers.student_view(self.xblock)
+
+        self.assertIn('<link rel="preload" as="image" href="https://example.com/0.png">', frag.content)
+        self.assertNotIn('https://example.com/1.png"', frag.content)
+
+        with override_settings(GAMESXBLOCK_IMAGE_DERIVATIVES=True):
+            self.xblock.cards = [{
+                CARD_FIELD.CARD_KEY: 'key-0',
+                CARD_FIELD.TERM: 'term',
+                CARD_FIELD.TERM_IMAGE: 'https://cdn.example.com/games/b/0123456789abcdef0123456789abcdef.png',
+            }]
+            frag = FlashcardsHandlers.student_view(self.xblock)
+
+        self.assertNotIn('rel="preload" as="image"', frag.content)
+
+    @override_settings(GAMESXBLOCK_FLASHCARDS_WINDOW_SIZE=4)
+    def test_student_view_embeds_first_window(self):
+        """Test windowed mode embeds the first window, the deck size and a cursor."""
+        self.runtime.is_author_mode = False
+        self.xblock.cards = self._make_cards(10)
+
+        payload = self._render_payload()
+
+        self.assertEqual(len(payload['cards']), 4)
+        self.assertEqual(payload['total'], 10)
+        self.assertTrue(payload['cursor'])
+
+    @override_settings(GAMESXBLOCK_FLASHCARDS_WINDOW_SIZE=4)
+    def test_windows_cover_deck_in_shuffled_order(self):
+        """Test following cursors yields every card once, in one consistent shuffled order."""
+        self.runtime.is_author_mode = False
+        self.xblock.cards = self._make_cards(10)
+        self.xblock.is_shuffled = True
+
+        payload = self._render_payload()
+        ids = [card['id'] for card in payload['cards']]
+        cursor = payload['cursor']
+        while cursor:
+            result = FlashcardsHandlers.get_flashcards_window(self.xblock, {'cursor': cursor})
+            self.assertTrue(result['success'])
+            self.assertEqual(result['offset'], len(ids))
+            ids.extend(card['id'] for card in result['cards'])
+            cursor = result['cursor']
+
+        self.assertEqual(sorted(ids), sorted(card[CARD_FIELD.CARD_KEY] for card in self.xblock.cards))
+        seed = FlashcardsHandlers.read_cursor(self.xblock, payload['cursor'])['seed']
+        self.assertEqual(ids, [f'key-{i}' for i in FlashcardsHandlers.deck_order(10, seed)])
+
+    @override_settings(GAMESXBLOCK_FLASHCARDS_WINDOW_SIZE=4)
+    def test_windowing_off_in_preview_and_for_small_decks(self):
+        """Test the whole deck is embedded in author preview or when it fits in one window."""
+        self.runtime.is_author_mode = True
+        self.xblock.cards = self._make_cards(10)
+        self.assertEqual(len(self._render_payload()['cards']), 10)
+
+        self.runtime.is_author_mode = False
+        self.xblock.cards = self._make_cards(4)
+        payload = self._render_payload()
+        self.assertEqual(len(payload['cards']), 4)
+        self.assertNotIn('cursor', payload)
+
+    def test_get_flashcards_window_rejects_bad_cursors(self):
+        """Test missing, forged and other-block cursors are rejected."""
+        self.xblock.cards = self._make_cards(10)
+        other_block = GamesXBlock(
+            self.runtime, self.field_data,
+            ScopeIds(self.fake.uuid4(), "games", self.fake.uuid4(), self.fake.uuid4()),
+        )
+        other_cursor = FlashcardsHandlers.make_cursor(other_block, None, 4, 10)
+
+        self.assertIn('Missing cursor', FlashcardsHandlers.get_flashcards_window(self.xblock, {})['error'])
+        for cursor in (self.fake.sha256(), other_cursor):
+            result = FlashcardsHandlers.get_flashcards_window(self.xblock, {'cursor': cursor})
+            self.assertFalse(result['success'])
+            self.assertEqual(result['error'], 'Invalid cursor')
+
+    def test_get_flashcards_window_detects_changed_deck(self):
+        """Test a cursor issued before the deck changed size is refused."""
+        self.xblock.cards = self._make_cards(10)
+        cursor = FlashcardsHandlers.make_cursor(self.xblock, None, 4, 10)
+        self.xblock.cards = self._make_cards(8)
+
+        result = FlashcardsHandlers.get_flashcards_window(self.xblock, {'cursor': cursor})
+
+        self.assertFalse(result['success'])
+        self.assertIn('changed', result['error'])
+
+    def test_get_flashcards_window_detects_same_size_edit(self):
+        """Test a cursor issued before an edit that kept the deck size is refused."""
+        self.xblock.cards = self._make_cards(10)
+        cursor = FlashcardsHandlers.make_cursor(self.xblock, None, 4, 10)
+        self.assertTrue(FlashcardsHandlers.get_flashcards_window(self.xblock, {'cursor': cursor})['success'])
+        CommonHandlers.patch_cards(self.xblock, {
+            'cards_version': self.xblock.cards_version,
+            'operations': [{'op': CARD_OP.MOVE, 'card_key': 'key-9', 'position': 0}],
+        })
+
+        result = FlashcardsHandlers.get_flashcards_window(self.xblock, {'cursor': cursor})
+
+        self.assertFalse(result['success'])
+        self.assertIn('changed', result['error'])
+
+    @override_settings(GAMESXBLOCK_SEEDED_RENDERS=True)
+    @patch('games.handlers.flashcards.get_template')
+    def test_seeded_renders_are_identical_within_attempt(self, mock_get_template):
+        """Test seeded mode reproduces the shuffle and identifiers for the same attempt."""
+        mock_get_template.return_value = Template(
+            '{{ encoded_mapping }}|{{ obf_decoder|safe }}|{{ data_element_id }}'
+        )
+        self.xblock.cards = self._make_cards(20)
+        self.xblock.is_shuffled = True
+
+        first = FlashcardsHandlers.student_view(self.xblock).content
+        self.assertEqual(FlashcardsHandlers.student_view(self.xblock).content, first)
+
+        self.xblock.attempt += 1
+        self.assertNotEqual(FlashcardsHandlers.student_view(self.xblock).content, first)
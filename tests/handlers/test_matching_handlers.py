@@ -1,14 +1,17 @@
 """
 Tests for flashcards and matching handlers.
 """
+import base64
 import json
 from unittest.mock import Mock, patch, MagicMock
-from django.test import TestCase
+from django.template import Template
+from django.test import TestCase, override_settings
 from faker import Faker
 from xblock.field_data import DictFieldData
 from xblock.fields import ScopeIds
 
 from games.games import GamesXBlock
+from games.handlers.common import CommonHandlers
 from games.handlers.matching import MatchingHandlers
 from games.constants import GAME_TYPE, CARD_FIELD
 
@@ -38,20 +41,20 @@ class TestMatchingHandlers(TestCase):
         self.xblock = GamesXBlock(self.runtime, self.field_data, self.scope_ids)
 
     # Tests for student_view rendering
-    @patch('games.handlers.matching.pkg_resources.resource_string')
-    def test_student_view_renders_fragment(self, mock_resource_string):
+    @patch('games.handlers.matching.get_template')
+    def test_student_view_renders_fragment(self, mock_get_template):
         """Test student view returns a fragment."""
-        mock_resource_string.return_value = b'<div>{{ title }}</div>'
+        mock_get_template.return_value = Template('<div>{{ title }}</div>')
 
         frag = MatchingHandlers.student_view(self.xblock)
 
         self.assertIsNotNone(frag)
         self.assertIn(self.title, frag.content)
 
-    @patch('games.handlers.matching.pkg_resources.resource_string')
-    def test_student_view_with_shuffled_cards(self, mock_resource_string):
+    @patch('games.handlers.matching.get_template')
+    def test_student_view_with_shuffled_cards(self, mock_get_template):
         """Test student view with shuffled cards."""
-        mock_resource_string.return_value = b'<div>{{ list_length }}</div>'
+        mock_get_template.return_value = Template('<div>{{ list_length }}</div>')
         self.xblock.is_shuffled = True
 
         frag = MatchingHandlers.student_view(self.xblock)
@@ -59,10 +62,10 @@ class TestMatchingHandlers(TestCase):
         self.assertIsNotNone(frag)
         self.assertIn('2', frag.content)
 
-    @patch('games.handlers.matching.pkg_resources.resource_string')
-    def test_student_view_with_multiple_pages(self, mock_resource_string):
+    @patch('games.handlers.matching.get_template')
+    def test_student_view_with_multiple_pages(self, mock_get_template):
         """Test student view with multiple pages of cards."""
-        mock_resource_string.return_value = b'<div>{{ total_pages }}</div>'
+        mock_get_template.return_value = Template('<div>{{ total_pages }}</div>')
         # Add enough cards to create multiple pages (6 cards per page by default)
         cards = []
         for i in range(15):
@@ -73,6 +76,112 @@ class TestMatchingHandlers(TestCase):
 
         self.assertIsNotNone(frag)
 
+    # Tests for paginated delivery
+    def _make_cards(self, count):
+        """Return a deck of count cards."""
+        return [
+            {CARD_FIELD.TERM: f'term-{i}', CARD_FIELD.DEFINITION: f'definition-{i}'}
+            for i in range(count)
+        ]
+
+    def _render_payload(self):
+        """Render the student view and decode its embedded payload."""
+        with patch('games.handlers.matching.get_template', return_value=Template('{{ encoded_mapping }}')):
+            frag = MatchingHandlers.student_view(self.xblock)
+        return json.loads(base64.b64decode(frag.content))
+
+    def test_build_pages_uses_deck_wide_indices(self):
+        """Test pages built separately share the deck-wide index space."""
+        cards = self._make_cards(12)
+
+        pages, entries, offset = MatchingHandlers.build_pages(self.xblock, cards, 1, 1)
+
+        self.assertEqual(offset, 10)
+        self.assertEqual(len(pages), 1)
+        self.assertEqual(len(entries), 10)
+        self.assertEqual(
+            sorted(item['index'] for item in pages[0]['left_items']),
+            [10, 12, 14, 16, 18],
+        )
+        # Each term entry points to its definition and vice versa
+        for i, entry in enumerate(entries):
+            parts = entry.split('-')
+            partner = int(parts[1] + parts[3], 16)
+            self.assertEqual(partner, (offset + i) ^ 1)
+
+    def test_build_pages_partial_last_page(self):
+        """Test the last page holds the remaining cards."""
+        cards = self._make_cards(12)
+
+        pages, entries, offset = MatchingHandlers.build_pages(self.xblock, cards, 2, 1)
+
+        self.assertEqual(offset, 20)
+        self.assertEqual(len(pages[0]['right_items']), 2)
+        self.assertEqual(len(entries), 4)
+
+    def test_student_view_embeds_all_pages_by_default(self):
+        """Test every page is embedded when lazy pages are disabled."""
+        self.xblock.cards = self._make_cards(12)
+
+        payload = self._render_payload()
+
+        self.assertEqual(len(payload['pages']), 3)
+        self.assertNotIn('lazy', payload)
+
+    @override_settings(GAMESXBLOCK_MATCHING_LAZY_PAGES=True)
+    def test_student_view_lazy_embeds_first_page(self):
+        """Test lazy mode embeds only the first page and its key slice."""
+        self.xblock.cards = self._make_cards(12)
+        self.runtime.is_author_mode = False
+
+        payload = self._render_payload()
+
+        self.assertTrue(payload['lazy'])
+        self.assertEqual(payload['total_pages'], 3)
+        self.assertEqual(len(payload['pages']), 1)
+        key_entries = CommonHandlers.decrypt_for_block(self.xblock, payload['key'])
+        self.assertEqual(len(key_entries), 10)
+
+    @override_settings(GAMESXBLOCK_MATCHING_LAZY_PAGES=True)
+    def test_student_view_lazy_disabled_in_preview(self):
+        """Test author preview embeds every page since handlers are unavailable."""
+        self.xblock.cards = self._make_cards(12)
+        self.runtime.is_author_mode = True
+
+        payload = self._render_payload()
+
+        self.assertEqual(len(payload['pages']), 3)
+
+    def test_get_matching_page(self):
+        """Test fetching a page returns its items and encrypted key slice."""
+        self.xblock.cards = self._make_cards(12)
+
+        result = MatchingHandlers.get_matching_page(self.xblock, {'page': 1})
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['page_number'], 1)
+        self.assertEqual(result['total_pages'], 3)
+        self.assertEqual(len(result['page']['left_items']), 5)
+        key = CommonHandlers.decrypt_for_block(self.xblock, result['key'])
+        self.assertEqual(key['offset'], 10)
+        self.assertEqual(len(key['entries']), 10)
+
+    def test_get_matching_page_out_of_range(self):
+        """Test requesting a page past the end fails."""
+        self.xblock.cards = self._make_cards(12)
+
+        result = MatchingHandlers.get_matching_page(self.xblock, {'page': 3})
+
+        self.assertFalse(result['success'])
+        self.assertIn('out of range', result['error'])
+
+    def test_get_matching_page_invalid(self):
+        """Test a missing or non-numeric page fails."""
+        for data in ({}, {'page': 'two'}):
+            result = MatchingHandlers.get_matching_page(self.xblock, data)
+            self.assertFalse(result['success'])
+            self.assertIn('Invalid page', result['error'])
+
     # Tests for get_matching_key_mapping
     def test_get_matching_key_mapping_success(self):
         """Test getting matching key mapping with valid encrypted data."""
@@ -104,6 +213,72 @@ class TestMatchingHandlers(TestCase):
         self.assertFalse(result['success'])
         self.assertIn('Failed to decrypt', result['error'])
 
+    # Tests for reshuffle_matching_game
+    def test_reshuffle_matching_game(self):
+        """Test reshuffle returns every page and a key that decrypts to all item pairs."""
+        self.xblock.cards = self._make_cards(12)
+
+        result = MatchingHandlers.reshuffle_matching_game(self.xblock, {})
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['total_pages'], 3)
+        self.assertEqual(len(result['pages']), 3)
+        self.assertNotIn('lazy', result)
+        key_entries = CommonHandlers.decrypt_for_block(self.xblock, result['key'])
+        self.assertEqual(len(key_entries), 24)
+
+    @override_settings(GAMESXBLOCK_MATCHING_LAZY_PAGES=True)
+    def test_reshuffle_matching_game_lazy(self):
+        """Test reshuffle in lazy mode returns only the first page, like student_view."""
+        self.xblock.cards = self._make_cards(12)
+        self.runtime.is_author_mode = False
+
+        result = MatchingHandlers.reshuffle_matching_game(self.xblock, {})
+
+        self.assertTrue(result['lazy'])
+        self.assertEqual(result['total_pages'], 3)
+        self.assertEqual(len(result['pages']), 1)
+
+    @patch('games.handlers.matching.get_template')
+    def test_reshuffle_matching_game_skips_rendering(self, mock_get_template):
+        """Test reshuffle does not render the template."""
+        MatchingHandlers.reshuffle_matching_game(self.xblock, {})
+
+        mock_get_template.assert_not_called()
+
+    def test_reshuffle_matching_game_without_cards(self):
+        """Test reshuffle fails when the block has no cards."""
+        self.xblock.cards = []
+
+        result = MatchingHandlers.reshuffle_matching_game(self.xblock, {})
+
+        self.assertFalse(result['success'])
+
+    @override_settings(GAMESXBLOCK_SEEDED_RENDERS=True)
+    @patch('games.handlers.matching.get_template')
+    def test_seeded_renders_are_identical_within_attempt(self, mock_get_template):
+        """Test seeded mode renders the same fragment until play again starts a new attempt."""
+        mock_get_template.return_value = Template(
+            '{{ encoded_mapping }}|{{ obf_decoder|safe }}|{{ data_element_id }}'
+        )
+        self.xblock.cards = self._make_cards(12)
+        self.xblock.is_shuffled = True
+
+        first = MatchingHandlers.student_view(self.xblock).content
+        second = MatchingHandlers.student_view(self.xblock).content
+        result = MatchingHandlers.reshuffle_matching_game(self.xblock, {})
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.xblock.attempt, 1)
+        self.assertNotEqual(MatchingHandlers.student_view(self.xblock).content, first)
+        self.assertNotIn(result['key'], first)
+
+    def test_reshuffle_keeps_attempt_without_seeded_renders(self):
+        """Test the attempt counter is only written when seeded renders are enabled."""
+        MatchingHandlers.reshuffle_matching_game(self.xblock, {})
+
+        self.assertEqual(self.xblock.attempt, 0)
+
     # Tests for refresh_game
     @patch.object(MatchingHandlers, 'student_view')
     def test_refresh_game(self, mock_student_view):
@@ -0,0 +1,171 @@
+"""
+Unit tests for assets.py - game CSS/JS delivery.
+"""
+
+import hashlib
+from unittest.mock import Mock
+
+import pytest
+from django.test import override_settings
+from web_fragments.fragment import Fragment
+from xblock.exceptions import DisallowedFileError
+
+from games import assets, resources
+from games.assets import (
+    FONT_ASSETS,
+    GAME_ASSETS,
+    PRELOADED_FONT,
+    add_game_assets,
+    fingerprinted_uri,
+    load_asset,
+    resolve_fingerprinted_uri,
+)
+from games.constants import ASSET_MODE, GAME_TYPE
+from games.games import GamesXBlock
+
+
+class TestFingerprints:
+    """Test cases for asset fingerprinting."""
+
+    def test_fingerprint_is_content_hash(self):
+        """Test the fingerprint is derived from the asset contents."""
+        data = resources.read_bytes('static/css/matching.css')
+
+        text, fingerprint = load_asset('css/matching.css')
+
+        assert text == data.decode('utf8')
+        assert fingerprint == hashlib.sha256(data).hexdigest()[:12]
+
+    def test_fingerprinted_uri(self):
+        """Test the fingerprint is inserted before the extension."""
+        _, fingerprint = load_asset('js/src/matching.js')
+
+        assert fingerprinted_uri('js/src/matching.js') == f'static/js/src/matching.{fingerprint}.js'
+
+    def test_resolve_round_trip(self):
+        """Test fingerprinted URIs resolve back to the packaged file."""
+        for game_assets in GAME_ASSETS.values():
+            for path in game_assets['css'] + game_assets['js']:
+                assert resolve_fingerprinted_uri(fingerprinted_uri(path)) == f'static/{path}'
+        for path in FONT_ASSETS:
+            assert resolve_fingerprinted_uri(fingerprinted_uri(path)) == f'static/{path}'
+
+    def test_resolve_rejects_stale_fingerprint(self):
+        """Test a URI whose hash is not that of the served file is refused."""
+        _, fingerprint = load_asset('css/matching.css')
+        stale = '0' * 12 if fingerprint != '0' * 12 else '1' * 12
+
+        assert resolve_fingerprinted_uri(f'static/css/matching.{stale}.css') is None
+
+    def test_fonts_are_loaded_as_bytes(self):
+        """Test binary assets are not decoded as text."""
+        data, _ = load_asset(PRELOADED_FONT)
+
+        assert data == resources.read_bytes(f'static/{PRELOADED_FONT}')
+
+    @pytest.mark.parametrize('uri', [
+        'static/css/matching.css',
+        'static/html/matching.0123456789ab.html',
+        'public/css/matching.0123456789ab.css',
+        'static/../setup.0123456789ab.py',
+    ])
+    def test_resolve_rejects_unknown_uris(self, uri):
+        """Test only fingerprinted game assets resolve."""
+        assert resolve_fingerprinted_uri(uri) is None
+
+    @override_settings(DEBUG=False)
+    def test_assets_read_once_outside_debug(self, monkeypatch):
+        """Test assets are cached per process when DEBUG is off."""
+        monkeypatch.setattr(assets, '_loaded', {})
+        read = Mock(return_value=('body {}', 'abc'))
+        monkeypatch.setattr(assets, '_read_asset', read)
+
+        load_asset('css/flashcards.css')
+        load_asset('css/flashcards.css')
+
+        read.assert_called_once_with('css/flashcards.css')
+
+
+class TestAddGameAssets:
+    """Test cases for add_game_assets."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.xblock = Mock()
+        self.xblock.runtime.local_resource_url.side_effect = lambda block, uri: f'/xblock/resource/games/{uri}'
+
+    def test_url_mode_adds_resource_urls(self):
+        """Test URL mode references fingerprinted assets instead of inlining them."""
+        frag = Fragment()
+
+        add_game_assets(frag, self.xblock, GAME_TYPE.MATCHING)
+
+        url_resources = [r for r in frag.resources if r.kind == 'url']
+        assert [r.data for r in url_resources] == [
+            f'/xblock/resource/games/{fingerprinted_uri(path)}'
+            for path in GAME_ASSETS[GAME_TYPE.MATCHING]['css'] + GAME_ASSETS[GAME_TYPE.MATCHING]['js']
+        ]
+
+    def test_url_mode_self_hosts_font(self):
+        """Test URL mode preloads the regular Inter weight and declares every weight with swap."""
+        frag = Fragment()
+
+        add_game_assets(frag, self.xblock, GAME_TYPE.FLASHCARDS)
+
+        preload, font_css = frag.resources[0], frag.resources[1]
+        assert preload.placement == 'head'
+        assert preload.mimetype == 'text/html'
+        assert 'rel="preload" as="font"' in preload.data
+        assert f'/xblock/resource/games/{fingerprinted_uri(PRELOADED_FONT)}' in preload.data
+        assert font_css.mimetype == 'text/css'
+        assert font_css.data.count('@font-face') == len(FONT_ASSETS)
+        assert font_css.data.count('font-display:swap') == len(FONT_ASSETS)
+        for path in FONT_ASSETS:
+            assert fingerprinted_uri(path) in font_css.data
+
+    @override_settings(GAMESXBLOCK_ASSET_MODE=ASSET_MODE.INLINE)
+    def test_inline_mode(self):
+        """Test inline mode embeds the asset text."""
+        frag = Fragment()
+
+        add_game_assets(frag, self.xblock, GAME_TYPE.FLASHCARDS)
+
+        assert [r.kind for r in frag.resources] == ['text'] * 3
+        assert frag.resources[0].data == load_asset('css/flashcards.css')[0]
+        self.xblock.runtime.local_resource_url.assert_not_called()
+
+    def test_falls_back_to_inline_without_runtime_support(self):
+        """Test assets are inlined when the runtime cannot serve local resources."""
+        self.xblock.runtime.local_resource_url.side_effect = NotImplementedError
+        frag = Fragment()
+
+        add_game_assets(frag, self.xblock, GAME_TYPE.MATCHING)
+
+        assert [r.kind for r in frag.resources] == ['text'] * 5
+
+
+class TestOpenLocalResource:
+    """Test cases for serving fingerprinted assets from the XBlock."""
+
+    def test_serves_fingerprinted_asset(self):
+        """Test a fingerprinted URI opens the packaged asset."""
+        with GamesXBlock.open_local_resource(fingerprinted_uri('css/confetti.css')) as resource:
+            assert resource.read() == resources.read_bytes('static/css/confetti.css')
+
+    def test_serves_fingerprinted_font(self):
+        """Test self-hosted fonts are served under their fingerprinted URI."""
+        with GamesXBlock.open_local_resource(fingerprinted_uri(PRELOADED_FONT)) as resource:
+            assert resource.read() == resources.read_bytes(f'static/{PRELOADED_FONT}')
+
+    def test_rejects_other_files(self):
+        """Test non-asset files are not served."""
+        with pytest.raises(DisallowedFileError):
+            GamesXBlock.open_local_resource(b'static/html/matching.html')
+
+    def test_rejects_stale_fingerprint(self):
+        """Test an asset requested under another build's hash is not served."""
+        uri = fingerprinted_uri('css/confetti.css')
+        stale = uri.replace(load_asset('css/confetti.css')[1], 'f' * 12)
+
+        with pytest.raises(DisallowedFileError):
+            GamesXBlock.open_local_resource(stale)
@@ -0,0 +1,99 @@
+"""
+Unit tests for card_import.py - streaming CSV/TSV card import.
+"""
+
+import io
+
+import pytest
+
+from games.card_import import MAX_REPORTED_ERRORS, CardImportError, get_delimiter, read_cards
+from games.constants import CARD_FIELD
+
+
+def _stream(text):
+    """Return a binary stream of UTF-8 text."""
+    return io.BytesIO(text.encode('utf-8'))
+
+
+class TestGetDelimiter:
+    """Test cases for get_delimiter."""
+
+    @pytest.mark.parametrize('file_name,delimiter', [('deck.csv', ','), ('DECK.TSV', '\t'), ('deck.txt', '\t')])
+    def test_supported_extensions(self, file_name, delimiter):
+        """Test the delimiter follows the file extension."""
+        assert get_delimiter(file_name) == delimiter
+
+    @pytest.mark.parametrize('file_name', ['deck.xlsx', 'deck'])
+    def test_unsupported_extensions(self, file_name):
+        """Test other files are rejected."""
+        with pytest.raises(CardImportError):
+            get_delimiter(file_name)
+
+
+class TestReadCards:
+    """Test cases for read_cards."""
+
+    def test_reads_cards_with_keys_and_order(self):
+        """Test rows become cards with generated keys and sequential order."""
+        data = '﻿Definition,Term,term_image\n"Café, au lait",coffee,http://img/c.png\n\nwater,eau,\n'
+
+        cards = read_cards(_stream(data), ',', start_order=3)
+
+        assert [card[CARD_FIELD.TERM] for card in cards] == ['coffee', 'eau']
+        assert cards[0][CARD_FIELD.DEFINITION] == 'Café, au lait'
+        assert cards[0][CARD_FIELD.TERM_IMAGE] == 'http://img/c.png'
+        assert cards[1][CARD_FIELD.DEFINITION_IMAGE] == ''
+        assert [card[CARD_FIELD.ORDER] for card in cards] == [3, 4]
+        assert len({card[CARD_FIELD.CARD_KEY] for card in cards}) == 2
+
+    def test_keeps_card_keys_from_file(self):
+        """Test a card_key column is used when present."""
+        cards = read_cards(_stream('term\tdefinition\tcard_key\na\tb\tkey-1\n'), '\t')
+
+        assert cards[0][CARD_FIELD.CARD_KEY] == 'key-1'
+
+    def test_reports_row_errors(self):
+        """Test every invalid row is reported with its line number."""
+        data = 'term,definition,card_key\na,b,k1\n,missing term,\nc,d,k1\ne,f,,extra\nexisting,g,old\n'
+
+        with pytest.raises(CardImportError) as error:
+            read_cards(_stream(data), ',', existing_keys={'old'})
+
+        assert error.value.error_count == 4
+        assert [row['row'] for row in error.value.row_errors] == [3, 4, 5, 6]
+        assert 'term and definition' in error.value.row_errors[0]['error']
+        assert 'Duplicate' in error.value.row_errors[1]['error']
+
+    def test_caps_reported_errors(self):
+        """Test the error list is capped while the count stays exact."""
+        data = 'term,definition\n' + 'a,\n' * (MAX_REPORTED_ERRORS + 10)
+
+        with pytest.raises(CardImportError) as error:
+            read_cards(_stream(data), ',')
+
+        assert error.value.error_count == MAX_REPORTED_ERRORS + 10
+        assert len(error.value.row_errors) == MAX_REPORTED_ERRORS
+
+    @pytest.mark.parametrize('header', ['term\n', 'term,definition,notes\n', ''])
+    def test_rejects_bad_header(self, header):
+        """Test the header must name the required columns and nothing unknown."""
+        with pytest.raises(CardImportError):
+            read_cards(_stream(header + 'a,b\n'), ',')
+
+    def test_rejects_too_many_cards(self):
+        """Test the card limit stops the import."""
+        with pytest.raises(CardImportError, match='limit'):
+            read_cards(_stream('term,definition\na,b\nc,d\n'), ',', max_cards=1)
+
+    def test_rejects_invalid_utf8(self):
+        """Test undecodable input is reported instead of raising UnicodeDecodeError."""
+        with pytest.raises(CardImportError, match='UTF-8'):
+            read_cards(io.BytesIO(b'term,definition\n\xff\xfe,b\n'), ',')
+
+    def test_leaves_upload_open(self):
+        """Test the caller's file object is not closed by parsing."""
+        stream = _stream('term,definition\na,b\n')
+
+        read_cards(stream, ',')
+
+        assert not stream.closed
@@ -194,6 +194,30 @@ class TestGamesXBlockHandlers:
         mock_handler.assert_called_once_with(self.block, mock_request, '')
         assert result == mock_response
 
+    @patch('games.handlers.common.CommonHandlers.upload_images')
+    def test_upload_images_handler(self, mock_handler):
+        """Test upload_images handler delegates to CommonHandlers."""
+        mock_response = Mock()
+        mock_handler.return_value = mock_response
+
+        mock_request = Mock()
+        result = self.block.upload_images(mock_request, '')
+
+        mock_handler.assert_called_once_with(self.block, mock_request, '')
+        assert result == mock_response
+
+    @patch('games.handlers.common.CommonHandlers.import_cards')
+    def test_import_cards_handler(self, mock_handler):
+        """Test import_cards handler delegates to CommonHandlers."""
+        mock_response = Mock()
+        mock_handler.return_value = mock_response
+
+        mock_request = Mock()
+        result = self.block.import_cards(mock_request, '')
+
+        mock_handler.assert_called_once_with(self.block, mock_request, '')
+        assert result == mock_response
+
     @patch('games.handlers.matching.MatchingHandlers.complete_matching_game')
     def test_complete_matching_game_handler(self, mock_handler):
         """Test complete_matching_game handler delegates to MatchingHandlers."""
@@ -235,6 +259,78 @@ class TestGamesXBlockHandlers:
         # Result is a Response object
         assert result.status == '200 OK'
 
+    @patch('games.handlers.matching.MatchingHandlers.get_matching_page')
+    def test_get_matching_page_handler(self, mock_handler):
+        """Test get_matching_page handler delegates to MatchingHandlers."""
+        mock_handler.return_value = {'success': True}
+
+        mock_request = Mock()
+        mock_request.method = 'POST'
+        mock_request.body = json.dumps({'page': 1}).encode('utf-8')
+
+        result = self.block.get_matching_page(mock_request, '')
+
+        mock_handler.assert_called_once_with(self.block, {'page': 1}, '')
+        assert result.status == '200 OK'
+
+    @patch('games.handlers.common.CommonHandlers.delete_images')
+    def test_delete_images_handler(self, mock_handler):
+        """Test delete_images handler delegates to CommonHandlers."""
+        mock_handler.return_value = {'success': True}
+        data = {'keys': ['games/test-block-id/a.png']}
+
+        mock_request = Mock()
+        mock_request.method = 'POST'
+        mock_request.body = json.dumps(data).encode('utf-8')
+
+        result = self.block.delete_images(mock_request, '')
+
+        mock_handler.assert_called_once_with(self.block, data, '')
+        assert result.status == '200 OK'
+
+    @patch('games.handlers.common.CommonHandlers.patch_cards')
+    def test_patch_cards_handler(self, mock_handler):
+        """Test patch_cards handler delegates to CommonHandlers."""
+        mock_handler.return_value = {'success': True}
+        data = {'cards_version': 0, 'operations': []}
+
+        mock_request = Mock()
+        mock_request.method = 'POST'
+        mock_request.body = json.dumps(data).encode('utf-8')
+
+        result = self.block.patch_cards(mock_request, '')
+
+        mock_handler.assert_called_once_with(self.block, data, '')
+        assert result.status == '200 OK'
+
+    @patch('games.handlers.matching.MatchingHandlers.reshuffle_matching_game')
+    def test_reshuffle_matching_game_handler(self, mock_handler):
+        """Test reshuffle_matching_game handler delegates to MatchingHandlers."""
+        mock_handler.return_value = {'success': True}
+
+        mock_request = Mock()
+        mock_request.method = 'POST'
+        mock_request.body = json.dumps({}).encode('utf-8')
+
+        result = self.block.reshuffle_matching_game(mock_request, '')
+
+        mock_handler.assert_called_once_with(self.block, {}, '')
+        assert result.status == '200 OK'
+
+    @patch('games.handlers.flashcards.FlashcardsHandlers.get_flashcards_window')
+    def test_get_flashcards_window_handler(self, mock_handler):
+        """Test get_flashcards_window handler delegates to FlashcardsHandlers."""
+        mock_handler.return_value = {'success': True}
+
+        mock_request = Mock()
+        mock_request.method = 'POST'
+        mock_request.body = json.dumps({'cursor': 'abc'}).encode('utf-8')
+
+        result = self.block.get_flashcards_window(mock_request, '')
+
+        mock_handler.assert_called_once_with(self.block, {'cursor': 'abc'}, '')
+        assert result.status == '200 OK'
+
 
 @pytest.mark.django_db
 class TestGamesXBlockFieldScopes:
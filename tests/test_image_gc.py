@@ -0,0 +1,258 @@
+"""
+Unit tests for image_gc.py and the collect_game_images management command.
+"""
+
+import os
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import Mock, patch
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+
+from games.constants import CARD_FIELD
+from games.image_gc import (
+    content_path,
+    delete_paths,
+    find_content_orphans,
+    find_orphans,
+    image_stem,
+    is_content_path,
+    list_block_images,
+    pending_marker_path,
+    ref_marker_path,
+    referenced_stems,
+    touch_marker,
+    update_refs,
+)
+
+KEPT = '0' * 32
+ORPHAN = '1' * 32
+
+
+def _cards(*stems):
+    """Return cards whose term images point at uploads with the given stems."""
+    return [
+        {CARD_FIELD.TERM: 't', CARD_FIELD.TERM_IMAGE: f'https://cdn.example.com/games/block/{stem}.png?v=1'}
+        for stem in stems
+    ]
+
+
+@pytest.fixture(name='storage')
+def fixture_storage(tmp_path):
+    """Return a storage holding a referenced image with a variant, and an orphan with a variant."""
+    storage = FileSystemStorage(location=str(tmp_path))
+    for name, size in ((f'{KEPT}.png', 10), (f'{KEPT}_w200.webp', 4), (f'{ORPHAN}.jpg', 30), (f'{ORPHAN}_w200.webp', 5)):
+        storage.save(f'games/block/{name}', ContentFile(b'x' * size))
+    return storage
+
+
+class TestImageGc:
+    """Test cases for finding and deleting orphaned images."""
+
+    @pytest.mark.parametrize('value', [
+        f'games/block/{KEPT}.png',
+        f'games/block/{KEPT}_w400.webp',
+        f'https://cdn.example.com/media/games/block/{KEPT}.PNG?X-Amz-Signature=abc',
+    ])
+    def test_image_stem(self, value):
+        """Test uploads, variants and their URLs share one stem."""
+        assert image_stem(value) == KEPT
+
+    def test_referenced_stems_across_versions(self):
+        """Test images from every card list count as referenced."""
+        stems = referenced_stems([_cards(KEPT), [{CARD_FIELD.DEFINITION_IMAGE: f'/m/{ORPHAN}.jpg'}], None])
+
+        assert stems == {KEPT, ORPHAN}
+
+    def test_find_orphans(self, storage):
+        """Test unreferenced uploads and their variants are orphans."""
+        orphans, stale = find_orphans(storage, 'block', {KEPT})
+
+        assert sorted(orphans) == [f'games/block/{ORPHAN}.jpg', f'games/block/{ORPHAN}_w200.webp']
+        assert stale == []
+
+    def test_find_orphans_keeps_recent_uploads(self, storage):
+        """Test objects newer than min_age are kept."""
+        old = time.time() - 3 * 3600
+        os.utime(storage.path(f'games/block/{ORPHAN}.jpg'), (old, old))
+
+        orphans, _ = find_orphans(storage, 'block', {KEPT}, min_age=timedelta(hours=2))
+
+        assert orphans == [f'games/block/{ORPHAN}.jpg']
+
+    def test_find_orphans_keeps_recent_reuploads(self, storage):
+        """Test an old object re-uploaded since min_age is kept, and old pending markers are stale."""
+        old = time.time() - 3 * 3600
+        for name in (f'{ORPHAN}.jpg', f'{ORPHAN}_w200.webp'):
+            os.utime(storage.path(f'games/block/{name}'), (old, old))
+        touch_marker(storage, pending_marker_path('block', ORPHAN))
+        touch_marker(storage, pending_marker_path('block', KEPT))
+        os.utime(storage.path(pending_marker_path('block', KEPT)), (old, old))
+
+        orphans, stale = find_orphans(storage, 'block', {KEPT}, min_age=timedelta(hours=2))
+
+        assert orphans == []
+        assert stale == [pending_marker_path('block', KEPT)]
+        assert pending_marker_path('block', ORPHAN) not in list_block_images(storage, 'block')
+
+    def test_list_missing_prefix(self, storage):
+        """Test a block without uploads has no images."""
+        assert list_block_images(storage, 'other-block') == []
+
+    def test_delete_paths_reports_bytes(self, storage):
+        """Test deletes remove the objects and total their sizes."""
+        paths = [f'games/block/{ORPHAN}.jpg', f'games/block/{ORPHAN}_w200.webp']
+
+        result = delete_paths(storage, paths, workers=2)
+
+        assert result == {'deleted': paths, 'failed': {}, 'bytes': 35}
+        assert not storage.exists(paths[0])
+
+    def test_delete_paths_dry_run(self, storage):
+        """Test a dry run measures without deleting."""
+        path = f'games/block/{ORPHAN}.jpg'
+
+        assert delete_paths(storage, [path], dry_run=True)['bytes'] == 30
+        assert storage.exists(path)
+
+    def test_delete_paths_collects_failures(self):
+        """Test a failed delete is reported without stopping the others."""
+        def delete(path):
+            if path == 'b':
+                raise OSError('denied')
+
+        storage = Mock()
+        storage.delete.side_effect = delete
+
+        result = delete_paths(storage, ['a', 'b', 'a'], measure=False)
+
+        assert result == {'deleted': ['a'], 'failed': {'b': 'denied'}, 'bytes': 0}
+
+
+def _content_cards(*stems):
+    """Return cards whose term images point at shared content-addressed uploads."""
+    return [
+        {CARD_FIELD.TERM: 't', CARD_FIELD.TERM_IMAGE: f'https://cdn.example.com/{content_path(stem, "png")}'}
+        for stem in stems
+    ]
+
+
+class TestContentAddressedStore:
+    """Test cases for the shared content-addressed layout and its reference index."""
+
+    def test_content_path(self):
+        """Test shared images are sharded by the first two hash characters."""
+        assert content_path(KEPT, 'png') == f'games/cas/00/{KEPT}.png'
+        assert is_content_path(f'https://cdn.example.com/media/games/cas/00/{KEPT}.png')
+        assert not is_content_path(f'games/block/{KEPT}.png')
+
+    def test_update_refs_adds_and_removes_markers(self, storage):
+        """Test markers follow the content images the cards reference."""
+        update_refs(storage, 'usage-1', [], _content_cards(KEPT, ORPHAN) + _cards(KEPT))
+        assert storage.exists(ref_marker_path(KEPT, 'usage-1'))
+        assert storage.exists(ref_marker_path(ORPHAN, 'usage-1'))
+
+        added, removed = update_refs(storage, 'usage-1', _content_cards(KEPT, ORPHAN), _content_cards(KEPT))
+
+        assert (added, removed) == ([], [ORPHAN])
+        assert storage.exists(ref_marker_path(KEPT, 'usage-1'))
+        assert not storage.exists(ref_marker_path(ORPHAN, 'usage-1'))
+
+    def test_find_content_orphans(self, storage):
+        """Test shared images stay while a scanned card or an unscanned usage's marker references them."""
+        shared, unscanned, orphan = '2' * 32, '3' * 32, '4' * 32
+        for stem in (shared, unscanned, orphan):
+            storage.save(content_path(stem, 'png'), ContentFile(b'img'))
+        update_refs(storage, 'library-usage', [], _content_cards(unscanned))
+        update_refs(storage, 'usage-1', [], _content_cards(orphan))
+
+        orphans, stale = find_content_orphans(storage, {'usage-1': [_content_cards(shared)], 'usage-2': [[]]})
+
+        assert orphans == [content_path(orphan, 'png')]
+        assert stale == [ref_marker_path(orphan, 'usage-1')]
+
+    def test_find_content_orphans_keeps_fresh_markers(self, storage):
+        """Test a shared image whose marker of a scanned usage is newer than min_age is kept."""
+        reuploaded = '5' * 32
+        storage.save(content_path(reuploaded, 'png'), ContentFile(b'img'))
+        old = time.time() - 3 * 3600
+        os.utime(storage.path(content_path(reuploaded, 'png')), (old, old))
+        touch_marker(storage, ref_marker_path(reuploaded, 'usage-1'))
+
+        usages = {'usage-1': [[]]}
+        assert find_content_orphans(storage, usages, min_age=timedelta(hours=2)) == ([], [])
+
+        os.utime(storage.path(ref_marker_path(reuploaded, 'usage-1')), (old, old))
+        orphans, stale = find_content_orphans(storage, usages, min_age=timedelta(hours=2))
+        assert orphans == [content_path(reuploaded, 'png')]
+        assert stale == [ref_marker_path(reuploaded, 'usage-1')]
+
+    def test_find_content_orphans_without_store(self, storage):
+        """Test nothing is found when the layout has never been used."""
+        assert find_content_orphans(storage, {}) == ([], [])
+
+
+class TestCollectGameImagesCommand:
+    """Test cases for the collect_game_images management command."""
+
+    def _run(self, storage, blocks, *args):
+        """Run the command over the given (block_id, cards) pairs and return its output."""
+        out = StringIO()
+        with patch('games.management.commands.collect_game_images.get_gamesxblock_storage', return_value=storage), \
+                patch('games.management.commands.collect_game_images.Command.iter_game_blocks', return_value=blocks):
+            call_command('collect_game_images', '--min-age-hours', '0', *args, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run(self, storage):
+        """Test a dry run lists orphans and the bytes it would reclaim."""
+        output = self._run(storage, [('block', 'usage-1', _cards(KEPT))], '--dry-run')
+
+        assert f'Would delete games/block/{ORPHAN}.jpg' in output
+        assert 'Would reclaim 35 bytes from 2 orphaned images in 1 games blocks' in output
+        assert storage.exists(f'games/block/{ORPHAN}.jpg')
+
+    def test_deletes_orphans_unreferenced_by_any_version(self, storage):
+        """Test images referenced by any version of a block survive."""
+        blocks = [('block', 'usage-1', _cards(KEPT)), ('block', 'usage-2', [])]
+
+        output = self._run(storage, blocks)
+
+        assert 'Reclaimed 35 bytes from 2 orphaned images' in output
+        assert sorted(list_block_images(storage, 'block')) == [f'games/block/{KEPT}.png', f'games/block/{KEPT}_w200.webp']
+
+    def test_keeps_images_shared_with_copied_blocks(self, storage):
+        """Test an image dropped by its block is kept while a duplicated block still uses its URL."""
+        blocks = [('block', 'usage-1', _cards(KEPT)), ('copy', 'usage-copy', _cards(ORPHAN))]
+
+        output = self._run(storage, blocks)
+
+        assert 'Reclaimed 0 bytes from 0 orphaned images in 2 games blocks' in output
+        assert storage.exists(f'games/block/{ORPHAN}.jpg')
+
+    def test_collects_shared_images(self, storage):
+        """Test unreferenced shared images and their stale markers are deleted."""
+        shared, orphan = '2' * 32, '4' * 32
+        for stem in (shared, orphan):
+            storage.save(content_path(stem, 'png'), ContentFile(b'img'))
+        update_refs(storage, 'usage-1', [], _content_cards(orphan))
+
+        output = self._run(storage, [('block', 'usage-1', _content_cards(shared) + _cards(KEPT, ORPHAN))])
+
+        assert f'Deleted {content_path(orphan, "png")}' in output
+        assert storage.exists(content_path(shared, 'png'))
+        assert not storage.exists(ref_marker_path(orphan, 'usage-1'))
+
+    def test_min_age_defaults_to_a_day(self, storage):
+        """Test fresh uploads are kept by default."""
+        out = StringIO()
+        with patch('games.management.commands.collect_game_images.get_gamesxblock_storage', return_value=storage), \
+                patch('games.management.commands.collect_game_images.Command.iter_game_blocks',
+                      return_value=[('block', 'usage-1', [])]):
+            call_command('collect_game_images', stdout=out)
+
+        assert 'Reclaimed 0 bytes from 0 orphaned images' in out.getvalue()
+        assert storage.exists(f'games/block/{ORPHAN}.jpg')
@@ -0,0 +1,220 @@
+"""
+Unit tests for images.py - resized image variants.
+"""
+
+import io
+from io import StringIO
+from unittest.mock import Mock, patch
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.management import CommandError, call_command
+from django.test import override_settings
+from PIL import Image
+
+from games import images
+from games.image_gc import content_path, ref_marker_path
+from games.images import (
+    build_srcset,
+    create_derivatives,
+    derivative_path,
+    get_derivative_settings,
+    schedule_derivatives,
+    shutdown_derivative_executor,
+)
+
+IMAGE_PATH = 'games/block/0123456789abcdef0123456789abcdef.png'
+IMAGE_URL = f'https://cdn.example.com/{IMAGE_PATH}'
+
+
+def _png(width, height, mode='RGB'):
+    """Return PNG bytes of a solid image of the given size."""
+    buffer = io.BytesIO()
+    Image.new(mode, (width, height), 'red').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class TestDerivativeSettings:
+    """Test cases for reading GAMESXBLOCK_IMAGE_DERIVATIVES."""
+
+    def test_off_by_default(self):
+        """Test variants are off unless configured."""
+        assert get_derivative_settings() is None
+
+    @override_settings(GAMESXBLOCK_IMAGE_DERIVATIVES=True)
+    def test_true_uses_defaults(self):
+        """Test True enables the default widths and format."""
+        assert get_derivative_settings() == {'widths': (200, 400, 800), 'format': 'webp', 'quality': 80, 'workers': 2}
+
+    @override_settings(GAMESXBLOCK_IMAGE_DERIVATIVES={'widths': [640, 320], 'format': 'AVIF'})
+    def test_dict_overrides_defaults(self):
+        """Test a dict overrides individual settings; widths are sorted."""
+        derivative_settings = get_derivative_settings()
+
+        assert derivative_settings['widths'] == (320, 640)
+        assert derivative_settings['format'] == 'avif'
+        assert derivative_settings['quality'] == 80
+
+    @override_settings(GAMESXBLOCK_IMAGE_DERIVATIVES=True)
+    def test_off_without_pillow(self):
+        """Test variants stay off when Pillow is not installed."""
+        with patch.object(images, 'pillow_available', return_value=False):
+            assert get_derivative_settings() is None
+
+
+class TestSrcset:
+    """Test cases for variant naming and srcset strings."""
+
+    def test_derivative_path(self):
+        """Test variants sit next to the original with the width in the name."""
+        assert derivative_path(IMAGE_PATH, 400, 'webp') == IMAGE_PATH[:-4] + '_w400.webp'
+
+    @override_settings(GAMESXBLOCK_IMAGE_DERIVATIVES={'widths': [200, 400]})
+    def test_build_srcset_for_uploaded_image(self):
+        """Test an uploaded image URL gets one candidate per width."""
+        stem = IMAGE_URL[:-4]
+
+        assert build_srcset(IMAGE_URL) == f'{stem}_w200.webp 200w, {stem}_w400.webp 400w'
+
+    @override_settings(GAMESXBLOCK_IMAGE_DERIVATIVES=True)
+    @pytest.mark.parametrize('url', [
+        '',
+        'https://example.com/photo.png',
+        IMAGE_URL + '?signature=abc',
+        IMAGE_URL[:-4] + '.gif',
+    ])
+    def test_build_srcset_skips_other_urls(self, url):
+        """Test external, signed and non-raster URLs get no srcset."""
+        assert build_srcset(url) == ''
+
+    def test_build_srcset_off(self):
+        """Test no srcset is built while variants are off."""
+        assert build_srcset(IMAGE_URL) == ''
+
+
+class TestCreateDerivatives:
+    """Test cases for generating variants into storage."""
+
+    @pytest.fixture(autouse=True)
+    def _storage(self, tmp_path, settings):
+        """Enable two variant widths and provide a file system storage in a temporary directory."""
+        settings.GAMESXBLOCK_IMAGE_DERIVATIVES = {'widths': [200, 400]}
+        self.storage = FileSystemStorage(location=str(tmp_path))
+
+    def test_resizes_to_each_width(self):
+        """Test each variant is written at its width, keeping the aspect ratio."""
+        self.storage.save(IMAGE_PATH, ContentFile(_png(1000, 500)))
+
+        created = create_derivatives(self.storage, IMAGE_PATH)
+
+        assert created == [derivative_path(IMAGE_PATH, width, 'webp') for width in (200, 400)]
+        with self.storage.open(created[1]) as variant, Image.open(variant) as image:
+            assert image.format == 'WEBP'
+            assert image.size == (400, 200)
+
+    def test_never_enlarges(self):
+        """Test variants of a small image keep its size."""
+        self.storage.save(IMAGE_PATH, ContentFile(_png(300, 100, mode='P')))
+
+        created = create_derivatives(self.storage, IMAGE_PATH)
+
+        with self.storage.open(created[1]) as variant, Image.open(variant) as image:
+            assert image.size == (300, 100)
+
+    def test_existing_variants_are_kept(self):
+        """Test variants already in storage are not regenerated."""
+        self.storage.save(IMAGE_PATH, ContentFile(_png(1000, 500)))
+        create_derivatives(self.storage, IMAGE_PATH)
+
+        assert create_derivatives(self.storage, IMAGE_PATH) == []
+
+    def test_scheduled_in_background(self):
+        """Test schedule_derivatives runs on the thread pool and returns a future."""
+        self.storage.save(IMAGE_PATH, ContentFile(_png(1000, 500)))
+        try:
+            future = schedule_derivatives(self.storage, IMAGE_PATH)
+            assert len(future.result(timeout=30)) == 2
+        finally:
+            shutdown_derivative_executor()
+
+    def test_scheduled_failures_are_logged(self):
+        """Test a broken image is logged rather than raised from the worker."""
+        self.storage.save(IMAGE_PATH, ContentFile(b'not an image'))
+        try:
+            with patch.object(images.log, 'exception') as mock_log:
+                assert schedule_derivatives(self.storage, IMAGE_PATH).result(timeout=30) == []
+            mock_log.assert_called_once()
+        finally:
+            shutdown_derivative_executor()
+
+    def test_vector_and_animated_formats_are_not_scheduled(self):
+        """Test only raster formats get variants."""
+        storage = Mock()
+
+        assert schedule_derivatives(storage, IMAGE_PATH[:-4] + '.svg') is None
+        assert schedule_derivatives(storage, IMAGE_PATH[:-4] + '.gif') is None
+        storage.open.assert_not_called()
+
+
+class TestCreateGameImageVariantsCommand:
+    """Test cases for the create_game_image_variants management command."""
+
+    CONTENT_PATH = content_path('f' * 32, 'jpg')
+
+    @pytest.fixture(autouse=True)
+    def _storage(self, tmp_path):
+        """Provide a storage with uploads in both layouts, a GIF and a reference marker."""
+        self.storage = FileSystemStorage(location=str(tmp_path))
+        self.storage.save(IMAGE_PATH, ContentFile(_png(1000, 500)))
+        self.storage.save(IMAGE_PATH[:-4] + '.gif', ContentFile(b'GIF89a'))
+        buffer = io.BytesIO()
+        Image.new('RGB', (600, 300), 'blue').save(buffer, format='JPEG')
+        self.storage.save(self.CONTENT_PATH, ContentFile(buffer.getvalue()))
+        self.storage.save(ref_marker_path('f' * 32, 'usage-1'), ContentFile(b''))
+
+    def _run(self, *args):
+        """Run the command against the test storage and return its output."""
+        out = StringIO()
+        with patch('games.management.commands.create_game_image_variants.get_gamesxblock_storage',
+                   return_value=self.storage):
+            call_command('create_game_image_variants', *args, stdout=out)
+        return out.getvalue()
+
+    def test_backfills_both_layouts_while_variants_are_off(self):
+        """Test the default variants are created for block and shared uploads before the setting is on."""
+        output = self._run()
+
+        assert 'Created 6 variants for 2 of 2 images (0 failures)' in output
+        for path in (IMAGE_PATH, self.CONTENT_PATH):
+            for width in (200, 400, 800):
+                assert self.storage.exists(derivative_path(path, width, 'webp'))
+
+    @override_settings(GAMESXBLOCK_IMAGE_DERIVATIVES={'widths': [200, 400], 'format': 'png'})
+    def test_uses_settings_and_skips_existing_variants(self):
+        """Test the configured variants are used, --widths overrides them, and existing ones are kept."""
+        create_derivatives(self.storage, IMAGE_PATH)
+
+        assert '1 of 2 images are missing variants' in self._run('--dry-run')
+        output = self._run('--widths', '200')
+
+        assert 'Created 1 variants for 1 of 2 images' in output
+        assert self.storage.exists(derivative_path(self.CONTENT_PATH, 200, 'png'))
+        assert not self.storage.exists(derivative_path(self.CONTENT_PATH, 400, 'png'))
+
+    def test_reports_failures(self):
+        """Test an unreadable image is reported and the others are still processed."""
+        self.storage.delete(IMAGE_PATH)
+        self.storage.save(IMAGE_PATH, ContentFile(b'not an image'))
+        err = StringIO()
+        with patch('games.management.commands.create_game_image_variants.get_gamesxblock_storage',
+                   return_value=self.storage):
+            call_command('create_game_image_variants', stdout=StringIO(), stderr=err)
+
+        assert f'Failed to create variants of {IMAGE_PATH}' in err.getvalue()
+        assert self.storage.exists(derivative_path(self.CONTENT_PATH, 200, 'webp'))
+
+    def test_requires_pillow(self):
+        """Test the command stops when Pillow is not installed."""
+        with patch.object(images, 'pillow_available', return_value=False), pytest.raises(CommandError):
+            self._run()
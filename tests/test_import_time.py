@@ -0,0 +1,49 @@
+"""
+Tests for the cold-start import budget of the Games XBlock.
+"""
+
+from benchmarks.import_time import (
+    cumulative_ms,
+    deferred_modules_imported,
+    parse_importtime,
+    run_importtime,
+)
+
+SAMPLE_OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:       858 |        858 |       games.constants
+import time:       629 |      16398 |         cryptography.fernet
+import time:      2648 |     242463 | games
+"""
+
+
+class TestImportTimeParsing:
+    """Test cases for parsing -X importtime output."""
+
+    def test_parse_importtime(self):
+        """Test the header is skipped and rows are parsed."""
+        rows = parse_importtime(SAMPLE_OUTPUT)
+
+        assert rows == [
+            ('games.constants', 858, 858),
+            ('cryptography.fernet', 629, 16398),
+            ('games', 2648, 242463),
+        ]
+        assert cumulative_ms(rows) == 242.463
+
+    def test_deferred_modules_match_submodules(self):
+        """Test submodules of deferred packages are reported."""
+        rows = parse_importtime(SAMPLE_OUTPUT)
+
+        assert deferred_modules_imported(rows) == ['cryptography.fernet']
+        assert deferred_modules_imported(rows, deferred=('crypto',)) == []
+
+
+class TestImportBudget:
+    """Test that importing the package stays within its import budget."""
+
+    def test_heavy_modules_are_not_imported_at_load(self):
+        """Test crypto, storage, template and pkg_resources modules are loaded lazily."""
+        rows = run_importtime('games')
+
+        assert deferred_modules_imported(rows) == []
@@ -0,0 +1,58 @@
+"""
+Tests for the concurrent load-test harness.
+"""
+
+import argparse
+
+import pytest
+
+from benchmarks.load_test import TRAFFIC_MIX, parse_mix, percentile, run_load, summarize
+
+
+class TestLoadTestReport:
+    """Test cases for the load-test statistics."""
+
+    def test_percentile_uses_nearest_rank(self):
+        """Test percentiles pick an observed value."""
+        values = list(range(1, 101))
+
+        assert percentile(values, 0.50) == 50
+        assert percentile(values, 0.95) == 95
+        assert percentile(values, 0.99) == 99
+        assert percentile([7], 0.99) == 7
+
+    def test_summarize_per_handler_and_total(self):
+        """Test counts, errors and throughput are reported per handler and overall."""
+        samples = [
+            ("student_view", 0.0, 0.5, True),
+            ("student_view", 0.5, 0.25, False),
+            ("upload_image", 1.0, 1.0, True),
+        ]
+
+        summary = summarize(samples)
+
+        assert summary["student_view"]["requests"] == 2
+        assert summary["student_view"]["errors"] == 1
+        assert summary["student_view"]["throughput"] == 1.0
+        assert summary["upload_image"]["p99_ms"] == 1000.0
+        assert summary["all"]["requests"] == 3
+        assert summary["all"]["p50_ms"] == 500.0
+
+    def test_parse_mix(self):
+        """Test weights are parsed and unknown handlers are rejected."""
+        assert parse_mix(["upload_image=0", "refresh_game=3"]) == {"upload_image": 0, "refresh_game": 3}
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_mix(["get_settings=1"])
+
+
+class TestLoadTestRun:
+    """Test the harness against the real handlers."""
+
+    def test_mixed_traffic_succeeds(self, tmp_path):
+        """Test every call in the mix succeeds on the local runtime with concurrent learners."""
+        samples = run_load(10, 2, 40, str(tmp_path), session_length=20, image_size=256)
+
+        assert len(samples) == 40
+        assert {handler for handler, _, _, _ in samples} == set(TRAFFIC_MIX)
+        assert all(ok for _, _, _, ok in samples)
+        assert any(tmp_path.rglob("*.png"))
@@ -0,0 +1,102 @@
+"""
+Unit tests for payload.py - embedded game data encoding.
+"""
+
+import base64
+import json
+import re
+
+import pytest
+from django.test import override_settings
+
+from games import resources
+from games.constants import PAYLOAD_ENCODING
+from games.payload import (
+    COMPACT_KEYS,
+    DEFLATE_PREFIX,
+    decode_payload,
+    encode_payload,
+    get_payload_encoding,
+)
+
+FLASHCARDS_PAYLOAD = {
+    'cards': [
+        {
+            'id': 'card-1',
+            'term': 'Café',
+            'definition': 'Une boisson chaude ☕ ' * 10,
+            'term_image': '',
+            'definition_image': 'https://example.com/games/block/abc.png',
+        },
+    ] * 20,
+    'salt': 'abcdefghijkl',
+}
+
+MATCHING_PAYLOAD = {
+    'key': 'gAAAAABtoken',
+    'pages': [
+        {
+            'left_items': [{'text': 'Python', 'index': 0}],
+            'right_items': [{'text': 'A programming language', 'index': 1}],
+        },
+    ],
+    'total_pages': 3,
+    'lazy': True,
+}
+
+
+class TestPayloadEncoding:
+    """Test cases for encode_payload and decode_payload."""
+
+    def test_default_encoding_is_base64_json(self):
+        """Test the default encoding matches the original base64(json) format."""
+        encoded = encode_payload(MATCHING_PAYLOAD)
+
+        assert encoded == base64.b64encode(json.dumps(MATCHING_PAYLOAD).encode()).decode()
+        assert decode_payload(encoded) == MATCHING_PAYLOAD
+
+    @pytest.mark.parametrize('payload', [FLASHCARDS_PAYLOAD, MATCHING_PAYLOAD])
+    def test_deflate_round_trip(self, payload):
+        """Test deflate payloads decode back to the original data."""
+        encoded = encode_payload(payload, PAYLOAD_ENCODING.DEFLATE)
+
+        assert encoded.startswith(DEFLATE_PREFIX)
+        assert decode_payload(encoded) == payload
+
+    def test_deflate_is_smaller(self):
+        """Test the deflate encoding is smaller than base64(json) for a realistic deck."""
+        plain = encode_payload(FLASHCARDS_PAYLOAD, PAYLOAD_ENCODING.BASE64_JSON)
+        compressed = encode_payload(FLASHCARDS_PAYLOAD, PAYLOAD_ENCODING.DEFLATE)
+
+        assert len(compressed) < len(plain) / 4
+
+    def test_deflate_uses_compact_keys(self):
+        """Test long keys are shortened before compression."""
+        import zlib  # pylint: disable=import-outside-toplevel
+
+        encoded = encode_payload(MATCHING_PAYLOAD, PAYLOAD_ENCODING.DEFLATE)
+        compact = json.loads(zlib.decompress(base64.b64decode(encoded[len(DEFLATE_PREFIX):])))
+
+        assert set(compact) == {'k', 'p', 'tp', 'z'}
+        assert set(compact['p'][0]) == {'l', 'r'}
+
+    @override_settings(GAMESXBLOCK_PAYLOAD_ENCODING=PAYLOAD_ENCODING.DEFLATE)
+    def test_encoding_from_settings(self):
+        """Test the encoding is read from GAMESXBLOCK_PAYLOAD_ENCODING."""
+        assert get_payload_encoding() == PAYLOAD_ENCODING.DEFLATE
+        assert encode_payload(MATCHING_PAYLOAD).startswith(DEFLATE_PREFIX)
+
+    @override_settings(GAMESXBLOCK_PAYLOAD_ENCODING='brotli')
+    def test_unknown_encoding(self):
+        """Test an unknown encoding raises ValueError."""
+        with pytest.raises(ValueError):
+            get_payload_encoding()
+
+    def test_js_decoder_keys_match(self):
+        """Test payload.js expands exactly the keys compacted by payload.py."""
+        source = resources.read_text('static/js/src/payload.js')
+        block = source[source.index('var EXPANDED_KEYS = {'):source.index('};', source.index('var EXPANDED_KEYS'))]
+        js_keys = dict(re.findall(r"(\w+): '(\w+)'", block))
+
+        assert js_keys == {short: full for full, short in COMPACT_KEYS.items()}
+        assert f"var DEFLATE_PREFIX = '{DEFLATE_PREFIX}';" in source
@@ -0,0 +1,186 @@
+"""
+Unit tests for profiling.py - sampled profiles of renders and handlers.
+"""
+
+import os
+import pstats
+from unittest.mock import Mock, patch
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from xblock.field_data import DictFieldData
+from xblock.fields import ScopeIds
+
+from games import profiling
+from games.constants import CARD_FIELD, GAME_TYPE
+from games.games import GamesXBlock
+from games.profiling import ProfileSampler, get_profile_sampler, profiled, reset_profile_sampler
+
+
+class RecordingProfiler:
+    """Profiler stand-in that records its calls and writes a small file."""
+
+    instances = []
+
+    def __init__(self):
+        self.calls = []
+        RecordingProfiler.instances.append(self)
+
+    def enable(self):
+        self.calls.append('enable')
+
+    def disable(self):
+        self.calls.append('disable')
+
+    def dump_stats(self, path):
+        with open(path, 'wb') as profile:
+            profile.write(b'x' * 100)
+
+
+def _make_block():
+    """Return a flashcards block with a small deck."""
+    cards = [{CARD_FIELD.CARD_KEY: 'key', CARD_FIELD.TERM: 'term', CARD_FIELD.DEFINITION: 'definition'}]
+    runtime = Mock(is_author_mode=False)
+    runtime.local_resource_url.side_effect = lambda block, uri: f'/resource/{uri}'
+    field_data = DictFieldData({'game_type': GAME_TYPE.FLASHCARDS, 'cards': cards})
+    return GamesXBlock(runtime, field_data, ScopeIds('user', 'games', 'definition', Mock(block_id='block:1/a')))
+
+
+@pytest.fixture(autouse=True)
+def _fresh_sampler():
+    """Rebuild the sampler from settings in every test."""
+    reset_profile_sampler()
+    yield
+    reset_profile_sampler()
+
+
+class TestProfiled:
+    """Test cases for profiling handler calls."""
+
+    @pytest.fixture(autouse=True)
+    def _profiling(self, settings, tmp_path):
+        """Profile every call into a temporary directory."""
+        self.directory = tmp_path / 'profiles'
+        settings.GAMESXBLOCK_PROFILING = {'directory': str(self.directory), 'sample_rate': 1}
+
+    def test_off_by_default(self, settings):
+        """Test calls are not profiled unless configured."""
+        settings.GAMESXBLOCK_PROFILING = None
+
+        _make_block().student_view()
+
+        assert get_profile_sampler() is None
+        assert not self.directory.exists()
+
+    def test_student_view_profile(self):
+        """Test a sampled render writes a readable cProfile file named after the handler and block."""
+        _make_block().student_view()
+
+        (profile,) = self.directory.iterdir()
+        assert profile.name.startswith('student_view-block_1_a-')
+        assert profile.name.endswith(f'-{os.getpid()}.prof')
+        assert pstats.Stats(str(profile)).total_calls > 0
+
+    def test_handler_profile(self):
+        """Test json handlers are profiled under their own name."""
+        response = _make_block().get_settings(Mock(method='POST', body=b'{}'))
+
+        assert response.status == '200 OK'
+        (profile,) = self.directory.iterdir()
+        assert profile.name.startswith('get_settings-')
+
+    def test_sample_rate(self, settings):
+        """Test calls outside the sampled fraction are not profiled."""
+        settings.GAMESXBLOCK_PROFILING = {'directory': str(self.directory), 'sample_rate': 0.5}
+
+        with patch.object(profiling.random, 'random', side_effect=[0.7, 0.2]):
+            _make_block().student_view()
+            _make_block().student_view()
+
+        assert len(list(self.directory.iterdir())) == 1
+
+    def test_rate_limit(self, settings):
+        """Test no more than max_per_minute profiles are written."""
+        settings.GAMESXBLOCK_PROFILING = {'directory': str(self.directory), 'sample_rate': 1, 'max_per_minute': 2}
+
+        for _ in range(4):
+            _make_block().student_view()
+
+        assert len(list(self.directory.iterdir())) == 2
+
+    def test_one_profile_at_a_time(self):
+        """Test a call made while another is being profiled runs unprofiled."""
+        sampler = get_profile_sampler()
+        assert sampler.acquire()
+        try:
+            _make_block().student_view()
+        finally:
+            sampler.release()
+
+        assert not self.directory.exists()
+
+    def test_disk_cap_deletes_oldest(self, settings):
+        """Test the oldest profiles are deleted to stay within max_bytes."""
+        settings.GAMESXBLOCK_PROFILING = {
+            'directory': str(self.directory),
+            'sample_rate': 1,
+            'max_bytes': 250,
+            'profiler': 'tests.test_profiling.RecordingProfiler',
+        }
+        self.directory.mkdir()
+        oldest = self.directory / 'old.prof'
+        oldest.write_bytes(b'x' * 100)
+        os.utime(oldest, (0, 0))
+        unrelated = self.directory / 'notes.txt'
+        unrelated.write_bytes(b'x' * 1000)
+
+        _make_block().student_view()
+        _make_block().student_view()
+
+        profiles = sorted(path.name for path in self.directory.glob('*.prof'))
+        assert len(profiles) == 2
+        assert 'old.prof' not in profiles
+        assert unrelated.exists()
+
+    def test_profiler_errors_do_not_fail_the_call(self, settings, monkeypatch):
+        """Test a profiler that cannot start or write leaves the call untouched."""
+        mock_log = Mock()
+        monkeypatch.setattr(profiling, 'log', mock_log)
+        sampler = get_profile_sampler()
+        sampler.profiler_factory = Mock(side_effect=ValueError('another profiler is active'))
+
+        assert _make_block().student_view().content
+
+        sampler.profiler_factory = RecordingProfiler
+        with patch.object(sampler, 'write', side_effect=OSError('disk full')):
+            assert _make_block().student_view().content
+
+        assert mock_log.exception.call_count == 2
+        assert RecordingProfiler.instances[-1].calls == ['enable', 'disable']
+        assert sampler.acquire()
+        sampler.release()
+
+    def test_exceptions_propagate(self):
+        """Test a failing call is profiled and its error re-raised."""
+        @profiled
+        def handler(block):
+            raise ValueError('boom')
+
+        with pytest.raises(ValueError):
+            handler(_make_block())
+
+        assert len(list(self.directory.iterdir())) == 1
+
+
+class TestSamplerSettings:
+    """Test cases for validating GAMESXBLOCK_PROFILING."""
+
+    @pytest.mark.parametrize('options', [
+        {'directory': ''},
+        {'directory': '/tmp', 'sample_rate': 2},
+        {'directory': '/tmp', 'profiler': 'missing.Profiler'},
+    ])
+    def test_invalid_settings(self, options):
+        """Test a missing directory, bad rate or unknown profiler are configuration errors."""
+        with pytest.raises(ImproperlyConfigured):
+            ProfileSampler(**options)
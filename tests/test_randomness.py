@@ -0,0 +1,146 @@
+"""
+Unit tests for randomness.py - per-render obfuscation material.
+"""
+
+import random
+import re
+from unittest.mock import Mock, patch
+
+import pytest
+from django.template import Template
+from django.test import override_settings
+
+from games import randomness
+from games.handlers.matching import MatchingHandlers
+from games.randomness import RESERVED_NAMES, RenderRandom, _pool_name, get_render_seed
+
+UUID_LIKE_RE = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+
+
+class TestRenderRandom:
+    """Test cases for RenderRandom."""
+
+    def test_uuid_like_encodes_index(self):
+        """Test UUID-like entries carry the partner index in groups 2 and 4."""
+        entry = RenderRandom(item_count=1).uuid_like("deadbeef", 0x1234abcd)
+
+        assert UUID_LIKE_RE.match(entry)
+        parts = entry.split("-")
+        assert parts[0] == "deadbeef"
+        assert int(parts[1] + parts[3], 16) == 0x1234abcd
+
+    def test_key_hexes(self):
+        """Test keys are hex strings of the configured length."""
+        keys = RenderRandom(item_count=4).key_hexes(4)
+
+        assert len(keys) == 4
+        assert all(re.match(r"^[0-9a-f]{8}$", key) for key in keys)
+
+    def test_identifier_alphabet(self):
+        """Test identifiers use only the requested alphabet."""
+        assert re.match(r"^[ab]{32}$", RenderRandom().identifier(32, "ab"))
+
+    @pytest.mark.parametrize("min_len,max_len", [(1, 3), (3, 6)])
+    def test_var_names(self, min_len, max_len):
+        """Test variable names are distinct, in range and never reserved words."""
+        keys = ["runtime", "elem", "tag", "payload", "err"]
+
+        names = RenderRandom().var_names(keys, min_len, max_len)
+
+        assert list(names) == keys
+        assert len(set(names.values())) == len(keys)
+        for name in names.values():
+            assert min_len <= len(name) <= max_len
+            assert name.isalpha() and name.islower()
+            assert name not in RESERVED_NAMES
+
+    def test_var_names_fall_back_to_pool_order(self):
+        """Test colliding picks are replaced by unused names in pool order instead of retrying."""
+        render_random = RenderRandom()
+        with patch.object(render_random, "take", return_value=bytes(16)):
+            names = render_random.var_names(["a", "b"], 1, 1)
+
+        assert names == {"a": "a", "b": "b"}
+
+    def test_var_names_pool_too_small(self):
+        """Test asking for more names than the pool holds fails."""
+        with pytest.raises(ValueError):
+            RenderRandom().var_names(range(27), 1, 1)
+
+    def test_pool_name(self):
+        """Test pool indices enumerate names by length, then alphabetically."""
+        assert [_pool_name(i, 1) for i in (0, 25, 26, 27, 26 + 676)] == ["a", "z", "aa", "ab", "aaa"]
+
+    def test_take_tops_up_when_exhausted(self):
+        """Test reading past the reserved size draws more entropy instead of failing."""
+        render_random = RenderRandom(extra_bytes=0)
+
+        assert len(render_random.take(100)) == 100
+        assert render_random.draws == 2
+
+    def test_rng_does_not_touch_global_generator(self):
+        """Test shuffles use the per-render generator."""
+        state = random.getstate()
+
+        RenderRandom().rng.shuffle(list(range(50)))
+
+        assert random.getstate() == state
+
+
+class TestRenderSeed:
+    """Test cases for seeded renders."""
+
+    def _xblock(self, user_id="user", usage_id="block", attempt=0):
+        """Return a stand-in block with the fields get_render_seed reads."""
+        xblock = Mock(attempt=attempt)
+        xblock.scope_ids.user_id = user_id
+        xblock.scope_ids.usage_id = usage_id
+        return xblock
+
+    def test_no_seed_by_default(self):
+        """Test renders are unseeded unless GAMESXBLOCK_SEEDED_RENDERS is set."""
+        assert get_render_seed(self._xblock()) is None
+        assert not RenderRandom.for_render(self._xblock()).deterministic
+
+    @override_settings(GAMESXBLOCK_SEEDED_RENDERS=True)
+    def test_seed_depends_on_user_block_attempt_and_parts(self):
+        """Test each of user, block, attempt and extra parts changes the seed."""
+        seed = get_render_seed(self._xblock())
+
+        assert get_render_seed(self._xblock()) == seed
+        assert len({
+            seed,
+            get_render_seed(self._xblock(user_id="other")),
+            get_render_seed(self._xblock(usage_id="other")),
+            get_render_seed(self._xblock(attempt=1)),
+            get_render_seed(self._xblock(), "page", 1),
+        }) == 5
+
+    def test_seeded_material_is_reproducible(self):
+        """Test the same seed yields the same bytes, names and shuffles, including top-ups."""
+        def material(seed):
+            render_random = RenderRandom(item_count=1, extra_bytes=0, seed=seed)
+            deck = list(range(20))
+            render_random.rng.shuffle(deck)
+            return render_random.take(64), render_random.var_names(["a", "b"]), deck
+
+        assert material(b"seed") == material(b"seed")
+        assert material(b"seed") != material(b"other")
+
+
+class TestMatchingRenderEntropy:
+    """Test the matching view draws its entropy in bulk."""
+
+    def test_single_entropy_draw_per_render(self):
+        """Test a whole matching render reads system entropy once."""
+        xblock = Mock(is_shuffled=True, title="t", has_timer=False)
+        xblock.cards = [{"term": f"t{i}", "definition": f"d{i}"} for i in range(100)]
+        xblock.get_mode.return_value = "normal"
+        xblock.scope_ids.usage_id.block_id = "block"
+
+        with patch.object(randomness.secrets, "token_bytes", wraps=randomness.secrets.token_bytes) as token_bytes, \
+                patch("games.handlers.matching.get_template", return_value=Template("{{ data_element_id }}")), \
+                patch("games.handlers.matching.add_game_assets"):
+            MatchingHandlers.student_view(xblock)
+
+        token_bytes.assert_called_once()
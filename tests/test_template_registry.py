@@ -0,0 +1,90 @@
+"""
+Unit tests for template_registry.py - compiled template caching.
+"""
+
+from unittest.mock import patch
+
+import pytest
+from django.template import Context, Template
+from django.test import override_settings
+
+from games.constants import GAME_TYPE
+from games.template_registry import TEMPLATE_PATHS, TemplateRegistry, get_template, registry
+
+
+class TestTemplateRegistry:
+    """Test cases for TemplateRegistry."""
+
+    def setup_method(self):
+        """Set up a fresh registry for each test."""
+        self.registry = TemplateRegistry(TEMPLATE_PATHS)
+
+    @override_settings(GAMESXBLOCK_TEMPLATE_AUTO_RELOAD=False)
+    def test_compiles_template_once(self):
+        """Test repeated lookups reuse the compiled template."""
+        with patch.object(TemplateRegistry, '_read_source', return_value='<div>{{ title }}</div>') as mock_read:
+            first = self.registry.get(GAME_TYPE.MATCHING)
+            second = self.registry.get(GAME_TYPE.MATCHING)
+
+        assert first is second
+        mock_read.assert_called_once()
+        assert self.registry.stats() == {'hits': 1, 'misses': 1, 'size': 1}
+
+    @override_settings(GAMESXBLOCK_TEMPLATE_AUTO_RELOAD=False)
+    def test_templates_cached_per_game_type(self):
+        """Test each game type gets its own compiled template."""
+        flashcards = self.registry.get(GAME_TYPE.FLASHCARDS)
+        matching = self.registry.get(GAME_TYPE.MATCHING)
+
+        assert flashcards is not matching
+        assert self.registry.stats() == {'hits': 0, 'misses': 2, 'size': 2}
+
+    def test_renders_packaged_template(self):
+        """Test the packaged template compiles and renders."""
+        template = self.registry.get(GAME_TYPE.FLASHCARDS)
+
+        html = template.render(Context({'title': 'Vocabulary', 'list_length': 0}))
+
+        assert 'Vocabulary' in html
+
+    def test_unknown_game_type(self):
+        """Test an unknown game type raises ValueError."""
+        with pytest.raises(ValueError):
+            self.registry.get('unknown')
+
+    @override_settings(GAMESXBLOCK_TEMPLATE_AUTO_RELOAD=True)
+    def test_reloads_when_file_changes(self):
+        """Test the template is recompiled after its file changes on disk."""
+        with patch.object(TemplateRegistry, '_read_source', side_effect=['<p>old</p>', '<p>new</p>']), \
+                patch.object(TemplateRegistry, '_get_mtime', side_effect=[1.0, 1.0, 2.0]):
+            old = self.registry.get(GAME_TYPE.MATCHING)
+            cached = self.registry.get(GAME_TYPE.MATCHING)
+            new = self.registry.get(GAME_TYPE.MATCHING)
+
+        assert old is cached
+        assert new is not old
+        assert new.render(Context()) == '<p>new</p>'
+        assert self.registry.stats() == {'hits': 1, 'misses': 2, 'size': 1}
+
+    @override_settings(GAMESXBLOCK_TEMPLATE_AUTO_RELOAD=False)
+    def test_no_file_check_when_auto_reload_disabled(self):
+        """Test the file is not stat'ed when auto-reload is disabled."""
+        with patch.object(TemplateRegistry, '_get_mtime') as mock_mtime:
+            self.registry.get(GAME_TYPE.MATCHING)
+            self.registry.get(GAME_TYPE.MATCHING)
+
+        mock_mtime.assert_not_called()
+
+    def test_clear(self):
+        """Test clear drops compiled templates and resets counters."""
+        self.registry.get(GAME_TYPE.MATCHING)
+        self.registry.clear()
+
+        assert self.registry.stats() == {'hits': 0, 'misses': 0, 'size': 0}
+
+    def test_get_template_uses_shared_registry(self):
+        """Test module-level get_template delegates to the shared registry."""
+        template = get_template(GAME_TYPE.MATCHING)
+
+        assert isinstance(template, Template)
+        assert registry.get(GAME_TYPE.MATCHING) is template
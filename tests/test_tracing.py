@@ -0,0 +1,302 @@
+"""
+Unit tests for tracing.py - stage timing of renders and handlers.
+"""
+
+import json
+import logging
+import socket
+from unittest.mock import Mock
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from xblock.field_data import DictFieldData
+from xblock.fields import ScopeIds
+
+from games import tracing
+from games.constants import CARD_FIELD, GAME_TYPE
+from games.games import GamesXBlock
+from games.handlers.common import reset_cipher_cache
+from games.tracing import (
+    LoggingSink,
+    MemorySink,
+    StatsdSink,
+    TraceSink,
+    get_trace_sink,
+    reset_trace_sink,
+    size_budget,
+    stage,
+    traced,
+)
+
+TIMING = {
+    'operation': 'student_view',
+    'stage': 'encode',
+    'duration_ms': 1.5,
+    'block_id': 'block-1',
+    'game_type': 'matching',
+    'deck_size': 12,
+}
+
+
+def _make_block(game_type, card_count=6):
+    """Return a games block with a deck of card_count cards."""
+    cards = [
+        {CARD_FIELD.CARD_KEY: f'key-{i}', CARD_FIELD.TERM: f'term-{i}', CARD_FIELD.DEFINITION: f'definition-{i}'}
+        for i in range(card_count)
+    ]
+    runtime = Mock(is_author_mode=False)
+    runtime.local_resource_url.side_effect = lambda block, uri: f'/resource/{uri}'
+    field_data = DictFieldData({'game_type': game_type, 'cards': cards})
+    return GamesXBlock(runtime, field_data, ScopeIds('user', 'games', 'definition', Mock(block_id='block-1')))
+
+
+class FailingSink(TraceSink):
+    """Sink that always raises."""
+
+    def emit(self, timings):
+        raise RuntimeError('sink down')
+
+
+@pytest.fixture(autouse=True)
+def _fresh_sink():
+    """Rebuild the sink from settings in every test."""
+    reset_trace_sink()
+    yield
+    reset_trace_sink()
+
+
+class TestTracingOff:
+    """Test cases for the default, disabled state."""
+
+    def test_no_sink_by_default(self):
+        """Test tracing is off unless configured."""
+        assert get_trace_sink() is None
+
+    def test_stage_is_shared_no_op(self):
+        """Test stages outside a trace do not allocate a timer."""
+        assert stage('encode') is stage('shuffle')
+
+    def test_traced_calls_through(self):
+        """Test a traced method runs untouched while tracing is off."""
+        xblock = Mock()
+
+        @traced
+        def handler(block, data, suffix=''):
+            return (block, data, stage('inner'))
+
+        assert handler(xblock, {'a': 1}) == (xblock, {'a': 1}, stage('other'))
+        xblock.scope_ids.usage_id.block_id.assert_not_called()
+
+
+class TestTraces:
+    """Test cases for traces collected into the memory sink."""
+
+    @pytest.fixture(autouse=True)
+    def _memory_sink(self, settings):
+        """Trace into a memory sink, with no block keys derived yet."""
+        reset_cipher_cache()
+        settings.GAMESXBLOCK_TRACING = 'memory'
+        self.sink = get_trace_sink()
+
+    def test_setting_selects_sink(self):
+        """Test the sink is built once from GAMESXBLOCK_TRACING."""
+        assert isinstance(self.sink, MemorySink)
+        assert get_trace_sink() is self.sink
+
+    def test_matching_render_stages(self):
+        """Test a matching render reports each stage tagged with the block, game type and deck size."""
+        _make_block(GAME_TYPE.MATCHING, card_count=6).student_view()
+
+        assert self.sink.stages('student_view') == [
+            'randomness', 'shuffle', 'key_derivation', 'encrypt', 'encode',
+            'template_load', 'template_render', 'assets', 'total',
+        ]
+        for timing in self.sink.timings:
+            assert timing['block_id'] == 'block-1'
+            assert timing['game_type'] == GAME_TYPE.MATCHING
+            assert timing['deck_size'] == 6
+            assert timing.get('duration_ms', 0) >= 0
+
+    def test_flashcards_render_stages(self):
+        """Test a flashcards render reports its stages."""
+        _make_block(GAME_TYPE.FLASHCARDS).student_view()
+
+        assert self.sink.stages() == [
+            'randomness', 'shuffle', 'encode', 'template_load', 'template_render', 'assets', 'total',
+        ]
+
+    def test_json_handler_stages(self):
+        """Test json handlers are traced under their own name."""
+        xblock = _make_block(GAME_TYPE.MATCHING)
+        key = json.loads(xblock.reshuffle_matching_game(Mock(method='POST', body=b'{}')).body)['key']
+        self.sink.clear()
+
+        request = Mock(method='POST', body=json.dumps({'matching_key': key}).encode())
+        xblock.start_matching_game(request)
+
+        assert self.sink.stages('start_matching_game') == ['decrypt', 'total']
+
+    def test_total_is_recorded_on_error(self):
+        """Test a failing call still reports its total."""
+        @traced
+        def handler(block):
+            with stage('work'):
+                raise ValueError('boom')
+
+        with pytest.raises(ValueError):
+            handler(_make_block(GAME_TYPE.MATCHING))
+
+        assert self.sink.stages('handler') == ['work', 'total']
+
+    def test_sink_errors_do_not_fail_the_call(self, monkeypatch):
+        """Test sink failures are logged, not raised."""
+        mock_log = Mock()
+        monkeypatch.setattr(tracing, '_config', (FailingSink(), None))
+        monkeypatch.setattr(tracing, 'log', mock_log)
+
+        frag = _make_block(GAME_TYPE.FLASHCARDS).student_view()
+
+        assert frag.content
+        mock_log.exception.assert_called_once()
+
+
+class TestSinks:
+    """Test cases for the built-in sinks and sink configuration."""
+
+    def test_logging_sink(self):
+        """Test the logging sink writes one line per call."""
+        sink = LoggingSink()
+        sink.logger = Mock()
+
+        sink.emit([TIMING, {**TIMING, 'stage': 'total', 'duration_ms': 3.25}])
+
+        level, message, *args = sink.logger.log.call_args[0]
+        assert level == logging.INFO
+        assert message % tuple(args) == (
+            'games student_view block=block-1 game_type=matching deck_size=12 encode=1.500ms total=3.250ms'
+        )
+
+    def test_statsd_sink_sends_one_packet(self):
+        """Test statsd timers arrive in one UDP packet."""
+        receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        receiver.bind(('127.0.0.1', 0))
+        receiver.settimeout(5)
+        try:
+            sink = StatsdSink(port=receiver.getsockname()[1], prefix='games')
+            sink.emit([TIMING, {**TIMING, 'stage': 'total'}])
+            packet = receiver.recv(4096).decode()
+        finally:
+            receiver.close()
+
+        assert packet.splitlines() == [
+            'games.student_view.encode:1.500|ms|#block_id:block-1,game_type:matching,deck_size:12',
+            'games.student_view.total:1.500|ms|#block_id:block-1,game_type:matching,deck_size:12',
+        ]
+
+    def test_statsd_sink_without_tags(self):
+        """Test tags can be left out for plain statsd servers."""
+        assert StatsdSink(tags=False).format(TIMING) == 'gamesxblock.student_view.encode:1.500|ms'
+
+    def test_sink_options_and_dotted_path(self, settings):
+        """Test a dict setting passes its options to a sink named by dotted path."""
+        settings.GAMESXBLOCK_TRACING = {'sink': 'games.tracing.LoggingSink', 'level': 'DEBUG'}
+
+        sink = get_trace_sink()
+
+        assert isinstance(sink, LoggingSink)
+        assert sink.level == logging.DEBUG
+
+    @pytest.mark.parametrize('value', ['nope', {'port': 8125}])
+    def test_invalid_sink(self, settings, value):
+        """Test unknown or missing sinks are reported as configuration errors."""
+        settings.GAMESXBLOCK_TRACING = value
+
+        with pytest.raises(ImproperlyConfigured):
+            get_trace_sink()
+
+
+class TestSizes:
+    """Test cases for output sizes and their budgets."""
+
+    @pytest.fixture(autouse=True)
+    def _memory_sink(self, settings):
+        """Trace into a memory sink."""
+        settings.GAMESXBLOCK_TRACING = 'memory'
+        self.sink = get_trace_sink()
+
+    def test_render_sizes(self):
+        """Test a render reports its payload, HTML and inlined asset sizes."""
+        frag = _make_block(GAME_TYPE.FLASHCARDS).student_view()
+
+        sizes = self.sink.sizes('student_view')
+        assert sizes['html'] == len(frag.content.encode('utf-8'))
+        assert 0 < sizes['encoded_mapping'] < sizes['html']
+        assert sizes['inline_css'] == len(frag.resources[1].data.encode('utf-8'))
+        assert sizes['inline_js'] == 0
+
+    def test_inline_assets_are_measured(self, settings):
+        """Test inlined CSS and JS count towards the fragment's asset sizes."""
+        settings.GAMESXBLOCK_ASSET_MODE = 'inline'
+
+        frag = _make_block(GAME_TYPE.MATCHING).student_view()
+
+        js = [r.data for r in frag.resources if r.mimetype == 'application/javascript']
+        assert self.sink.sizes()['inline_js'] == len(''.join(js).encode('utf-8'))
+
+    def test_handler_response_sizes(self):
+        """Test handler response bodies are measured, including refresh_game's rendered page."""
+        xblock = _make_block(GAME_TYPE.MATCHING)
+
+        settings_response = xblock.get_settings(Mock(method='POST', body=b'{}'))
+        refresh_response = xblock.refresh_game(Mock())
+
+        assert self.sink.sizes('get_settings') == {'response': len(settings_response.body)}
+        refresh_sizes = self.sink.sizes('refresh_game')
+        assert refresh_sizes['response'] == len(refresh_response.body)
+        assert 'html' in refresh_sizes
+
+    def test_over_budget_is_logged_and_reported(self, settings, monkeypatch):
+        """Test sizes over a per-deck budget are warned about and carry the budget."""
+        settings.GAMESXBLOCK_SIZE_BUDGETS = {'html': {'base': 100, 'per_card': 10}, 'get_settings.response': 10**6}
+        self.sink = get_trace_sink()
+        mock_log = Mock()
+        monkeypatch.setattr(tracing, 'log', mock_log)
+        xblock = _make_block(GAME_TYPE.MATCHING, card_count=6)
+
+        xblock.student_view()
+        xblock.get_settings(Mock(method='POST', body=b'{}'))
+
+        over_budget = [t for t in self.sink.timings if 'budget' in t]
+        assert [(t['operation'], t['stage'], t['budget']) for t in over_budget] == [('student_view', 'html', 160)]
+        mock_log.warning.assert_called_once()
+
+    def test_budgets_without_tracing(self, settings, monkeypatch):
+        """Test budgets are enforced while no sink is configured."""
+        settings.GAMESXBLOCK_TRACING = None
+        settings.GAMESXBLOCK_SIZE_BUDGETS = {'encoded_mapping': 10}
+        mock_log = Mock()
+        monkeypatch.setattr(tracing, 'log', mock_log)
+
+        _make_block(GAME_TYPE.FLASHCARDS).student_view()
+
+        assert get_trace_sink() is None
+        mock_log.warning.assert_called_once()
+
+    def test_size_budget_lookup(self):
+        """Test handler-specific budgets win over per-name ones, and dict budgets scale with the deck."""
+        budgets = {'response': 500, 'refresh_game.response': {'base': 1000, 'per_card': 50}}
+
+        assert size_budget(budgets, 'get_settings', 'response', 10) == 500
+        assert size_budget(budgets, 'refresh_game', 'response', 10) == 1500
+        assert size_budget(budgets, 'student_view', 'html', 10) is None
+
+    def test_size_lines(self):
+        """Test sizes are sent as histograms, with a counter when over budget."""
+        sink = StatsdSink(tags=False)
+        record = {**TIMING, 'stage': 'html', 'bytes': 2048, 'budget': 1024}
+        del record['duration_ms']
+
+        assert sink.format(record).splitlines() == [
+            'gamesxblock.student_view.html_bytes:2048|h',
+            'gamesxblock.student_view.html_over_budget:1|c',
+        ]
@@ -4,18 +4,43 @@ Unit tests for utils.py - Games XBlock utility functions.
 Following Open edX testing standards with pytest and ddt.
 """
 
+import hashlib
+import io
+import threading
+
 import pytest
 from unittest.mock import Mock, patch
 from django.core.exceptions import ImproperlyConfigured
 from django.core.files.storage import default_storage
+from django.test import override_settings
+
+from games.utils import (
+    LRUCache,
+    UploadTooLargeError,
+    delete_image,
+    get_gamesxblock_storage,
+    hash_file,
+    reset_storage_cache,
+)
 
-from games.utils import get_gamesxblock_storage, delete_image
+CUSTOM_STORAGE = {
+    'storage_class': 'django.core.files.storage.FileSystemStorage',
+    'settings': {'location': '/tmp/games-storage'},
+}
 
 
 @pytest.mark.django_db
 class TestGetGamesxblockStorage:
     """Test cases for get_gamesxblock_storage function."""
 
+    def setup_method(self):
+        """Start each test without cached storage instances."""
+        reset_storage_cache()
+
+    def teardown_method(self):
+        """Drop storage instances built from mocked settings."""
+        reset_storage_cache()
+
     @patch('games.utils.settings')
     def test_returns_default_storage_when_no_settings(self, mock_settings):
         """Test returns default_storage when GAMESXBLOCK_STORAGE not configured."""
@@ -117,6 +142,41 @@ class TestGetGamesxblockStorage:
         assert result == mock_storage_instance
 
 
+    @patch('games.utils.settings')
+    @patch('games.utils.import_string')
+    def test_reuses_storage_for_same_settings(self, mock_import_string, mock_settings):
+        """Test the storage is built once and shared while the settings are unchanged."""
+        mock_storage_class = Mock(side_effect=lambda **kwargs: Mock())
+        mock_import_string.return_value = mock_storage_class
+        mock_settings.GAMESXBLOCK_STORAGE = {'storage_class': 'myapp.storage.CustomStorage', 'settings': {'a': 1}}
+
+        first = get_gamesxblock_storage()
+        second = get_gamesxblock_storage()
+        mock_settings.GAMESXBLOCK_STORAGE = {'storage_class': 'myapp.storage.CustomStorage', 'settings': {'a': 2}}
+        third = get_gamesxblock_storage()
+
+        assert first is second
+        assert third is not first
+        assert mock_storage_class.call_count == 2
+
+    def test_storage_rebuilt_when_setting_changes(self):
+        """Test overriding GAMESXBLOCK_STORAGE discards the cached instance."""
+        with override_settings(GAMESXBLOCK_STORAGE=CUSTOM_STORAGE):
+            first = get_gamesxblock_storage()
+            assert get_gamesxblock_storage() is first
+        with override_settings(GAMESXBLOCK_STORAGE=CUSTOM_STORAGE):
+            assert get_gamesxblock_storage() is not first
+
+    @patch('games.utils.settings')
+    def test_failed_builds_are_not_cached(self, mock_settings):
+        """Test a misconfigured storage raises on every call rather than caching the failure."""
+        mock_settings.GAMESXBLOCK_STORAGE = {'settings': {}}
+
+        for _ in range(2):
+            with pytest.raises(ImproperlyConfigured):
+                get_gamesxblock_storage()
+
+
 @pytest.mark.django_db
 class TestDeleteImage:
     """Test cases for delete_image function."""
@@ -164,3 +224,103 @@ class TestDeleteImage:
         mock_storage.exists.assert_called_once_with(special_key)
         mock_storage.delete.assert_called_once_with(special_key)
         assert result is True
+
+
+class TestHashFile:
+    """Test cases for hash_file."""
+
+    def test_hashes_in_chunks_and_rewinds(self):
+        """Test the digest matches hashing the whole file and the file is rewound."""
+        data = bytes(range(256)) * 40
+        file_obj = io.BytesIO(data)
+
+        digest, size = hash_file(file_obj, chunk_size=1000)
+
+        assert digest == hashlib.md5(data).hexdigest()
+        assert size == len(data)
+        assert file_obj.tell() == 0
+
+    def test_size_limit(self):
+        """Test reading stops with an error once the limit is passed."""
+        file_obj = io.BytesIO(b'x' * 5000)
+
+        assert hash_file(io.BytesIO(b'x' * 5000), max_size=5000)[1] == 5000
+        with pytest.raises(UploadTooLargeError):
+            hash_file(file_obj, max_size=4999, chunk_size=1000)
+        assert file_obj.tell() == 5000
+
+
+class TestLRUCache:
+    """Test cases for LRUCache."""
+
+    def test_caches_values(self):
+        """Test the factory runs once per key."""
+        cache = LRUCache(max_size=2)
+        factory = Mock(return_value='value')
+
+        assert cache.get_or_create('a', factory) == 'value'
+        assert cache.get_or_create('a', factory) == 'value'
+
+        factory.assert_called_once()
+        assert cache.stats() == {'hits': 1, 'misses': 1, 'evictions': 0, 'size': 1, 'max_size': 2}
+
+    def test_evicts_least_recently_used(self):
+        """Test the least recently used key is evicted when full."""
+        cache = LRUCache(max_size=2)
+        cache.get_or_create('a', lambda: 1)
+        cache.get_or_create('b', lambda: 2)
+        cache.get_or_create('a', lambda: 1)  # 'b' is now least recently used
+        cache.get_or_create('c', lambda: 3)
+
+        assert cache.get_or_create('a', lambda: 'rebuilt') == 1
+        assert cache.get_or_create('b', lambda: 'rebuilt') == 'rebuilt'
+        assert cache.stats()['evictions'] == 2
+
+    @patch('games.utils.time.monotonic')
+    def test_entries_expire_after_ttl(self, mock_monotonic):
+        """Test entries older than the ttl are rebuilt."""
+        cache = LRUCache(max_size=4, ttl=10)
+        mock_monotonic.return_value = 100
+        cache.get_or_create('a', lambda: 'old')
+        mock_monotonic.return_value = 105
+        assert cache.get_or_create('a', lambda: 'new') == 'old'
+        mock_monotonic.return_value = 111
+        assert cache.get_or_create('a', lambda: 'new') == 'new'
+        assert cache.stats()['evictions'] == 1
+
+    def test_zero_size_disables_caching(self):
+        """Test a max_size of 0 calls the factory every time."""
+        cache = LRUCache(max_size=0)
+        factory = Mock(return_value='value')
+
+        cache.get_or_create('a', factory)
+        cache.get_or_create('a', factory)
+
+        assert factory.call_count == 2
+        assert cache.stats()['size'] == 0
+
+    def test_clear(self):
+        """Test clear drops entries and resets counters."""
+        cache = LRUCache(max_size=2)
+        cache.get_or_create('a', lambda: 1)
+        cache.clear()
+
+        assert cache.stats() == {'hits': 0, 'misses': 0, 'evictions': 0, 'size': 0, 'max_size': 2}
+
+    def test_concurrent_access(self):
+        """Test the cache stays consistent under concurrent use."""
+        cache = LRUCache(max_size=8)
+
+        def worker():
+            for i in range(200):
+                assert cache.get_or_create(i % 16, lambda i=i: i % 16) == i % 16
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = cache.stats()
+        assert stats['size'] <= 8
+        assert stats['hits'] + stats['misses'] == 8 * 200